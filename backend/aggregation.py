@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+PRIMARY_METRIC = "revenue_per_cost"
+
+
+def attainment_status(attainment: float) -> str:
+    # 与前端图例一致：≥ 基准为 good，低于基准 20% 以内为 warn，超过 20% 为 bad
+    if attainment >= 1:
+        return "good"
+    if attainment >= 0.8:
+        return "warn"
+    return "bad"
+
+
+class OrgAggregator:
+    """
+    组织树增量汇总引擎。
+
+    为每个非叶子节点维护「子节点指标 × 人数」的加权和与子节点人数和，
+    叶子节点更新时只沿 parent_map 向上重算祖先路径，复杂度为路径上各节点的子节点数之和。
+    汇总口径与原递归实现一致：父节点使用子节点四舍五入（2 位）后的值加权。
+    加权和总是按子节点顺序从头累加（_collect），不做浮点差量修正，增量结果与全量重建逐位一致。
+    """
+
+    def __init__(self, root: dict, parent_map: Optional[Dict[str, Optional[str]]] = None):
+        self.root = root
+        self.nodes: Dict[str, dict] = {}
+        self.parent_map: Dict[str, Optional[str]] = {} if parent_map is None else parent_map
+        self.headcount: Dict[str, int] = {}
+        self.values: Dict[str, Dict[str, float]] = {}
+        self.metric_meta: Dict[str, Tuple[str, str]] = {}
+        self._sums: Dict[str, Dict[str, float]] = {}
+        self._child_headcount: Dict[str, int] = {}
+        self.rebuild()
+
+    @classmethod
+    def from_shards(cls, root: dict, shards: List["OrgAggregator"]) -> "OrgAggregator":
+        """
+        合并各子树（通常为根的各个直接子节点，可能在别的进程中汇总）的汇总状态：
+        root 的 children 替换为各分片的根，再按同样的人数加权只结算 root 本身。
+        """
+        agg = cls.__new__(cls)
+        agg.root = root
+        agg.nodes = {}
+        agg.parent_map = {root["id"]: None}
+        agg.headcount = {}
+        agg.values = {}
+        agg.metric_meta = {}
+        agg._sums = {}
+        agg._child_headcount = {}
+        for shard in shards:
+            agg.nodes.update(shard.nodes)
+            agg.parent_map.update(shard.parent_map)
+            agg.parent_map[shard.root["id"]] = root["id"]
+            agg.headcount.update(shard.headcount)
+            agg.values.update(shard.values)
+            agg._sums.update(shard._sums)
+            agg._child_headcount.update(shard._child_headcount)
+            for mid, meta in shard.metric_meta.items():
+                agg.metric_meta.setdefault(mid, meta)
+        root["children"] = [shard.root for shard in shards]
+        agg.nodes[root["id"]] = root
+        agg._collect(root)
+        agg._settle(root)
+        return agg
+
+    # ------------------------------------------------------------------ 全量
+    def rebuild(self) -> None:
+        """全量（迭代后序）重建所有节点的汇总状态，并回填到节点 dict。"""
+        self.nodes.clear()
+        self.headcount.clear()
+        self.values.clear()
+        self._sums.clear()
+        self._child_headcount.clear()
+        fill_parent_map = not self.parent_map
+
+        order: List[dict] = []
+        stack: List[Tuple[dict, Optional[str]]] = [(self.root, None)]
+        while stack:
+            node, parent = stack.pop()
+            self.nodes[node["id"]] = node
+            if fill_parent_map:
+                self.parent_map[node["id"]] = parent
+            order.append(node)
+            for child in reversed(node.get("children", []) or []):
+                stack.append((child, node["id"]))
+
+        for node in reversed(order):
+            if not node.get("children"):
+                self._load_leaf(node)
+                continue
+            self._collect(node)
+            self._settle(node)
+
+    def _collect(self, node: dict) -> None:
+        """按子节点顺序重新累加非叶子节点的加权和与子节点人数和（全量与增量共用，保证结果一致）。"""
+        sums: Dict[str, float] = {}
+        child_headcount = 0
+        for child in node["children"]:
+            hc = self.headcount[child["id"]]
+            child_headcount += hc
+            for mid, val in self.values[child["id"]].items():
+                sums[mid] = sums.get(mid, 0.0) + val * hc
+        self._sums[node["id"]] = sums
+        self._child_headcount[node["id"]] = child_headcount
+
+    def _load_leaf(self, node: dict) -> None:
+        values: Dict[str, float] = {}
+        for m in node.get("metrics", []) or []:
+            values[m["id"]] = m["value"]
+            self.metric_meta.setdefault(m["id"], (m.get("name", m["id"]), m.get("unit", "")))
+            if m["id"] == PRIMARY_METRIC:
+                node["value"] = m["value"]
+        self.values[node["id"]] = values
+        self.headcount[node["id"]] = node.get("headcount", 0)
+
+    def _settle(self, node: dict) -> None:
+        """根据加权和重新计算非叶子节点的人数与指标，并写回节点。"""
+        node_id = node["id"]
+        sums = self._sums[node_id]
+        total_headcount = self._child_headcount[node_id] or node.get("headcount", 0)
+        values = {mid: round(total / total_headcount, 2) if total_headcount else 0 for mid, total in sums.items()}
+        self.headcount[node_id] = total_headcount
+        self.values[node_id] = values
+
+        node["headcount"] = total_headcount
+        node["metrics"] = [
+            {"id": mid, "name": self.metric_meta.get(mid, (mid, ""))[0], "value": val, "unit": self.metric_meta.get(mid, (mid, ""))[1]}
+            for mid, val in values.items()
+        ]
+        if PRIMARY_METRIC in values:
+            node["value"] = values[PRIMARY_METRIC]
+
+    # ------------------------------------------------------------------ 增量
+    def update_leaf(
+        self, dept_id: str, headcount: Optional[int] = None, metrics: Optional[Dict[str, float]] = None
+    ) -> List[str]:
+        """
+        更新单个叶子节点的人数/指标，并只沿祖先路径逐个由子节点重算。
+        返回值为本次发生变化的节点 id（叶子在前，祖先依次向上）。
+        """
+        node = self.nodes.get(dept_id)
+        if node is None:
+            raise KeyError(dept_id)
+        if node.get("children"):
+            raise ValueError(f"{dept_id} is not a leaf department")
+        for mid in metrics or {}:
+            if mid not in self.values[dept_id] and mid not in self.metric_meta:
+                raise KeyError(mid)
+
+        old_hc = self.headcount[dept_id]
+        old_values = self.values[dept_id]
+
+        if headcount is not None:
+            node["headcount"] = headcount
+        if metrics:
+            existing = {m["id"]: m for m in node.get("metrics", []) or []}
+            for mid, val in metrics.items():
+                if mid in existing:
+                    existing[mid]["value"] = val
+                else:
+                    name, unit = self.metric_meta[mid]
+                    node.setdefault("metrics", []).append({"id": mid, "name": name, "value": val, "unit": unit})
+        self._load_leaf(node)
+
+        changed = [dept_id]
+        child_id = dept_id
+        parent_id = self.parent_map.get(dept_id)
+        while parent_id is not None:
+            new_hc = self.headcount[child_id]
+            new_values = self.values[child_id]
+            if new_hc == old_hc and new_values == old_values:
+                break
+            old_hc = self.headcount[parent_id]
+            old_values = self.values[parent_id]  # _settle 换入新的 dict，旧的不会被改写
+            parent = self.nodes[parent_id]
+            self._collect(parent)
+            self._settle(parent)
+            changed.append(parent_id)
+            child_id = parent_id
+            parent_id = self.parent_map.get(parent_id)
+        return changed
+
+    # ------------------------------------------------------------------ 推演
+    def project(
+        self, leaves: Mapping[str, Tuple[int, float]], metric: str = PRIMARY_METRIC
+    ) -> Dict[str, Tuple[int, float]]:
+        """
+        假设性汇总（copy-on-write）：leaves 给出若干叶子的新（人数, 指标值），
+        返回全部受影响节点（叶子及其祖先）推演后的（人数, 指标值），不修改引擎自身状态。
+
+        受影响的祖先按深度自底向上逐个结算，由子节点（overlay 中的推演值或当前值）重新累加，
+        口径与 update_leaf 相同（子节点值先四舍五入再加权）；多个叶子共享的祖先只结算一次。
+        """
+        result: Dict[str, Tuple[int, float]] = {}
+        pending: set = set()
+        depth_memo: Dict[str, int] = {}
+        heap: List[Tuple[int, str]] = []
+
+        def depth(node_id: str) -> int:
+            path = []
+            current: Optional[str] = node_id
+            while current is not None and current not in depth_memo:
+                path.append(current)
+                current = self.parent_map.get(current)
+            d = depth_memo[current] if current is not None else -1
+            for nid in reversed(path):
+                d += 1
+                depth_memo[nid] = d
+            return depth_memo[node_id]
+
+        def push(node_id: str, new_hc: int, new_value: float) -> None:
+            result[node_id] = (new_hc, new_value)
+            old_hc = self.headcount[node_id]
+            old_value = self.values[node_id].get(metric, 0.0)
+            parent_id = self.parent_map.get(node_id)
+            if parent_id is None or (new_hc == old_hc and new_value == old_value):
+                return
+            if parent_id not in pending:
+                pending.add(parent_id)
+                heapq.heappush(heap, (-depth(parent_id), parent_id))
+
+        for dept_id, (headcount, value) in leaves.items():
+            node = self.nodes.get(dept_id)
+            if node is None:
+                raise KeyError(dept_id)
+            if node.get("children"):
+                raise ValueError(f"{dept_id} is not a leaf department")
+            push(dept_id, headcount, value)
+
+        while heap:
+            _, node_id = heapq.heappop(heap)
+            total = 0.0
+            child_headcount = 0
+            for child in self.nodes[node_id]["children"]:
+                child_id = child["id"]
+                if child_id in result:
+                    hc, val = result[child_id]
+                else:
+                    hc, val = self.headcount[child_id], self.values[child_id].get(metric)
+                child_headcount += hc
+                if val is not None:
+                    total += val * hc
+            total_headcount = child_headcount or self.headcount[node_id]
+            push(node_id, total_headcount, round(total / total_headcount, 2) if total_headcount else 0)
+        return result
+
+    def ancestors(self, dept_id: str) -> Iterable[str]:
+        current = self.parent_map.get(dept_id)
+        while current is not None:
+            yield current
+            current = self.parent_map.get(current)
+
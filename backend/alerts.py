@@ -0,0 +1,263 @@
+"""
+基于规则的部门状态判定与告警（/api/alerts）。
+
+规则是声明式的：
+- 阈值规则（threshold）：某个字段与常数比较，字段可为达成率 attainment（展示值 / 基准）、
+  展示值 value、人数 headcount 或某个指标 id；
+- 趋势规则（trend）：某个指标的月度历史最近 points 个点严格单调下降（或上升）。
+每条规则带严重级别（warn / bad），部门状态取全部命中规则中最严重的一级，无命中为 good。
+
+构建快照（汇总完成）后对全部部门向量化判定一遍；单个叶子更新时只重新判定发生变化的节点
+（叶子及其祖先）的阈值规则。趋势规则只依赖历史序列，每份快照计算一次。
+默认规则与 attainment_status 的区间一致，可用 HR_ALERT_RULES 指向的 JSON 文件替换。
+"""
+from __future__ import annotations
+
+import json
+import operator
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from aggregation import PRIMARY_METRIC
+from org_store import OrgStore
+from timeseries import HistoryStore
+
+# 下标即严重程度
+SEVERITIES = ("good", "warn", "bad")
+RULE_TYPES = ("threshold", "trend")
+THRESHOLD_FIELDS = ("attainment", "value", "headcount")
+TREND_DIRECTIONS = ("down", "up")
+MAX_RULES = 64
+
+_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    severity: str
+    type: str = "threshold"
+    # threshold
+    field: str = "attainment"
+    op: str = "<"
+    threshold: float = 0.0
+    # trend
+    metric: str = PRIMARY_METRIC
+    points: int = 3
+    direction: str = "down"
+    message: str = ""
+
+    def to_dict(self) -> dict:
+        if self.type == "trend":
+            spec = {"metric": self.metric, "points": self.points, "direction": self.direction}
+        else:
+            spec = {"field": self.field, "op": self.op, "threshold": self.threshold}
+        return {"id": self.id, "type": self.type, "severity": self.severity, **spec, "message": self.message}
+
+
+DEFAULT_RULES = (
+    Rule("attainment-critical", "bad", field="attainment", op="<", threshold=0.8, message="人效低于基准 20% 以上"),
+    Rule("attainment-below-baseline", "warn", field="attainment", op="<", threshold=1.0, message="人效低于基准"),
+    Rule("declining-3", "warn", type="trend", metric=PRIMARY_METRIC, points=3, direction="down", message="人效连续三期下降"),
+)
+
+
+def parse_rules(items: object) -> List[Rule]:
+    """校验规则配置（JSON 列表）；格式错误抛 ValueError。"""
+    if not isinstance(items, list) or not items:
+        raise ValueError("rules must be a non-empty list")
+    if len(items) > MAX_RULES:
+        raise ValueError(f"at most {MAX_RULES} rules")
+    rules: List[Rule] = []
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("id"), str) or not item["id"]:
+            raise ValueError("each rule needs an id")
+        rule_id = item["id"]
+        if rule_id in seen:
+            raise ValueError(f"duplicate rule id: {rule_id}")
+        seen.add(rule_id)
+        rule_type = item.get("type", "threshold")
+        severity = item.get("severity")
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"{rule_id}: type must be one of {', '.join(RULE_TYPES)}")
+        if severity not in SEVERITIES[1:]:
+            raise ValueError(f"{rule_id}: severity must be warn or bad")
+        message = item.get("message", "")
+        if not isinstance(message, str):
+            raise ValueError(f"{rule_id}: message must be a string")
+        if rule_type == "threshold":
+            field, op, threshold = item.get("field", "attainment"), item.get("op", "<"), item.get("threshold")
+            if not isinstance(field, str) or not field:
+                raise ValueError(f"{rule_id}: field must be a string")
+            if op not in _OPS:
+                raise ValueError(f"{rule_id}: op must be one of {', '.join(_OPS)}")
+            if not isinstance(threshold, (int, float)) or isinstance(threshold, bool):
+                raise ValueError(f"{rule_id}: threshold must be a number")
+            rules.append(Rule(rule_id, severity, field=field, op=op, threshold=float(threshold), message=message))
+        else:
+            metric, points, direction = item.get("metric", PRIMARY_METRIC), item.get("points", 3), item.get("direction", "down")
+            if not isinstance(metric, str) or not metric:
+                raise ValueError(f"{rule_id}: metric must be a string")
+            if not isinstance(points, int) or isinstance(points, bool) or points < 2:
+                raise ValueError(f"{rule_id}: points must be an integer >= 2")
+            if direction not in TREND_DIRECTIONS:
+                raise ValueError(f"{rule_id}: direction must be down or up")
+            rules.append(Rule(rule_id, severity, type="trend", metric=metric, points=points, direction=direction, message=message))
+    return rules
+
+
+def load_rules(path: str) -> List[Rule]:
+    """读取规则文件：JSON 列表，或 {"rules": [...]}。"""
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    return parse_rules(payload.get("rules") if isinstance(payload, dict) else payload)
+
+
+_default_rules: Optional[List[Rule]] = None
+
+
+def default_rules() -> List[Rule]:
+    global _default_rules
+    if _default_rules is None:
+        path = os.getenv("HR_ALERT_RULES")
+        _default_rules = load_rules(path) if path else list(DEFAULT_RULES)
+    return _default_rules
+
+
+def trend_mask(store: OrgStore, history: Optional[HistoryStore], rule: Rule) -> np.ndarray:
+    """月度历史最近 rule.points 个点严格单调（按 rule.direction）的部门行。"""
+    n = len(store)
+    mask = np.zeros(n, dtype=bool)
+    if history is None or n == 0:
+        return mask
+    series = np.fromiter((history.key_index.get((dept_id, rule.metric), -1) for dept_id in store.ids), dtype=np.int64, count=n)
+    rows = np.flatnonzero(series >= 0)
+    if rows.size == 0:
+        return mask
+    level = history.level("month")
+    start, end = level.offsets[series[rows]], level.offsets[series[rows] + 1]
+    enough = end - start >= rule.points
+    rows, end = rows[enough], end[enough]
+    compare = np.less if rule.direction == "down" else np.greater
+    hit = np.ones(rows.size, dtype=bool)
+    for k in range(1, rule.points):
+        hit &= compare(level.values[end - k], level.values[end - k - 1])
+    mask[rows[hit]] = True
+    return mask
+
+
+class RuleEngine:
+    """
+    一份快照上的规则判定结果：fired 为（部门 × 规则）的命中矩阵，severity 为各部门的状态下标。
+    判定结果写回 OrgStore.status_idx（只写发生变化的行）；detail.statusSummary 在读取时
+    由当前命中的规则生成（OrgStore.summarize），不再使用导入时写入的文字。
+    """
+
+    def __init__(self, store: OrgStore, history: Optional[HistoryStore], rules: Optional[Sequence[Rule]] = None):
+        self.store = store
+        self.rules = list(default_rules() if rules is None else rules)
+        self.rule_index: Dict[str, int] = {rule.id: j for j, rule in enumerate(self.rules)}
+        self._rule_severity = np.array([SEVERITIES.index(rule.severity) for rule in self.rules], dtype=np.int8)
+        self._status_codes = np.array([store.intern(s) for s in SEVERITIES], dtype=store.status_idx.dtype)
+        n = len(store)
+        self.fired = np.zeros((n, len(self.rules)), dtype=bool)
+        self.severity = np.zeros(n, dtype=np.int8)
+        for j, rule in enumerate(self.rules):
+            if rule.type == "trend":
+                self.fired[:, j] = trend_mask(store, history, rule)
+        store.summarize = self.summary
+
+    def _field(self, field: str, rows: np.ndarray) -> np.ndarray:
+        store = self.store
+        if field == "attainment":
+            baseline = store.baseline[rows]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(baseline > 0, store.value[rows] / baseline, np.nan)
+        if field == "value":
+            return store.value[rows]
+        if field == "headcount":
+            return store.headcount[rows].astype(np.float64)
+        col = store.metric_col.get(field)
+        if col is None:
+            return np.full(rows.size, np.nan)
+        return store.metrics[rows, col]
+
+    def evaluate(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """重新判定 rows（缺省为全部）的阈值规则与状态，返回状态发生变化的行。"""
+        store = self.store
+        rows = np.arange(len(store)) if rows is None else np.asarray(rows, dtype=np.int64)
+        for j, rule in enumerate(self.rules):
+            if rule.type == "threshold":
+                with np.errstate(invalid="ignore"):
+                    self.fired[rows, j] = _OPS[rule.op](self._field(rule.field, rows), rule.threshold)
+        if self.rules:
+            severity = np.where(self.fired[rows], self._rule_severity, 0).max(axis=1)
+        else:
+            severity = np.zeros(rows.size, dtype=np.int8)
+        self.severity[rows] = severity
+        codes = self._status_codes[severity]
+        differs = store.status_idx[rows] != codes
+        changed = rows[differs]
+        store.status_idx[changed] = codes[differs]
+        return changed
+
+    def status_for(self, row: int, value: float) -> str:
+        """假设展示值变为 value 时该部门的状态（推演用；趋势与其他字段沿用当前判定）。"""
+        baseline = float(self.store.baseline[row])
+        sample = {"value": value, "attainment": value / baseline if baseline > 0 else float("nan")}
+        worst = 0
+        for j, rule in enumerate(self.rules):
+            if rule.type == "threshold" and rule.field in sample:
+                hit = _OPS[rule.op](sample[rule.field], rule.threshold)
+            else:
+                hit = bool(self.fired[row, j])
+            if hit:
+                worst = max(worst, int(self._rule_severity[j]))
+        return SEVERITIES[worst]
+
+    def summary(self, row: int) -> str:
+        """状态说明：当前值、基准、达成率，以及正在命中的规则说明。"""
+        store = self.store
+        text = f"当前 {float(store.value[row])}，基准 {float(store.baseline[row])}，达成率 {store.attainment(row):.0%}"
+        messages = [rule.message or rule.id for j, rule in enumerate(self.rules) if self.fired[row, j]]
+        return f"{text}：{'；'.join(messages)}。" if messages else f"{text}，未触发告警规则。"
+
+    # ------------------------------------------------------------------ 查询
+    def firing(self, rows: np.ndarray, severity: Optional[str] = None, rule_id: Optional[str] = None) -> np.ndarray:
+        """rows 中正在告警的行（可按状态 / 规则过滤），按严重程度降序、达成率升序排列。"""
+        levels = self.severity[rows]
+        mask = levels > 0 if severity is None else levels == SEVERITIES.index(severity)
+        if rule_id is not None:
+            mask &= self.fired[rows, self.rule_index[rule_id]]
+        picked = rows[mask]
+        attainment = np.nan_to_num(self._field("attainment", picked), nan=np.inf)
+        return picked[np.lexsort((attainment, -self.severity[picked]))]
+
+    def counts(self, rows: np.ndarray) -> Dict[str, int]:
+        tally = np.bincount(self.severity[rows], minlength=len(SEVERITIES))
+        return {status: int(tally[i]) for i, status in enumerate(SEVERITIES)}
+
+    def entry(self, row: int) -> dict:
+        store = self.store
+        baseline = float(store.baseline[row])
+        value = float(store.value[row])
+        return {
+            "id": store.ids[row],
+            "name": store.name(row),
+            "leader": store.leader(row),
+            "depth": int(store.depth[row]),
+            "headcount": int(store.headcount[row]),
+            "status": SEVERITIES[self.severity[row]],
+            "value": value,
+            "baseline": baseline,
+            "attainment": round(value / baseline, 4) if baseline > 0 else None,
+            "rules": [
+                {"id": rule.id, "severity": rule.severity, "message": rule.message}
+                for j, rule in enumerate(self.rules)
+                if self.fired[row, j]
+            ],
+        }
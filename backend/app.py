@@ -1,740 +1,1337 @@
 from __future__ import annotations
 
+import atexit
+import hashlib
+import hmac
+import itertools
+import json
+import logging
 import os
-from dataclasses import asdict, dataclass
-from typing import Dict, List
+import random
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote
 
-from flask import Flask, jsonify, request
+import numpy as np
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
+from aggregation import PRIMARY_METRIC
+from alerts import SEVERITIES as ALERT_SEVERITIES
+from change_feed import ChangeEvent, ChangeLog
+from dataset import Dataset, seed_dataset
+from ingestion import SUMMARY_HISTORY_POINTS, TRAILING_MONTHS, ingest
+from instrumentation import (
+    RequestProfiler,
+    cache_lookups,
+    registry,
+    request_latency,
+    requests_total,
+    response_size,
+    set_endpoint,
+    stage,
+)
+from models import MetricDetail, MetricSummary
+from periods import PERIOD_PATTERN, PeriodSnapshot, PeriodStore
+from rankings import LEVELS as RANK_LEVELS
+from rankings import RANK_BY, level_mask
+from recompute import build_dataset
+from simulation import Change, parse_changes
+from response_cache import CachedResponse, ResponseCache
+from scopes import Scope, scoped_tree
+from timeseries import DEFAULT_MAX_POINTS, GRANULARITIES, to_day
+from wire import COLUMNAR_DEFAULT_FIELDS, COLUMNAR_FIELDS, JSON_MIMETYPE, MSGPACK_MIMETYPE, columnar_tree, encode_msgpack, negotiate
+
 app = Flask(__name__)
 CORS(app)
+logger = logging.getLogger(__name__)
 
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+# 随机抽取该比例的请求做 cProfile（0 关闭）；管理员也可对单个请求加 ?profile=1 并带 X-Admin-Token
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# 负责人视图：网关认证用户后注入 X-Leader（UTF-8 百分号编码的负责人姓名）与 X-Leader-Signature
+# （"<过期时间戳>.<leader_signature 的十六进制摘要>"，密钥 HR_LEADER_SECRET 与网关共享），签名有效才采用。
+# 默认非管理员请求必须带有效身份；HR_SCOPE_REQUIRED=0（本地开发）时无身份的请求为全公司视图
+LEADER_HEADER = "X-Leader"
+LEADER_SIGNATURE_HEADER = "X-Leader-Signature"
+LEADER_SECRET = os.getenv("HR_LEADER_SECRET", "")
+SCOPE_REQUIRED = os.getenv("HR_SCOPE_REQUIRED", "1") != "0"
 
-@dataclass
-class MetricDetail:
-    rule: str
-    baseline: float
-    attainment: float
-    history: List[dict]
-
-
-@dataclass
-class MetricSummary:
-    id: str
-    name: str
-    value: float
-    unit: str
-    yoy: float
-    trend: str
-    detail: MetricDetail
-
-
-summary_metrics: List[MetricSummary] = [
-    MetricSummary(
-        id="revenue_per_cost",
-        name="万元人力成本销售收入",
-        value=12.8,
-        unit="万元",
-        yoy=0.078,
-        trend="up",
-        detail=MetricDetail(
-            rule="（销售收入 ÷ 人力成本） / 10000",
-            baseline=12.0,
-            attainment=1.07,
-            history=[
-                {"label": "1月", "value": 11.9},
-                {"label": "2月", "value": 12.0},
-                {"label": "3月", "value": 12.1},
-                {"label": "4月", "value": 12.0},
-                {"label": "5月", "value": 12.2},
-                {"label": "6月", "value": 12.3},
-                {"label": "7月", "value": 12.4},
-                {"label": "8月", "value": 12.5},
-                {"label": "9月", "value": 12.6},
-                {"label": "10月", "value": 12.6},
-                {"label": "11月", "value": 12.7},
-                {"label": "12月", "value": 12.8},
-            ],
-        ),
-    ),
-    MetricSummary(
-        id="per_capita_sales",
-        name="人均销售额",
-        value=576,
-        unit="万元",
-        yoy=0.056,
-        trend="up",
-        detail=MetricDetail(
-            rule="销售总收入 ÷ 在岗销售人数",
-            baseline=550,
-            attainment=1.05,
-            history=[
-                {"label": "1月", "value": 546},
-                {"label": "2月", "value": 548},
-                {"label": "3月", "value": 550},
-                {"label": "4月", "value": 552},
-                {"label": "5月", "value": 554},
-                {"label": "6月", "value": 556},
-                {"label": "7月", "value": 558},
-                {"label": "8月", "value": 560},
-                {"label": "9月", "value": 564},
-                {"label": "10月", "value": 568},
-                {"label": "11月", "value": 572},
-                {"label": "12月", "value": 576},
-            ],
-        ),
-    ),
-    MetricSummary(
-        id="per_capita_cost",
-        name="人均人力成本",
-        value=45,
-        unit="万元",
-        yoy=-0.022,
-        trend="down",
-        detail=MetricDetail(
-            rule="人力成本总额 ÷ 在岗销售人数",
-            baseline=46,
-            attainment=0.98,
-            history=[
-                {"label": "1月", "value": 46.0},
-                {"label": "2月", "value": 45.9},
-                {"label": "3月", "value": 45.8},
-                {"label": "4月", "value": 45.6},
-                {"label": "5月", "value": 45.5},
-                {"label": "6月", "value": 45.3},
-                {"label": "7月", "value": 45.2},
-                {"label": "8月", "value": 45.2},
-                {"label": "9月", "value": 45.1},
-                {"label": "10月", "value": 45.0},
-                {"label": "11月", "value": 45.0},
-                {"label": "12月", "value": 45.0},
-            ],
-        ),
-    ),
-]
-
-org_tree = {
-    "id": "hq",
-    "name": "全国销售中心",
-    "leader": "陈一舟",
-    "headcount": 0,  # 将在下方自动汇总
-    "status": "good",
-    "baseline": 12.0,
-    "value": 13.1,
-    "metrics": [
-        {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": 12.8, "unit": "万元"},
-        {"id": "per_capita_sales", "name": "人均销售额", "value": 576, "unit": "万元"},
-        {"id": "per_capita_cost", "name": "人均人力成本", "value": 45, "unit": "万元"},
-    ],
-    "detail": {
-        "rule": "整体销售中心人效 = 销售收入 / 人力成本",
-        "baseline": 12.0,
-        "attainment": 1.09,
-        "history": [
-            {"label": "7月", "value": 11.8},
-            {"label": "8月", "value": 12.6},
-            {"label": "9月", "value": 13.1},
-        ],
-        "statusSummary": "整体人效高于基准 9%，北区拉动明显，南区拖累。南区下滑导致波动，但总部和北区的正向表现仍维持整体达成率 >100%。",
-        "rootCause": "华南大区销售收入下滑且人力成本刚性，缺勤率与流失率抬升；苏杭事业部大单延迟导致华东承压。",
-        "actions": [
-            "对华南和苏杭成立攻坚小组，逐单推进 TOP 客户，周度复盘进度",
-            "暂停南区非关键岗位补员，优化费用结构，联动 HRBP 管控缺勤率",
-            "将北区/上海成熟打法训练复制到南区与苏杭，加速新人 ramp 与转正",
-        ],
-    },
-    "children": [
-        {
-            "id": "east",
-            "name": "华东大区",
-            "leader": "王悦",
-            "headcount": 0,
-            "status": "warn",
-            "baseline": 12.0,
-            "value": 0,
-            "metrics": [],
-            "detail": {
-                "rule": "大区人效 = 销售收入 / 人力成本（华东口径）",
-                "baseline": 12.0,
-                "attainment": 0.91,
-                "history": [
-                    {"label": "7月", "value": 10.8},
-                    {"label": "8月", "value": 10.5},
-                    {"label": "9月", "value": 10.2},
-                ],
-                "statusSummary": "略低于基准，连续三个月下行。苏杭事业部拖累，上海贡献正向但未能抵消。",
-                "rootCause": "苏杭事业部大单延迟签约，收入未达预期；新人转正慢导致人力成本产出偏低。",
-                "actions": [
-                    "为苏杭设立 TOP 客户冲刺清单，日跟进签约节奏，区总亲自跟进",
-                    "对新人设置 30/60/90 天节点辅导，加速转正；对低绩效人员实施 PIP",
-                    "提升区域销售激励，叠加阶段性奖金以拉动短期签约",
-                ],
-            },
-            "children": [
-                {
-                    "id": "east-a",
-                    "name": "上海事业部",
-                    "leader": "刘畅",
-                    "headcount": 40,
-                    "status": "good",
-                    "baseline": 12.2,
-                    "value": 12.5,
-                    "metrics": [
-                        {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": 12.5, "unit": "万元"},
-                        {"id": "per_capita_sales", "name": "人均销售额", "value": 590, "unit": "万元"},
-                        {"id": "per_capita_cost", "name": "人均人力成本", "value": 44, "unit": "万元"},
-                    ],
-                    "detail": {
-                        "rule": "事业部人效 = 销售收入 / 人力成本（上海）",
-                        "baseline": 12.2,
-                        "attainment": 1.02,
-                        "history": [
-                            {"label": "7月", "value": 11.9},
-                            {"label": "8月", "value": 12.2},
-                            {"label": "9月", "value": 12.5},
-                        ],
-                        "statusSummary": "稳定高于基准，贡献正向，趋势向上。",
-                        "rootCause": "成熟团队，续签稳定，流失率低；新人跟单周期短。",
-                        "actions": [
-                            "复制上海续签打法与客户分层管理 SOP 至苏杭和南区",
-                            "保持核心销售保留激励，确保低流失率",
-                        ],
-                    },
-                },
-                {
-                    "id": "east-b",
-                    "name": "苏杭事业部",
-                    "leader": "宋怡",
-                    "headcount": 30,
-                    "status": "bad",
-                    "baseline": 11.8,
-                    "value": 8.6,
-                    "metrics": [
-                        {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": 8.6, "unit": "万元"},
-                        {"id": "per_capita_sales", "name": "人均销售额", "value": 460, "unit": "万元"},
-                        {"id": "per_capita_cost", "name": "人均人力成本", "value": 50, "unit": "万元"},
-                    ],
-                    "detail": {
-                        "rule": "事业部人效 = 销售收入 / 人力成本（苏杭）",
-                        "baseline": 11.8,
-                        "attainment": 0.73,
-                        "history": [
-                            {"label": "7月", "value": 9.4},
-                            {"label": "8月", "value": 8.9},
-                            {"label": "9月", "value": 8.6},
-                        ],
-                        "statusSummary": "低于基准 22%，下行明显，连续三月低于基准。",
-                        "rootCause": "TOP 客户延迟签单，新人转正慢；销售流失后补员导致人力成本刚性。",
-                        "actions": [
-                            "成立攻坚小组推进 TOP 客户签约，设置逐单负责人与时间表",
-                            "加速新人转正，设置 60/90 天必达指标；低绩效快速退出",
-                            "临时冻结非关键补员，控制人力成本，聚焦高潜客户",
-                        ],
-                    },
-                },
-            ],
-        },
-        {
-            "id": "north",
-            "name": "华北大区",
-            "leader": "李强",
-            "headcount": 60,
-            "status": "good",
-            "baseline": 12.2,
-            "value": 0,
-            "metrics": [],
-            "detail": {
-                "rule": "大区人效 = 销售收入 / 人力成本（华北）",
-                "baseline": 12.2,
-                "attainment": 1.06,
-                "history": [
-                    {"label": "7月", "value": 11.4},
-                    {"label": "8月", "value": 11.9},
-                    {"label": "9月", "value": 12.4},
-                ],
-                "statusSummary": "高于基准 13%，持续向上，对整体贡献最大。",
-                "rootCause": "京津事业部大单兑现，续签能力强，流失率低，新人 ramp 快。",
-                "actions": [
-                    "继续深耕大客户，保持续签与扩单节奏",
-                    "将京津大客户打法和新人培养 SOP 复制到南区与苏杭",
-                ],
-            },
-            "children": [
-                {
-                    "id": "north-a",
-                    "name": "京津事业部",
-                    "leader": "赵晨",
-                    "headcount": 60,
-                    "status": "good",
-                    "baseline": 12.3,
-                    "value": 12.9,
-                    "metrics": [
-                        {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": 12.9, "unit": "万元"},
-                        {"id": "per_capita_sales", "name": "人均销售额", "value": 600, "unit": "万元"},
-                        {"id": "per_capita_cost", "name": "人均人力成本", "value": 42, "unit": "万元"},
-                    ],
-                    "detail": {
-                        "rule": "事业部人效 = 销售收入 / 人力成本（京津）",
-                        "baseline": 12.3,
-                        "attainment": 1.05,
-                        "history": [
-                            {"label": "7月", "value": 12.1},
-                            {"label": "8月", "value": 12.5},
-                            {"label": "9月", "value": 12.9},
-                        ],
-                        "statusSummary": "高于基准 17%，表现最优，趋势稳步上升。",
-                        "rootCause": "老销售续签贡献大，新人 ramp 快，团队稳定。",
-                        "actions": [
-                            "输出新人培养与跟单 SOP 给低绩效事业部",
-                            "对 TOP 团队给予留才奖励，保持团队稳定",
-                        ],
-                    },
-                }
-            ],
-        },
-        {
-            "id": "south",
-            "name": "华南大区",
-            "leader": "张蕾",
-            "headcount": 50,
-            "status": "bad",
-            "baseline": 11.2,
-            "value": 0,
-            "metrics": [],
-            "detail": {
-                "rule": "大区人效 = 销售收入 / 人力成本（华南）",
-                "baseline": 11.2,
-                "attainment": 0.79,
-                "history": [
-                    {"label": "7月", "value": 9.8},
-                    {"label": "8月", "value": 9.2},
-                    {"label": "9月", "value": 8.9},
-                ],
-                "statusSummary": "低于基准 21%，呈下降趋势，对整体拖累最大。",
-                "rootCause": "大客户流失，新签不足，缺勤率高；新人转正慢导致产出不足。",
-                "actions": [
-                    "抢救流失大客户，制定挽回方案并设定 2 周节点检查",
-                    "降低缺勤率，强化考勤与绩效联动，必要时调整人员",
-                    "暂停非核心岗位补员，控制成本，集中资源在高潜机会",
-                ],
-            },
-            "children": [
-                {
-                    "id": "south-a",
-                    "name": "深圳事业部",
-                    "leader": "陈鹏",
-                    "headcount": 50,
-                    "status": "warn",
-                    "baseline": 11.0,
-                    "value": 10.0,
-                    "metrics": [
-                        {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": 10.0, "unit": "万元"},
-                        {"id": "per_capita_sales", "name": "人均销售额", "value": 500, "unit": "万元"},
-                        {"id": "per_capita_cost", "name": "人均人力成本", "value": 48, "unit": "万元"},
-                    ],
-                    "detail": {
-                        "rule": "事业部人效 = 销售收入 / 人力成本（深圳）",
-                        "baseline": 11.0,
-                        "attainment": 0.91,
-                        "history": [
-                            {"label": "7月", "value": 10.4},
-                            {"label": "8月", "value": 10.1},
-                            {"label": "9月", "value": 10.0},
-                        ],
-                        "statusSummary": "当前 10，基准 11，状态略低于基准，趋势平缓。",
-                        "rootCause": "新人 ramp 慢，签约周期长，部分机会停滞。",
-                        "actions": [
-                            "缩短签约周期：为 TOP 机会设定逐周里程碑，区总督办",
-                            "新人配对导师制，周复盘，明确 30/60/90 天转正指标",
-                            "阶段性激励叠加，鼓励快速拿单，改善人效",
-                        ],
-                    },
-                }
-            ],
-        },
-    ],
-}
 
-def aggregate_org(node: dict) -> dict:
+def dataset_from_files(departments_path: str, monthly_path: str) -> Dataset:
     """
-    汇总子节点的人数与人效指标（加权平均），并回填到当前节点。
+    从导出文件流式构建一份新快照（导入数据不带人工配置的关联指标，系数由驱动指标序列计算）；
+    大规模组织按大区分片并行重算（recompute.build_dataset，HR_RECOMPUTE_WORKERS 控制进程数）。
     """
-    children = node.get("children", []) or []
-    if not children:
-        # 叶子节点已有 headcount 和 metrics
-        if node.get("metrics"):
-            # 确保 value 与指标一致
-            for m in node["metrics"]:
-                if m["id"] == "revenue_per_cost":
-                    node["value"] = m["value"]
-        return {
-            "headcount": node.get("headcount", 0),
-            "metrics": {m["id"]: (m["value"], m.get("unit", "")) for m in node.get("metrics", [])},
-        }
+    result = ingest(departments_path, monthly_path, history_path=os.getenv("HR_HISTORY_FILE"))
+    logger.info("ingested %s", result.stats)
+    return build_dataset(result.summary_metrics, result.org_tree, {}, driver_series=result.driver_series, history=result.history)
+
+
+def load_initial_dataset() -> Dataset:
+    snapshot_path = os.getenv("HR_SNAPSHOT_FILE")
+    if snapshot_path:
+        # 预构建的 mmap 快照：无需重跑汇总/建索引，冷启动为毫秒级
+        return Dataset.load(snapshot_path)
+    departments_path = os.getenv("HR_DEPARTMENTS_FILE")
+    monthly_path = os.getenv("HR_MONTHLY_FILE")
+    if departments_path and monthly_path:
+        return dataset_from_files(departments_path, monthly_path)
+    return seed_dataset()
 
-    total_headcount = 0
-    metric_sums: dict[str, float] = {}
-    metric_units: dict[str, str] = {}
-    for child in children:
-        agg = aggregate_org(child)
-        total_headcount += agg["headcount"]
-        for mid, (val, unit) in agg["metrics"].items():
-            metric_units[mid] = unit
-            metric_sums[mid] = metric_sums.get(mid, 0.0) + val * agg["headcount"]
-
-    if total_headcount == 0:
-        total_headcount = node.get("headcount", 0)
-
-    metrics_list = []
-    for mid, total in metric_sums.items():
-        metrics_list.append(
-            {"id": mid, "name": next((m["name"] for m in children[0].get("metrics", []) if m["id"] == mid), mid),
-             "value": round(total / total_headcount, 2) if total_headcount else 0, "unit": metric_units.get(mid, "")}
-        )
 
-    node["headcount"] = total_headcount
-    node["metrics"] = metrics_list
-    for m in metrics_list:
-        if m["id"] == "revenue_per_cost":
-            node["value"] = m["value"]
+def remove_period_dir(path: str, owner: int) -> None:
+    if os.getpid() == owner:  # fork 出的 worker 退出时不删除
+        shutil.rmtree(path, ignore_errors=True)
 
-    return {
-        "headcount": total_headcount,
-        "metrics": {m["id"]: (m["value"], m.get("unit", "")) for m in metrics_list},
+
+# 当前数据快照；整体替换（单次赋值）保证读请求看到的总是一份完整一致的数据
+dataset: Dataset = load_initial_dataset()
+response_cache = ResponseCache()
+# 按月份冻结的只读快照（?period=）；HR_PERIOD 为启动时数据所属的月份，设置时一并存档
+period_store = PeriodStore()
+# 存档的各期同时写成快照文件（<period>.snap）：多 worker 时由某个 worker 存档的期，其他 worker 在下一个
+# 涉及 period 的请求中从文件补载。未设置 HR_PERIOD_DIR 时放在临时目录（preload 的 master 创建，退出时删除），
+# 设置时在重启后仍保留，启动时载入
+PERIOD_DIR = os.getenv("HR_PERIOD_DIR") or os.path.join(tempfile.gettempdir(), f"hr-periods-{os.getpid()}")
+if not os.getenv("HR_PERIOD_DIR"):
+    atexit.register(remove_period_dir, PERIOD_DIR, os.getpid())
+_period_files: Dict[str, Tuple[int, int]] = {}  # 本进程已载入的各期文件 (inode, mtime)
+_period_lock = threading.Lock()
+
+_reload_lock = threading.Lock()
+_reload_status: dict = {"state": "idle"}
+profiler = RequestProfiler(os.getenv("PROFILE_DIR"))
+
+
+def current_dataset() -> Dataset:
+    return dataset
+
+
+def install_dataset(new_dataset: Dataset) -> None:
+    global dataset
+    dataset = new_dataset
+    change_log.commit("reset", lambda: ({"reason": "reload"}, None))
+
+
+def update_department(
+    ds: Dataset, dept_id: str, headcount: Optional[int], metrics: dict, name: Optional[str] = None, leader: Optional[str] = None
+) -> Tuple[dict, dict]:
+    """修改一个部门并返回 (推送的 delta, 供其他 worker 重放的修改)；在变更日志的锁内执行。"""
+    changed = ds.update_department(dept_id, headcount=headcount, metrics=metrics, name=name, leader=leader)
+    deltas = [ds.node_delta(changed_id) for changed_id in changed]
+    # 改名 / 换负责人只出现在被修改部门的 delta 中
+    deltas[0].update((key, value) for key, value in (("name", name), ("leader", leader)) if value is not None)
+    return {"changed": deltas}, {
+        "deptId": dept_id, "headcount": headcount, "metrics": metrics, "name": name, "leader": leader,
     }
 
 
-def build_parent_map(node: dict, parent: str | None = None, mp: dict | None = None) -> dict:
-    if mp is None:
-        mp = {}
-    mp[node["id"]] = parent
-    for child in node.get("children", []) or []:
-        build_parent_map(child, node["id"], mp)
-    return mp
-
-# 汇总人数和指标
-aggregate_org(org_tree)
-
-# 确保总部（root）的人效值与总览卡片一致
-root_top_metric = next((m for m in summary_metrics if m.id == "revenue_per_cost"), None)
-if root_top_metric:
-    org_tree["value"] = root_top_metric.value
-    if "metrics" in org_tree:
-        updated = False
-        for m in org_tree["metrics"]:
-            if m.get("id") == "revenue_per_cost":
-                m["value"] = root_top_metric.value
-                m["unit"] = root_top_metric.unit
-                updated = True
-        if not updated:
-            org_tree["metrics"].append(
-                {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": root_top_metric.value, "unit": root_top_metric.unit}
-            )
+def replay_update(change: dict) -> None:
+    current_dataset().update_department(
+        change["deptId"],
+        headcount=change["headcount"],
+        metrics=change["metrics"],
+        name=change.get("name"),
+        leader=change.get("leader"),
+    )
 
-parent_map = build_parent_map(org_tree)
-
-CorrelationData = Dict[str, List[dict]]
-
-correlation_data: CorrelationData = {
-    "hq": [
-        {
-            "id": "attrition",
-            "name": "离职率",
-            "coefficient": -0.86,
-            "direction": "negative",
-            "description": "离职率上升显著拖累人效",
-            "value": 0.11,
-            "detail": {
-                "rule": "离职人数 ÷ 平均在职人数",
-                "breakdown": [
-                    {"label": "离职人数", "value": 16},
-                    {"label": "在职人数", "value": 150},
-                    {"label": "缺编率", "value": 0.1},
-                ],
-            },
-        },
-        {
-            "id": "avg_project_value",
-            "name": "平均项目价值",
-            "coefficient": 0.88,
-            "direction": "positive",
-            "description": "高客单价项目提升人均产出",
-            "value": 210,
-            "detail": {
-                "rule": "项目总金额 ÷ 项目数量",
-                "breakdown": [
-                    {"label": "项目数量", "value": 40},
-                    {"label": "总金额(万)", "value": 8400},
-                    {"label": "平均价值(万)", "value": 210},
-                ],
-            },
-        },
-        {
-            "id": "new_sale_cycle",
-            "name": "新销售产单周期",
-            "coefficient": -0.83,
-            "direction": "negative",
-            "description": "新人首单越慢，整体人效越低",
-            "value": 75,
-            "detail": {
-                "rule": "新人首单平均天数",
-                "breakdown": [
-                    {"label": "新人数量", "value": 25},
-                    {"label": "首单平均天数", "value": 75},
-                ],
-            },
-        },
-        {
-            "id": "project_conversion_rate",
-            "name": "项目转化率",
-            "coefficient": 0.9,
-            "direction": "positive",
-            "description": "转化率提升直接带动产出",
-            "value": 0.34,
-            "detail": {
-                "rule": "成交项目数 ÷ 立项项目数",
-                "breakdown": [
-                    {"label": "立项数", "value": 50},
-                    {"label": "成交数", "value": 17},
-                    {"label": "转化率", "value": 0.34},
-                ],
-            },
-        },
-        {
-            "id": "project_conversion_cycle",
-            "name": "项目转化周期",
-            "coefficient": -0.85,
-            "direction": "negative",
-            "description": "转化周期拉长会压低人效",
-            "value": 120,
-            "detail": {
-                "rule": "成交平均周期（天）",
-                "breakdown": [
-                    {"label": "平均周期", "value": 120},
-                    {"label": "P90 周期", "value": 180},
-                ],
-            },
-        },
-    ],
-    "east": [
-        # 华东：根因聚焦流失、客单价、转化节奏
-        {
-            "id": "attrition",
-            "name": "离职率",
-            "coefficient": -0.84,
-            "direction": "negative",
-            "description": "流失直接稀释人效",
-            "value": 0.12,
-            "detail": {
-                "rule": "离职人数 ÷ 平均在职人数（华东）",
-                "breakdown": [
-                    {"label": "离职人数", "value": 6},
-                    {"label": "在职人数", "value": 50},
-                    {"label": "流失率", "value": 0.12},
-                ],
-            },
-        },
-        {
-            "id": "new_sale_cycle",
-            "name": "新销售产单周期",
-            "coefficient": -0.82,
-            "direction": "negative",
-            "description": "新人首单周期过长影响整体效率",
-            "value": 85,
-            "detail": {
-                "rule": "新人首单平均天数（华东）",
-                "breakdown": [
-                    {"label": "新人数量", "value": 8},
-                    {"label": "首单平均天数", "value": 85},
-                ],
-            },
-        },
-        {
-            "id": "avg_project_value",
-            "name": "平均项目价值",
-            "coefficient": 0.87,
-            "direction": "positive",
-            "description": "提升客单价可拉动人均产出",
-            "value": 180,
-            "detail": {
-                "rule": "项目总金额 ÷ 项目数量（华东）",
-                "breakdown": [
-                    {"label": "项目数量", "value": 18},
-                    {"label": "总金额(万)", "value": 3240},
-                    {"label": "平均价值(万)", "value": 180},
-                ],
-            },
-        },
-        {
-            "id": "project_conversion_cycle",
-            "name": "项目转化周期",
-            "coefficient": -0.84,
-            "direction": "negative",
-            "description": "周期拉长会压低人效",
-            "value": 140,
-            "detail": {
-                "rule": "成交平均周期（天）（华东）",
-                "breakdown": [
-                    {"label": "平均周期", "value": 140},
-                    {"label": "P90 周期", "value": 190},
-                ],
-            },
-        },
-        {
-            "id": "project_conversion_rate",
-            "name": "项目转化率",
-            "coefficient": 0.88,
-            "direction": "positive",
-            "description": "转化率提升带动人效改善",
-            "value": 0.30,
-            "detail": {
-                "rule": "成交项目数 ÷ 立项项目数（华东）",
-                "breakdown": [
-                    {"label": "立项数", "value": 30},
-                    {"label": "成交数", "value": 9},
-                    {"label": "转化率", "value": 0.30},
-                ],
-            },
-        },
-    ],
-    "south": [
-        # 华南：突出流失、流动、新销售周期与转化周期（源自根因分析）
-        {
-            "id": "attrition",
-            "name": "离职率",
-            "coefficient": -0.87,
-            "direction": "negative",
-            "description": "流失率高使人效下行",
-            "value": 0.16,
-            "detail": {
-                "rule": "离职人数 ÷ 平均在职人数（华南）",
-                "breakdown": [
-                    {"label": "离职人数", "value": 9},
-                    {"label": "在职人数", "value": 56},
-                    {"label": "流失率", "value": 0.16},
-                ],
-            },
-        },
-        {
-            "id": "mobility",
-            "name": "人员流动性",
-            "coefficient": -0.83,
-            "direction": "negative",
-            "description": "内部频繁流动影响交付与客户关系",
-            "value": 0.16,
-            "detail": {
-                "rule": "内部调岗人数 ÷ 在职人数（华南）",
-                "breakdown": [
-                    {"label": "调岗人数", "value": 9},
-                    {"label": "在职人数", "value": 58},
-                    {"label": "流动率", "value": 0.16},
-                ],
-            },
-        },
-        {
-            "id": "project_conversion_cycle",
-            "name": "项目转化周期",
-            "coefficient": -0.9,
-            "direction": "negative",
-            "description": "周期拉长严重拖累人效",
-            "value": 160,
-            "detail": {
-                "rule": "成交平均周期（天）（华南）",
-                "breakdown": [
-                    {"label": "平均周期", "value": 160},
-                    {"label": "P90 周期", "value": 220},
-                ],
-            },
-        },
-        {
-            "id": "project_conversion_rate",
-            "name": "项目转化率",
-            "coefficient": 0.92,
-            "direction": "positive",
-            "description": "转化率提升可直接改善人效",
-            "value": 0.26,
-            "detail": {
-                "rule": "成交项目数 ÷ 立项项目数（华南）",
-                "breakdown": [
-                    {"label": "立项数", "value": 50},
-                    {"label": "成交数", "value": 13},
-                    {"label": "转化率", "value": 0.26},
-                ],
-            },
-        },
-        {
-            "id": "new_sale_cycle",
-            "name": "新销售产单周期",
-            "coefficient": -0.85,
-            "direction": "negative",
-            "description": "新人首单周期长拖累人效",
-            "value": 95,
-            "detail": {
-                "rule": "新人首单平均天数（华南）",
-                "breakdown": [
-                    {"label": "新人数量", "value": 12},
-                    {"label": "首单平均天数", "value": 95},
-                ],
-            },
-        },
-    ],
-}
+
+# 变更推送（/api/stream）与部门修改的跨 worker 日志：preload 时在 master 中创建，各 worker 共用；
+# 每个 worker 重放其他 worker 的修改，修改后的数据与推送的 delta 在所有 worker 上一致
+change_log = ChangeLog.create(os.getenv("HR_CHANGE_LOG"), apply=replay_update)
+
+
+def _freeze_period(period: str, ds: Dataset) -> PeriodSnapshot:
+    return period_store.add(
+        period, ds.summary_metrics, ds.org_store.materialize(), ds.correlation_data, ds.correlation_table()
+    )
+
+
+def _period_stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns
+
+
+def archive_period(period: str, ds: Dataset) -> PeriodSnapshot:
+    """
+    把一份快照冻结为某月的只读版本（与已有各期共享未变化的节点），并写入 PERIOD_DIR 供其他 worker 载入。
+    超出 MAX_PERIODS 的最早各期文件一并删除。
+    """
+    if not PERIOD_PATTERN.match(period):
+        raise ValueError("period must look like 2026-09")
+    os.makedirs(PERIOD_DIR, exist_ok=True)
+    path = os.path.join(PERIOD_DIR, f"{period}.snap")
+    partial = f"{path}.{os.getpid()}.tmp"
+    ds.write_snapshot(partial)
+    os.replace(partial, path)  # 整体替换，其他 worker 不会读到写了一半的文件
+    with _period_lock:
+        snapshot = _freeze_period(period, ds)
+        _period_files[period] = _period_stamp(path)
+    for stale in sorted(period_files())[: -period_store.max_periods]:
+        try:
+            os.remove(os.path.join(PERIOD_DIR, f"{stale}.snap"))
+        except OSError:
+            pass
+    return snapshot
+
+
+def period_files() -> Dict[str, Tuple[int, int]]:
+    """PERIOD_DIR 中的各期文件及其 (inode, mtime)。"""
+    files: Dict[str, Tuple[int, int]] = {}
+    try:
+        entries = list(os.scandir(PERIOD_DIR))
+    except FileNotFoundError:
+        return files
+    for entry in entries:
+        period, ext = os.path.splitext(entry.name)
+        if ext == ".snap" and PERIOD_PATTERN.match(period):
+            try:
+                st = entry.stat()
+            except OSError:  # 刚被替换或删除
+                continue
+            files[period] = (st.st_ino, st.st_mtime_ns)
+    return files
+
+
+def sync_periods() -> None:
+    """载入其他 worker 新存档（或重新存档）的期；目录未变化时只是一次 scandir。"""
+    files = period_files()
+    recent = sorted(files)[-period_store.max_periods :]
+    if all(_period_files.get(period) == files[period] for period in recent):
+        return
+    with _period_lock:
+        for period in recent:
+            if _period_files.get(period) == files[period]:
+                continue
+            try:
+                _freeze_period(period, Dataset.load(os.path.join(PERIOD_DIR, f"{period}.snap")))
+            except (OSError, ValueError):
+                logger.exception("failed to load archived period %s", period)
+                continue
+            _period_files[period] = files[period]
+
+
+sync_periods()
+if os.getenv("HR_PERIOD"):
+    archive_period(os.environ["HR_PERIOD"], dataset)
+
+
+def reload_from_files(departments_path: str | None, monthly_path: str | None, snapshot_path: str | None = None) -> None:
+    started = time.time()
+    try:
+        if snapshot_path:
+            new_dataset = Dataset.load(snapshot_path)
+        else:
+            new_dataset = dataset_from_files(departments_path, monthly_path)
+        install_dataset(new_dataset)
+        _reload_status.update(
+            {"state": "done", "version": new_dataset.version, "seconds": round(time.time() - started, 3), "finishedAt": time.time()}
+        )
+    except Exception as exc:  # 后台线程：记录失败并保留旧快照
+        logger.exception("reload failed")
+        _reload_status.update({"state": "failed", "error": str(exc), "finishedAt": time.time()})
+    finally:
+        _reload_lock.release()
 
 
-def flatten_departments(node: dict) -> List[dict]:
-    nodes = [node]
-    for child in node.get("children", []) or []:
-        nodes.extend(flatten_departments(child))
-    return nodes
+def is_admin() -> bool:
+    supplied = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(supplied, ADMIN_TOKEN)
 
 
-def find_correlations(dept_id: str) -> List[dict]:
-    if dept_id in correlation_data:
-        return correlation_data[dept_id]
-    current = parent_map.get(dept_id)
-    while current:
-        if current in correlation_data:
-            return correlation_data[current]
-        current = parent_map.get(current)
-    return correlation_data.get("hq", [])
+def admin_denied() -> Response | None:
+    if not is_admin():
+        return jsonify({"error": "admin token required"}), 403
+    return None
+
+
+@app.before_request
+def follow_changes():
+    # fork 出的 worker 在第一个请求时开始追踪变更日志；之后每个请求先补读其他 worker 刚完成的修改
+    change_log.start()
+    change_log.sync()
+
+
+@app.before_request
+def start_instrumentation():
+    g.started = time.perf_counter()
+    set_endpoint(request.endpoint)
+    wants_profile = request.args.get("profile") == "1" and is_admin()
+    if wants_profile or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+        g.profile = profiler.start()
+
+
+@app.after_request
+def record_instrumentation(response: Response) -> Response:
+    """
+    记录耗时 / 响应大小并结束 cProfile。流式响应（NDJSON 导出）在 after_request 时还没有生成响应体，
+    改为包装响应体迭代器，在 call_on_close（响应发送完毕或客户端断开）时再记录。
+    SSE 连接可能持续数小时，cProfile 在视图函数返回时就结束，不随连接一直占用分析器。
+    """
+    endpoint = request.endpoint or "unmatched"
+    method = request.method
+    started = g.get("started", time.perf_counter())
+    requests_total.inc(endpoint, method, str(response.status_code))
+    profile = g.pop("profile", None)
+    label = f"{method} {request.full_path}"
+
+    def finish_profile() -> None:
+        nonlocal profile
+        if profile is None:
+            return
+        path, summary = profiler.finish(profile, endpoint)
+        profile = None
+        logger.info("profile of %s written to %s", label, path)
+        logger.debug("profile of %s\n%s", label, summary)
+        if not sending and is_admin():
+            response.headers["X-Profile-File"] = path
+
+    def finish(size: int) -> None:
+        request_latency.observe(time.perf_counter() - started, endpoint, method)
+        response_size.observe(size, endpoint)
+        finish_profile()
+
+    sending = False  # 响应头已发出后不再附加 X-Profile-File
+    if not response.is_streamed:
+        finish(response.content_length or 0)
+        return response
+    if response.mimetype == "text/event-stream":
+        finish_profile()
+    sending = True
+    sent = [0]
+
+    def counted(body):
+        for chunk in body:
+            sent[0] += len(chunk) if isinstance(chunk, bytes) else len(chunk.encode("utf-8"))
+            yield chunk
+
+    response.response = counted(response.response)
+    response.call_on_close(lambda: finish(sent[0]))
+    return response
+
+
+@app.teardown_request
+def end_instrumentation(_exc=None) -> None:
+    profile = g.pop("profile", None)
+    if profile is not None:  # after_request 未执行（未处理的异常），仍需释放分析器
+        profiler.finish(profile, request.endpoint or "unmatched")
+    set_endpoint(None)
+
+
+def encode_json(payload) -> bytes:
+    with stage("serialize"):
+        return (app.json.dumps(payload) + "\n").encode("utf-8")
+
+
+def encode_wire(payload, wire_format: str) -> bytes:
+    if wire_format == "msgpack":
+        with stage("serialize"):
+            return encode_msgpack(payload)
+    return encode_json(payload)
+
+
+def send_cached(entry: CachedResponse) -> Response:
+    """命中 If-None-Match 返回 304，否则按 Accept-Encoding 发送预压缩字节。"""
+    if request.if_none_match.contains(entry.etag):
+        response = Response(status=304)
+    else:
+        body, encoding = entry.encoded(request.headers.get("Accept-Encoding", ""))
+        response = Response(body, mimetype=entry.mimetype)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(entry.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    response.vary.add("Accept")
+    response.vary.add(LEADER_HEADER)
+    return response
+
+
+def cached_json(ds: Dataset, build_payload: Callable[[], object], variant: Hashable = None) -> Response:
+    """
+    以（端点, 路径参数, 查询参数, 负责人视图, 响应编码）为键、快照版本为界缓存响应字节；
+    按 Accept 协商 JSON 或 MessagePack（见 wire.negotiate）。
+    variant 区分不随当前快照版本变化的数据来源（如已存档各期的版本号）。
+    """
+    version = ds.version
+    wire_format = negotiate(request.headers.get("Accept", ""), request.args.get("format"))
+    key = (
+        request.endpoint,
+        tuple(sorted((request.view_args or {}).items())),
+        tuple(sorted(request.args.items(multi=True))),
+        variant,
+        g.get("leader"),
+        wire_format,
+    )
+    mimetype = MSGPACK_MIMETYPE if wire_format == "msgpack" else JSON_MIMETYPE
+    entry, outcome = response_cache.lookup(key, version, lambda: encode_wire(build_payload(), wire_format), mimetype)
+    cache_lookups.inc(request.endpoint, outcome)
+    return send_cached(entry)
+
+
+def period_source(ds: Dataset) -> Tuple[Optional[Union[Dataset, PeriodSnapshot]], Optional[tuple]]:
+    """?period= 指定时返回该月的只读快照，否则为当前快照；返回 (数据来源, 错误响应)。"""
+    period = request.args.get("period")
+    if period is None:
+        return ds, None
+    sync_periods()
+    snapshot = period_store.get(period)
+    if snapshot is None:
+        return None, (jsonify({"error": f"unknown period: {period}"}), 404)
+    return snapshot, None
+
+
+def json_object() -> Tuple[Optional[dict], Optional[tuple]]:
+    """请求体中的 JSON 对象：没有（或无法解析的）请求体视为 {}，数组、标量等返回 400。返回 (请求体, 错误响应)。"""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return {}, None
+    if not isinstance(payload, dict):
+        return None, (jsonify({"error": "request body must be a JSON object"}), 400)
+    return payload, None
+
+
+def leader_signature(leader: str, expires: int, secret: str = "") -> str:
+    """网关为负责人身份签名：HMAC-SHA256(secret, "<姓名>\n<过期时间戳>") 的十六进制摘要。"""
+    message = f"{leader}\n{expires}".encode("utf-8")
+    return hmac.new((secret or LEADER_SECRET).encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def authenticated_leader() -> Tuple[Optional[str], bool]:
+    """
+    请求携带的负责人身份，返回 (姓名, 是否有效)：未带 X-Leader 时为 (None, True)；
+    签名缺失、不符或已过期（或服务端未配置 HR_LEADER_SECRET）时为 (None, False)。
+    """
+    leader = request.headers.get(LEADER_HEADER)
+    if leader is None:
+        return None, True
+    leader = unquote(leader)
+    expires, _, digest = request.headers.get(LEADER_SIGNATURE_HEADER, "").partition(".")
+    if not LEADER_SECRET or not leader or not expires.isdigit() or int(expires) < time.time():
+        return None, False
+    if not hmac.compare_digest(digest, leader_signature(leader, int(expires))):
+        return None, False
+    return leader, True
+
+
+def leader_view(ds: Dataset) -> Tuple[Optional[Scope], Optional[tuple]]:
+    """
+    当前请求的负责人视图：经签名校验的 X-Leader 身份，或管理员指定的 ?leader=；
+    管理员（以及 HR_SCOPE_REQUIRED=0 时）未指定时为全公司视图（None）。返回 (可见范围, 错误响应)。
+    """
+    leader, valid = authenticated_leader()
+    if not valid:
+        return None, (jsonify({"error": "invalid or expired leader identity"}), 401)
+    if leader is None and "leader" in request.args:
+        if not is_admin():
+            return None, (jsonify({"error": "leader parameter requires admin token"}), 403)
+        leader = request.args["leader"]
+    if not leader:
+        if SCOPE_REQUIRED and not is_admin():
+            return None, (jsonify({"error": "leader identity required"}), 401)
+        return None, None
+    view = ds.scopes.get(leader)
+    if view is None:
+        return None, (jsonify({"error": f"no departments led by {leader}"}), 403)
+    if "period" in request.args:
+        return None, (jsonify({"error": "period is not available in leader views"}), 400)
+    g.leader = leader
+    return view, None
+
+
+def view_denied(view: Optional[Scope], row: int, dept_id: str) -> tuple | None:
+    if view is not None and not view.contains(row):
+        return jsonify({"error": f"department outside your scope: {dept_id}"}), 403
+    return None
+
+
+def default_dept(ds: Dataset, view: Optional[Scope]) -> str:
+    """未指定部门时的默认部门：全公司视图为根，负责人视图为其范围内的第一个（最高层）部门。"""
+    return ds.root_id if view is None else ds.org_store.ids[view.roots[0]]
+
+
+def scoped_history(ds: Dataset, rows: np.ndarray, metric: str, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """若干部门某指标的月度序列按人数加权合并，返回 (月份, 数值)；月份为 datetime64[M] 的整数。"""
+    history = ds.history
+    if history is None:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    level = history.level("month")
+    days, values, shares = [], [], []
+    for row, weight in zip(rows.tolist(), weights.tolist()):
+        i = history.key_index.get((ds.org_store.ids[row], metric))
+        if i is None:
+            continue
+        lo, hi = int(level.offsets[i]), int(level.offsets[i + 1])
+        days.append(level.days[lo:hi])
+        values.append(level.values[lo:hi] * weight)
+        shares.append(np.full(hi - lo, weight))
+    if not days:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    months = np.concatenate(days).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    months, inverse = np.unique(months, return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate(values))
+    return months, totals / np.bincount(inverse, weights=np.concatenate(shares))
+
+
+def scoped_summary(ds: Dataset, view: Scope) -> List[dict]:
+    """
+    负责人视图的总览指标卡：由其范围内最高层的各部门得出，多个部门按人数加权。
+    历史取这些部门的月度序列，同比为最近两个 12 个月窗口的均值之比（历史不足两个窗口时为 0）；
+    人效卡以部门基准为基准，其余指标卡以全公司的值为基准。
+    """
+    store = ds.org_store
+    roots = np.asarray(view.roots, dtype=np.int64)
+    weights = np.maximum(store.headcount[roots], 1).astype(np.float64)
+    cards: List[dict] = []
+    for card in ds.summary_metrics:
+        col = store.metric_col.get(card.id)
+        if col is not None:
+            values = store.metrics[roots, col]
+        elif card.id == PRIMARY_METRIC:
+            values = store.value[roots]
+        else:
+            values = np.full(roots.size, np.nan)
+        known = np.isfinite(values)
+        value = round(float(np.average(values[known], weights=weights[known])), 2) if known.any() else 0.0
+        if card.id == PRIMARY_METRIC:
+            baseline = round(float(np.average(store.baseline[roots], weights=weights)), 2)
+        else:
+            baseline = card.value
+        months, series = scoped_history(ds, roots, card.id, weights)
+        history = [
+            {"label": f"{month % 12 + 1}月", "value": round(float(v), 2)}
+            for month, v in zip(months[-SUMMARY_HISTORY_POINTS:].tolist(), series[-SUMMARY_HISTORY_POINTS:].tolist())
+        ]
+        yoy = 0.0
+        if series.size >= 2 * TRAILING_MONTHS:
+            previous = float(series[-2 * TRAILING_MONTHS : -TRAILING_MONTHS].mean())
+            if previous:
+                yoy = round(float(series[-TRAILING_MONTHS:].mean()) / previous - 1, 3)
+        tail = [h["value"] for h in history[-3:]]
+        trend = "flat"
+        if len(tail) >= 2 and tail[-1] > tail[0]:
+            trend = "up"
+        elif len(tail) >= 2 and tail[-1] < tail[0]:
+            trend = "down"
+        detail = MetricDetail(
+            rule=card.detail.rule,
+            baseline=baseline,
+            attainment=round(value / baseline, 2) if baseline else 0.0,
+            history=history,
+        )
+        cards.append(asdict(MetricSummary(card.id, card.name, value, card.unit, yoy, trend, detail)))
+    return cards
 
 
 @app.get("/api/summary")
 def get_summary():
-    return jsonify(
-        {
-            "metrics": [asdict(m) for m in summary_metrics],
-            "defaultDeptId": org_tree["id"],
-        }
+    """总览指标卡；负责人视图下由其范围内的部门得出（scoped_summary）。"""
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    source, error = period_source(ds)
+    if error:
+        return error
+    if view is not None:
+        return cached_json(
+            ds, lambda: {"metrics": scoped_summary(ds, view), "defaultDeptId": default_dept(ds, view)}, variant=view.leader
+        )
+    return cached_json(
+        ds,
+        lambda: {"metrics": [asdict(m) for m in source.summary_metrics], "defaultDeptId": source.root_id},
+        variant=source.version,
     )
 
 
+ORG_LAZY_DEFAULT_FIELDS = ("id", "name", "leader", "headcount", "status", "baseline", "value", "metrics")
+ORG_PROJECTABLE_FIELDS = set(ORG_LAZY_DEFAULT_FIELDS) | {"detail"}
+ORG_LAZY_DEFAULT_DEPTH = 2
+ORG_CHILDREN_MAX_LIMIT = 1000
+
+
+def project_subtree(root: dict, depth: int, fields: List[str], offset: int = 0, limit: int | None = None) -> dict:
+    """
+    按层数截断并投影字段的子树（历史期的 dict 树；当前快照见 OrgStore.subtree）：
+    超出 depth 的节点只保留 hasChildren/childCount 桩信息，
+    limit 限制每个节点返回的子节点数，offset 仅作用于根节点的直接子节点（用于分页）。
+    """
+
+    def stub(node: dict) -> dict:
+        out = {f: node[f] for f in fields if f in node}
+        children = node.get("children", []) or []
+        out["hasChildren"] = bool(children)
+        out["childCount"] = len(children)
+        return out
+
+    result = stub(root)
+    stack = [(root, result, 0)]
+    while stack:
+        node, out, level = stack.pop()
+        children = node.get("children", []) or []
+        if not children or level >= depth:
+            continue
+        start = offset if node is root else 0
+        end = start + limit if limit is not None else None
+        out["children"] = []
+        for child in children[start:end]:
+            child_out = stub(child)
+            out["children"].append(child_out)
+            stack.append((child, child_out, level + 1))
+    return result
+
+
 @app.get("/api/org")
 def get_org():
-    return jsonify({"tree": org_tree})
+    """负责人视图下整棵树只含其范围（见 scopes.scoped_tree），按层加载 / 列式默认从其第一个部门开始。"""
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    source, error = period_source(ds)
+    if error:
+        return error
+    args = request.args
+    if args.get("layout") == "columnar":
+        if source is not ds:
+            return jsonify({"error": "layout=columnar is not supported with period"}), 400
+        return org_columnar(ds, view)
+    if not any(key in args for key in ("root", "depth", "fields", "offset", "limit")):
+        if view is not None:
+            return cached_json(ds, lambda: {"tree": scoped_tree(ds.org_store, ds.hierarchy, view)})
+        return cached_json(ds, lambda: {"tree": source.org_tree}, variant=source.version)
+
+    root_id = args.get("root", source.root_id if view is None else default_dept(ds, view))
+    if source is ds:
+        # 当前快照直接从列式存储按层读取，不物化子树
+        root = ds.org_store.index.get(root_id)
+    else:
+        root = source.node(root_id)
+    if root is None:
+        return jsonify({"error": f"unknown department: {root_id}"}), 404
+    if view is not None:
+        denied = view_denied(view, ds.org_store.index[root_id], root_id)
+        if denied:
+            return denied
+    depth = max(args.get("depth", ORG_LAZY_DEFAULT_DEPTH, type=int), 0)
+    offset = max(args.get("offset", 0, type=int), 0)
+    limit = args.get("limit", type=int)
+    if limit is not None:
+        limit = min(max(limit, 0), ORG_CHILDREN_MAX_LIMIT)
+    if "fields" in args:
+        fields = [f for f in args["fields"].split(",") if f in ORG_PROJECTABLE_FIELDS]
+        if "id" not in fields:
+            fields.insert(0, "id")
+    else:
+        fields = list(ORG_LAZY_DEFAULT_FIELDS)
+    def build():
+        with stage("tree_walk"):
+            if source is ds:
+                return {"tree": ds.org_store.subtree(root, depth, fields, offset=offset, limit=limit)}
+            return {"tree": project_subtree(root, depth, fields, offset=offset, limit=limit)}
+
+    return cached_json(ds, build, variant=source.version)
+
+
+def org_columnar(ds: Dataset, view: Optional[Scope] = None) -> Response:
+    """
+    列式组织树：/api/org?layout=columnar&root=&depth=&fields=，先序排列的一段子树，
+    每个字段一个数组（默认不含 detail）；前端用 decodeColumnarTree 还原为嵌套结构。
+    """
+    args = request.args
+    root_id = args.get("root", default_dept(ds, view))
+    row = ds.org_store.index.get(root_id)
+    if row is None:
+        return jsonify({"error": f"unknown department: {root_id}"}), 404
+    denied = view_denied(view, row, root_id)
+    if denied:
+        return denied
+    depth = args.get("depth", type=int)
+    if "fields" in args:
+        fields = [f for f in args["fields"].split(",") if f in COLUMNAR_FIELDS]
+    else:
+        fields = list(COLUMNAR_DEFAULT_FIELDS)
+
+    def build():
+        with stage("tree_walk"):
+            span = ds.hierarchy.subtree(row)
+            rows = np.arange(span.start, span.stop)
+            if depth is not None:
+                rows = rows[ds.org_store.depth[rows] - ds.org_store.depth[row] <= max(depth, 0)]
+            return columnar_tree(ds.org_store, rows, fields)
+
+    return cached_json(ds, build)
+
+
+ORG_EXPORT_CHUNK_ROWS = 256
+
+
+@app.get("/api/org/export")
+def export_org():
+    """
+    整棵（或 scope 指定的）子树导出为 NDJSON：/api/org/export?format=ndjson&scope=<id>&fields=，
+    每行一个部门（先序，带 parentId / depth），边遍历边输出，内存占用与子树大小无关。
+    负责人视图下未指定 scope 时依次导出其范围内的各段子树。
+    """
+    args = request.args
+    if args.get("format", "ndjson") != "ndjson":
+        return jsonify({"error": "format must be ndjson"}), 400
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    if view is not None and "scope" not in args:
+        scope = ds.org_store.ids[view.roots[0]] if len(view.roots) == 1 else view.leader
+        spans = list(view.spans())
+    else:
+        scope = args.get("scope", ds.root_id)
+        row = ds.org_store.index.get(scope)
+        if row is None:
+            return jsonify({"error": f"unknown department: {scope}"}), 404
+        denied = view_denied(view, row, scope)
+        if denied:
+            return denied
+        span = ds.hierarchy.subtree(row)
+        spans = [range(span.start, span.stop)]
+    fields = None
+    if "fields" in args:
+        fields = [f for f in args["fields"].split(",") if f in ORG_PROJECTABLE_FIELDS]
+
+    def lines():
+        chunk: List[str] = []
+        for record in ds.org_store.records(itertools.chain.from_iterable(spans), fields):
+            chunk.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            if len(chunk) >= ORG_EXPORT_CHUNK_ROWS:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    response = Response(lines(), mimetype="application/x-ndjson")
+    response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(f'org-{scope}-v{ds.version}.ndjson')}"
+    response.headers["X-Data-Version"] = str(ds.version)
+    response.headers["X-Total-Count"] = str(sum(len(span) for span in spans))
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.get("/api/org/<dept_id>/detail")
+def get_org_detail(dept_id: str):
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    source, error = period_source(ds)
+    if error:
+        return error
+    if view is not None and dept_id in ds.org_store.index:
+        denied = view_denied(view, ds.org_store.index[dept_id], dept_id)
+        if denied:
+            return denied
+    try:
+        detail = source.detail(dept_id)
+    except KeyError:
+        return jsonify({"error": f"unknown department: {dept_id}"}), 404
+    return cached_json(ds, lambda: {"deptId": dept_id, "detail": detail}, variant=source.version)
+
+
+HIERARCHY_DEFAULT_LIMIT = 500
+HIERARCHY_MAX_LIMIT = 5000
+
+
+def hierarchy_entry(ds: Dataset, row: int, depth_base: int) -> dict:
+    store = ds.org_store
+    return {"id": store.ids[row], "name": store.name(row), "depth": int(store.depth[row]) - depth_base}
+
+
+@app.get("/api/org/<dept_id>/descendants")
+def get_descendants(dept_id: str):
+    """子树成员（先序）：由 Euler tour 区间直接切片，depth 可限制相对层数。"""
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    row = ds.org_store.index.get(dept_id)
+    if row is None:
+        return jsonify({"error": f"unknown department: {dept_id}"}), 404
+    denied = view_denied(view, row, dept_id)
+    if denied:
+        return denied
+    max_depth = request.args.get("depth", type=int)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", HIERARCHY_DEFAULT_LIMIT, type=int), 0), HIERARCHY_MAX_LIMIT)
+
+    def build():
+        with stage("index_lookup"):
+            span = ds.hierarchy.descendants(row)
+            rows = np.arange(span.start, span.stop)
+            base = int(ds.org_store.depth[row])
+            if max_depth is not None:
+                rows = rows[ds.org_store.depth[rows] - base <= max_depth]
+        page = rows[offset : offset + limit].tolist()
+        return {
+            "deptId": dept_id,
+            "total": int(rows.size),
+            "descendants": [hierarchy_entry(ds, r, base) for r in page],
+        }
+
+    return cached_json(ds, build)
+
+
+@app.get("/api/org/<dept_id>/ancestors")
+def get_ancestors(dept_id: str):
+    """祖先链（自根向下，不含自身）；负责人视图下只含其范围内的祖先。"""
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    row = ds.org_store.index.get(dept_id)
+    if row is None:
+        return jsonify({"error": f"unknown department: {dept_id}"}), 404
+    denied = view_denied(view, row, dept_id)
+    if denied:
+        return denied
+
+    def build():
+        chain = list(ds.hierarchy.ancestors(row))[::-1]
+        if view is not None:
+            chain = [r for r in chain if view.contains(r)]
+        return {"deptId": dept_id, "ancestors": [hierarchy_entry(ds, r, 0) for r in chain]}
+
+    return cached_json(ds, build)
+
+
+@app.get("/api/org/lca")
+def get_common_ancestor():
+    """多个部门的最近公共祖先：/api/org/lca?ids=a,b,c"""
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    ids = [i for i in request.args.get("ids", "").split(",") if i]
+    if not ids:
+        return jsonify({"error": "ids is required"}), 400
+    unknown = [i for i in ids if i not in ds.org_store.index]
+    if unknown:
+        return jsonify({"error": f"unknown department: {unknown[0]}"}), 404
+    for dept_id in ids:
+        denied = view_denied(view, ds.org_store.index[dept_id], dept_id)
+        if denied:
+            return denied
+    row = ds.hierarchy.lca_many([ds.org_store.index[i] for i in ids])
+    if view is not None and not view.contains(row):
+        return jsonify({"error": "no common ancestor within your scope"}), 404
+    return jsonify({"ids": ids, "ancestor": hierarchy_entry(ds, row, 0)})
+
+
+@app.patch("/api/org/<dept_id>")
+def patch_department(dept_id: str):
+    """
+    修改单个部门并增量更新（仅管理员；可同时以负责人视图限定范围）：
+    叶子部门的人数 / 指标重新汇总到祖先，任意部门的 name / leader 同步到检索索引。
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    payload, error = json_object()
+    if error:
+        return error
+    headcount = payload.get("headcount")
+    metrics = payload.get("metrics") or {}
+    if headcount is not None and (not isinstance(headcount, int) or isinstance(headcount, bool) or headcount < 0):
+        return jsonify({"error": "headcount must be a non-negative integer"}), 400
+    if not isinstance(metrics, dict) or not all(isinstance(v, (int, float)) for v in metrics.values()):
+        return jsonify({"error": "metrics must map metric id to number"}), 400
+    name, leader = payload.get("name"), payload.get("leader")
+    for field, text in (("name", name), ("leader", leader)):
+        if text is not None and (not isinstance(text, str) or not text.strip()):
+            return jsonify({"error": f"{field} must be a non-empty string"}), 400
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    if view is not None and dept_id in ds.org_store.index:
+        denied = view_denied(view, ds.org_store.index[dept_id], dept_id)
+        if denied:
+            return denied
+    try:
+        _, delta = change_log.commit("delta", lambda: update_department(current_dataset(), dept_id, headcount, metrics, name, leader))
+    except KeyError as exc:
+        return jsonify({"error": f"unknown department or metric: {exc.args[0]}"}), 404
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify({"deptId": dept_id, "updated": [node["id"] for node in delta["changed"]]})
+
+
+CORRELATION_BATCH_MAX = 1000
 
 
 @app.get("/api/correlations")
 def get_correlations():
-    dept_id = request.args.get("deptId", org_tree["id"])
-    return jsonify({"deptId": dept_id, "metrics": find_correlations(dept_id)})
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    source, error = period_source(ds)
+    if error:
+        return error
+    if "deptIds" in request.args:
+        if source is not ds:
+            return jsonify({"error": "period is not supported for batch lookups"}), 400
+        return correlations_batch(ds, [i for i in request.args["deptIds"].split(",") if i], view)
+    dept_id = request.args.get("deptId", source.root_id if view is None else default_dept(ds, view))
+    if view is not None:
+        row = ds.org_store.index.get(dept_id)
+        if row is None:
+            return jsonify({"error": f"unknown department: {dept_id}"}), 404
+        denied = view_denied(view, row, dept_id)
+        if denied:
+            return denied
+
+    def build():
+        with stage("index_lookup"):
+            return {"deptId": dept_id, "metrics": source.find_correlations(dept_id)}
+
+    return cached_json(ds, build, variant=source.version)
+
+
+@app.post("/api/correlations")
+def post_correlations():
+    payload, error = json_object()
+    if error:
+        return error
+    dept_ids = payload.get("deptIds")
+    if not isinstance(dept_ids, list) or not all(isinstance(i, str) for i in dept_ids):
+        return jsonify({"error": "deptIds must be a list of department ids"}), 400
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    return correlations_batch(ds, dept_ids, view)
+
+
+def correlations_batch(ds: Dataset, dept_ids: List[str], view: Optional[Scope] = None) -> Response:
+    """一次返回多个部门的关联指标；owners 给出各部门继承配置的来源部门（无则为 null）。"""
+    if len(dept_ids) > CORRELATION_BATCH_MAX:
+        return jsonify({"error": f"at most {CORRELATION_BATCH_MAX} deptIds per request"}), 400
+    if view is not None:
+        for dept_id in dept_ids:
+            row = ds.org_store.index.get(dept_id)
+            if row is None:
+                return jsonify({"error": f"unknown department: {dept_id}"}), 404
+            denied = view_denied(view, row, dept_id)
+            if denied:
+                return denied
+    with stage("index_lookup"):
+        metrics = ds.find_correlations_batch(dept_ids)
+        owners = {dept_id: ds.correlation_owner(dept_id) for dept_id in dept_ids}
+    return jsonify({"metrics": metrics, "owners": owners})
+
+
+@app.get("/api/periods")
+def list_periods():
+    sync_periods()
+    return jsonify(period_store.stats())
+
+
+@app.get("/api/periods/diff")
+def diff_periods():
+    """
+    两期之间的组织 / 数值变化：/api/periods/diff?from=2026-08&to=2026-09。
+    负责人视图只包含在任一期中属于其范围的部门（按各期自身的负责人字段判断）。
+    """
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    old, new = request.args.get("from"), request.args.get("to")
+    if not old or not new:
+        return jsonify({"error": "from and to periods are required"}), 400
+    sync_periods()
+    for period in (old, new):
+        if period not in period_store:
+            return jsonify({"error": f"unknown period: {period}"}), 404
+    before, after = period_store.get(old), period_store.get(new)
+
+    def build() -> dict:
+        diff = period_store.diff(old, new)
+        if view is not None:
+            diff["changes"] = [
+                change for change in diff["changes"]
+                if after.led_by(change["id"], view.leader) or before.led_by(change["id"], view.leader)
+            ]
+        return diff
+
+    leader = view.leader if view is not None else None
+    return cached_json(ds, build, variant=(before.version, after.version, leader))
 
 
 @app.get("/api/search")
 def search_departments():
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
     query = request.args.get("query", "").strip().lower()
     if not query:
         return jsonify({"matchedDepartments": []})
-    matched = [
-        item["id"]
-        for item in flatten_departments(org_tree)
-        if query in item["name"].lower() or query in item["leader"].lower()
-    ]
+    limit = min(max(request.args.get("limit", SEARCH_DEFAULT_LIMIT, type=int), 1), SEARCH_MAX_LIMIT)
+    index = ds.org_store.index
+
+    def visible(dept_id: str) -> bool:
+        return view.contains(index[dept_id])
+
+    with stage("index_lookup"):
+        matched = ds.search_index.search(query, limit=limit, visible=visible if view is not None else None)
     return jsonify({"matchedDepartments": matched})
 
 
+RANKINGS_DEFAULT_K = 20
+RANKINGS_MAX_K = 1000
+
+
+@app.get("/api/rankings")
+def get_rankings():
+    """
+    部门排名 / 异常扫描：/api/rankings?metric=&by=value|attainment|gap&order=asc|desc&k=&scope=&level=all|leaf|internal|<depth>
+    below / above 进一步按分数过滤（如 by=attainment&below=0.8 列出全部未达 80% 的单元）。
+    负责人视图下只在其可见范围内排名。
+    """
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    args = request.args
+    metric = args.get("metric", PRIMARY_METRIC)
+    by = args.get("by", "value")
+    order = args.get("order", "asc")
+    level = args.get("level", "all")
+    scope = args.get("scope", ds.root_id if view is None or len(view.roots) > 1 else default_dept(ds, view))
+    k = min(max(args.get("k", RANKINGS_DEFAULT_K, type=int), 0), RANKINGS_MAX_K)
+    below = args.get("below", type=float)
+    above = args.get("above", type=float)
+    if order not in ("asc", "desc"):
+        return jsonify({"error": "order must be asc or desc"}), 400
+    if level not in RANK_LEVELS and not level.isdigit():
+        return jsonify({"error": f"level must be one of {', '.join(RANK_LEVELS)} or a depth"}), 400
+    if by not in RANK_BY:
+        return jsonify({"error": f"by must be one of {', '.join(RANK_BY)}"}), 400
+    scope_row = ds.org_store.index.get(scope)
+    if scope_row is None:
+        return jsonify({"error": f"unknown department: {scope}"}), 404
+    if metric not in ds.org_store.metric_col:
+        return jsonify({"error": f"unknown metric: {metric}"}), 404
+    if by != "value" and metric != PRIMARY_METRIC:
+        return jsonify({"error": f"by={by} is only defined for {PRIMARY_METRIC}"}), 400
+    if "scope" in args:
+        denied = view_denied(view, scope_row, scope)
+        if denied:
+            return denied
+
+    def build():
+        with stage("index_lookup"):
+            picked, total = ds.rankings.top(
+                metric, by, ascending=order == "asc", k=k, scope_row=scope_row, level=level, below=below, above=above,
+                visible=view.mask if view is not None and not view.contains(scope_row) else None,
+            )
+        store = ds.org_store
+        col = store.metric_col[metric]
+        items = []
+        for rank, (row, score) in enumerate(picked, start=1):
+            baseline = float(store.baseline[row])
+            value = float(store.metrics[row, col])
+            items.append(
+                {
+                    "rank": rank,
+                    "id": store.ids[row],
+                    "name": store.name(row),
+                    "leader": store.leader(row),
+                    "headcount": int(store.headcount[row]),
+                    "status": store.status(row),
+                    "value": value,
+                    "baseline": baseline,
+                    "attainment": round(value / baseline, 4) if baseline else None,
+                    "score": round(score, 4),
+                }
+            )
+        return {"metric": metric, "by": by, "order": order, "scope": scope, "level": level, "total": total, "items": items}
+
+    return cached_json(ds, build)
+
+
+ALERTS_DEFAULT_LIMIT = 100
+ALERTS_MAX_LIMIT = 1000
+
+
+@app.get("/api/alerts")
+def get_alerts():
+    """
+    当前处于告警状态的部门：/api/alerts?severity=warn|bad&rule=&scope=&level=all|leaf|internal|<depth>&offset=&limit=
+    按严重程度降序、达成率升序排列；counts 为范围内各状态的部门数，rules 为生效的规则定义。
+    负责人视图下只含其可见范围。
+    """
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    args = request.args
+    severity = args.get("severity")
+    rule_id = args.get("rule")
+    level = args.get("level", "all")
+    scope = args.get("scope", ds.root_id)
+    offset = max(args.get("offset", 0, type=int), 0)
+    limit = min(max(args.get("limit", ALERTS_DEFAULT_LIMIT, type=int), 0), ALERTS_MAX_LIMIT)
+    engine = ds.rules
+    if severity is not None and severity not in ALERT_SEVERITIES[1:]:
+        return jsonify({"error": "severity must be warn or bad"}), 400
+    if rule_id is not None and rule_id not in engine.rule_index:
+        return jsonify({"error": f"unknown rule: {rule_id}"}), 404
+    if level not in RANK_LEVELS and not level.isdigit():
+        return jsonify({"error": f"level must be one of {', '.join(RANK_LEVELS)} or a depth"}), 400
+    scope_row = ds.org_store.index.get(scope)
+    if scope_row is None:
+        return jsonify({"error": f"unknown department: {scope}"}), 404
+    if "scope" in args:
+        denied = view_denied(view, scope_row, scope)
+        if denied:
+            return denied
+
+    def build():
+        with stage("index_lookup"):
+            span = ds.hierarchy.subtree(scope_row)
+            rows = np.arange(span.start, span.stop)
+            if view is not None and not view.contains(scope_row):
+                rows = rows[view.mask(rows)]
+            rows = rows[level_mask(ds.org_store, rows, level)]
+            firing = engine.firing(rows, severity=severity, rule_id=rule_id)
+        return {
+            "scope": scope,
+            "level": level,
+            "rules": [rule.to_dict() for rule in engine.rules],
+            "counts": engine.counts(rows),
+            "total": int(firing.size),
+            "alerts": [engine.entry(row) for row in firing[offset : offset + limit].tolist()],
+        }
+
+    return cached_json(ds, build)
+
+
+SIMULATE_MAX_SCENARIOS = 500
+
+
+@app.post("/api/simulate")
+def simulate():
+    """
+    What-if 推演：{"changes": [{"deptId": "south-a", "headcount": -5}, {"deptId": "east", "driver": "attrition", "delta": -0.03}]}
+    返回受影响部门（叶子及全部祖先）推演后的人效与达成率；{"scenarios": [{"name", "changes"}, ...]} 一次推演多个方案。
+    """
+    payload, error = json_object()
+    if error:
+        return error
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+
+    def run(changes: List[Change]) -> dict:
+        # 负责人只能推演自己范围内的部门，结果中范围外的祖先不返回
+        if view is not None:
+            for change in changes:
+                row = ds.org_store.index.get(change.dept_id)
+                if row is not None and not view.contains(row):
+                    raise PermissionError(change.dept_id)
+        result = ds.simulator.run(changes)
+        if view is not None:
+            result["affected"] = [item for item in result["affected"] if view.contains(ds.org_store.index[item["id"]])]
+        return result
+
+    try:
+        if "scenarios" in payload:
+            scenarios = payload["scenarios"]
+            if not isinstance(scenarios, list) or len(scenarios) > SIMULATE_MAX_SCENARIOS:
+                return jsonify({"error": f"scenarios must be a list of at most {SIMULATE_MAX_SCENARIOS}"}), 400
+            parsed = [parse_changes(s.get("changes") if isinstance(s, dict) else None) for s in scenarios]
+            with stage("aggregate"):
+                results = [{"name": s.get("name"), **run(changes)} for s, changes in zip(scenarios, parsed)]
+            return jsonify({"results": results})
+        changes = parse_changes(payload.get("changes"))
+        with stage("aggregate"):
+            return jsonify(run(changes))
+    except PermissionError as exc:
+        return jsonify({"error": f"department outside your scope: {exc.args[0]}"}), 403
+    except KeyError as exc:
+        return jsonify({"error": f"unknown department: {exc.args[0]}"}), 404
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+
+HISTORY_MAX_POINTS = 2000
+
+
+@app.get("/api/history")
+def get_history():
+    """指标历史：/api/history?deptId=&metric=&from=&to=&granularity=&maxPoints=，超出点数时 LTTB 降采样。"""
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    args = request.args
+    dept_id = args.get("deptId", default_dept(ds, view))
+    if view is not None and dept_id in ds.org_store.index:
+        denied = view_denied(view, ds.org_store.index[dept_id], dept_id)
+        if denied:
+            return denied
+    metric = args.get("metric", PRIMARY_METRIC)
+    granularity = args.get("granularity", "month")
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+    max_points = min(max(args.get("maxPoints", DEFAULT_MAX_POINTS, type=int), 3), HISTORY_MAX_POINTS)
+    try:
+        start = to_day(args["from"]) if args.get("from") else None
+        end = to_day(args["to"]) if args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "from/to must be dates like 2025-01-31 or 2025-01"}), 400
+    if ds.history is None or (dept_id, metric) not in ds.history:
+        return jsonify({"error": f"no history for {dept_id}/{metric}"}), 404
+    return cached_json(
+        ds,
+        lambda: {
+            "deptId": dept_id,
+            "metric": metric,
+            **ds.history.query(dept_id, metric, start=start, end=end, granularity=granularity, max_points=max_points),
+        },
+    )
+
+
+@app.get("/api/stream")
+def stream_changes():
+    """
+    变更推送（SSE）：delta 事件携带变化节点（含被重新汇总的祖先）的人数/人效/状态/指标，
+    reset 事件表示需要重新拉取全量。事件版本号是共享变更日志（change_feed.ChangeLog）中的位置，
+    各 worker 一致；断线重连用 Last-Event-ID 或 ?since= 续传，未提供版本时先发送 hello 告知当前版本。
+    负责人视图的 delta 只含其范围内的节点，范围内没有变化的 delta 不推送。
+    """
+    ds = current_dataset()
+    view, error = leader_view(ds)
+    if error:
+        return error
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    if since is not None and not since.isdigit():
+        return jsonify({"error": "since must be a change feed version number"}), 400
+    feed = change_log.feed
+    scope = {"dataset": ds, "view": view}
+
+    def visible(event: ChangeEvent) -> Optional[ChangeEvent]:
+        # 负责人视图只推送其范围内的节点；数据重新加载后行号随之变化，按新快照重新取范围
+        current = current_dataset()
+        if scope["dataset"] is not current:
+            scope.update(dataset=current, view=current.scopes.get(view.leader))
+        ds_now, view_now = scope["dataset"], scope["view"]
+        if view_now is None:
+            return None
+        rows = ds_now.org_store.index
+        changed = [node for node in event.data.get("changed", []) if node["id"] in rows and view_now.contains(rows[node["id"]])]
+        return ChangeEvent(event.version, event.kind, {**event.data, "changed": changed}) if changed else None
+
+    def frames():
+        version = int(since) if since is not None else feed.version
+        if since is None:
+            yield ChangeEvent(version, "hello", {}).encode()
+        yield from feed.stream(version, select=visible if view is not None else None)
+
+    response = Response(frames(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def cache_hit_ratio() -> float:
+    # 合并到他人构建结果的请求同样没有重复计算，计入命中
+    served = response_cache.hits + response_cache.coalesced
+    return served / max(served + response_cache.misses, 1)
+
+
+registry.gauge("hr_response_cache_entries", "Cached encoded responses.", lambda: [({}, len(response_cache))])
+registry.gauge("hr_response_cache_hit_ratio", "Response cache (hits + coalesced) / lookups since start.", lambda: [({}, cache_hit_ratio())])
+registry.gauge("hr_dataset_version", "Version of the served dataset snapshot.", lambda: [({}, current_dataset().version)])
+registry.gauge("hr_dataset_departments", "Departments in the served snapshot.", lambda: [({}, len(current_dataset().org_store))])
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus 文本格式的进程内指标（见 instrumentation.py）。"""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.post("/api/admin/reload")
+def reload_data():
+    denied = admin_denied()
+    if denied:
+        return denied
+    payload, error = json_object()
+    if error:
+        return error
+    snapshot_path = payload.get("snapshot")
+    departments_path = payload.get("departments") or os.getenv("HR_DEPARTMENTS_FILE")
+    monthly_path = payload.get("monthly") or os.getenv("HR_MONTHLY_FILE")
+    if not snapshot_path and not (departments_path and monthly_path):
+        snapshot_path = os.getenv("HR_SNAPSHOT_FILE")
+    if not snapshot_path and not (departments_path and monthly_path):
+        return jsonify({"error": "a snapshot or departments and monthly file paths are required"}), 400
+    if not _reload_lock.acquire(blocking=False):
+        return jsonify({"error": "a reload is already running", "status": _reload_status}), 409
+    _reload_status.clear()
+    _reload_status.update({"state": "running", "startedAt": time.time()})
+    # 导入在后台线程进行，完成后整体替换快照；期间读请求继续使用旧快照
+    threading.Thread(target=reload_from_files, args=(departments_path, monthly_path, snapshot_path), daemon=True).start()
+    return jsonify({"status": _reload_status}), 202
+
+
+@app.post("/api/admin/periods")
+def archive_period_endpoint():
+    """
+    存档一期只读快照：{"period": "2026-09"} 冻结当前数据；
+    同时给出 snapshot 或 departments/monthly 时改为从文件构建该期（不影响当前数据）。
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    payload, error = json_object()
+    if error:
+        return error
+    period = payload.get("period")
+    if not isinstance(period, str):
+        return jsonify({"error": "period is required"}), 400
+    try:
+        if payload.get("snapshot"):
+            source = Dataset.load(payload["snapshot"])
+        elif payload.get("departments") and payload.get("monthly"):
+            source = dataset_from_files(payload["departments"], payload["monthly"])
+        else:
+            source = current_dataset()
+        snapshot = archive_period(period, source)
+    except (OSError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify({"period": snapshot.period, **period_store.stats()}), 201
+
+
+@app.get("/api/admin/reload")
+def reload_status():
+    denied = admin_denied()
+    if denied:
+        return denied
+    return jsonify({"status": _reload_status, "version": current_dataset().version})
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", os.getenv("FLASK_RUN_PORT", "5001")))
     host = os.getenv("HOST", "127.0.0.1")
-    app.run(host=host, port=port, debug=True)
+    # 开发服务器（单进程 + 自动重载）；生产环境使用 gunicorn.conf.py（start.sh prod）
+    app.run(host=host, port=port, debug=os.getenv("FLASK_DEBUG", "1") == "1")
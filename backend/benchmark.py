@@ -0,0 +1,205 @@
+"""
+后端热点路径基准测试。
+
+    python benchmark.py --sizes 1000,10000 --output bench.json
+    python benchmark.py --sizes 1000,10000 --baseline bench.json   # 与基线比较，回退时退出码为 1
+
+合成指定规模的组织树 / 关联指标配置 / 驱动指标序列，分别计时汇总、索引构建、
+find_correlations，以及经 Flask test client 调用的各个 HTTP 端点（缓存冷 / 热两种情况），
+结果输出为 JSON，便于与保存的基线逐项比较。
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from correlation_engine import compute_correlations
+from dataset import Dataset, aggregate_org, build_parent_map, flatten_departments
+from org_store import OrgStore
+from seed_data import load_seed
+from synthetic import generate_correlation_data, generate_driver_series, generate_org_tree
+
+DEFAULT_SIZES = (1_000, 10_000)
+# 端点计时需要构建完整 Dataset（含检索索引），超过该规模默认跳过
+HTTP_MAX_SIZE = 100_000
+CORRELATION_MAX_SIZE = 100_000
+# 基线耗时低于该值（毫秒）的项不参与回退判定，避免计时噪声
+NOISE_FLOOR_MS = 0.05
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> dict:
+    """重复执行 fn（setup 的耗时不计入），返回毫秒级的统计值。"""
+    samples: List[float] = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "max_ms": round(samples[-1], 4),
+    }
+
+
+def bench_core(tree: dict, repeat: int) -> Dict[str, dict]:
+    results = {
+        "build_parent_map": measure(lambda: build_parent_map(tree), repeat),
+        "flatten_departments": measure(lambda: flatten_departments(tree), repeat),
+        "aggregate_org": measure(aggregate_org, repeat, setup=lambda: copy.deepcopy(tree)),
+    }
+    aggregated = copy.deepcopy(tree)
+    aggregate_org(aggregated)
+    results["org_store_from_tree"] = measure(lambda: OrgStore.from_tree(aggregated), repeat)
+    store = OrgStore.from_tree(aggregated)
+    results["org_store_aggregate"] = measure(store.aggregate, repeat)
+    return results
+
+
+def bench_dataset(tree: dict, size: int, repeat: int, samples: int, seed: int) -> tuple:
+    summary_metrics = load_seed()[0]
+    dept_ids = [node["id"] for node in flatten_departments(tree)]
+    correlation_data = generate_correlation_data(dept_ids, seed=seed)
+    results: Dict[str, dict] = {}
+
+    start = time.perf_counter()
+    ds = Dataset(summary_metrics, copy.deepcopy(tree), correlation_data)
+    results["dataset_build"] = {"runs": 1, "median_ms": round((time.perf_counter() - start) * 1000, 4)}
+
+    rng = random.Random(seed)
+    sample = [rng.choice(dept_ids) for _ in range(samples)]
+    # 单次调用太快，按批计时后折算为每次调用
+    per_call = measure(lambda: [ds.find_correlations(d) for d in sample], repeat)
+    results["find_correlations"] = {k: (round(v / samples, 6) if k.endswith("_ms") else v) for k, v in per_call.items()}
+
+    if size <= CORRELATION_MAX_SIZE:
+        series = generate_driver_series(dept_ids, seed=seed)
+        results["compute_correlations"] = measure(lambda: compute_correlations(series), max(1, repeat // 3))
+        ds.driver_series = series
+        ds.warm()
+        per_call = measure(lambda: [ds.find_correlations(d) for d in sample], repeat)
+        results["find_correlations_computed"] = {
+            k: (round(v / samples, 6) if k.endswith("_ms") else v) for k, v in per_call.items()
+        }
+    return ds, results, sample
+
+
+def bench_http(ds: Dataset, sample: Sequence[str], repeat: int) -> Dict[str, dict]:
+    import app as app_module
+
+    app_module.install_dataset(ds)
+    client = app_module.app.test_client()
+    leaf = next(d for d in sample if ds.org_store.is_leaf[ds.org_store.index[d]])
+    inner = ds.org_store.ids[min(1, len(ds.org_store) - 1)]
+    name = ds.org_store.name(ds.org_store.index[leaf])
+    endpoints = {
+        "GET /api/summary": "/api/summary",
+        "GET /api/org": "/api/org",
+        "GET /api/org?depth=2": "/api/org?depth=2",
+        "GET /api/org/<id>/detail": f"/api/org/{leaf}/detail",
+        "GET /api/org/<id>/descendants": f"/api/org/{inner}/descendants",
+        "GET /api/org/<id>/ancestors": f"/api/org/{leaf}/ancestors",
+        "GET /api/correlations": f"/api/correlations?deptId={leaf}",
+        "GET /api/correlations?deptIds": "/api/correlations?deptIds=" + ",".join(sample[:50]),
+        "GET /api/search": f"/api/search?query={name[:2]}",
+        "GET /api/rankings": "/api/rankings?by=attainment&order=asc&k=20&level=leaf",
+    }
+    results: Dict[str, dict] = {}
+    for label, url in endpoints.items():
+        def call(url=url):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} -> {response.status_code}")
+            return response.get_data()
+
+        results[f"{label} (cold)"] = measure(lambda _: call(), repeat, setup=app_module.response_cache.clear)
+        results[f"{label} (warm)"] = measure(call, repeat)
+    return results
+
+
+def run(sizes: Sequence[int], depth: int, breadth: Optional[int], repeat: int, samples: int, seed: int, http_max: int) -> dict:
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "depth": depth,
+            "breadth": breadth,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        print(f"[bench] {size} departments", file=sys.stderr)
+        tree = generate_org_tree(size, depth=depth, breadth=breadth, seed=seed)
+        results = bench_core(tree, repeat)
+        ds, dataset_results, sample = bench_dataset(tree, size, repeat, samples, seed)
+        results.update(dataset_results)
+        if size <= http_max:
+            results.update(bench_http(ds, sample, repeat))
+        report["results"][str(size)] = results
+    return report
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """逐项比较中位数耗时，超出基线 (1 + tolerance) 倍的记为回退。"""
+    regressions = []
+    for size, cases in current["results"].items():
+        for case, stats in cases.items():
+            base = baseline.get("results", {}).get(size, {}).get(case)
+            if not base or base["median_ms"] < NOISE_FLOOR_MS:
+                continue
+            ratio = stats["median_ms"] / base["median_ms"]
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    {"size": size, "case": case, "baseline_ms": base["median_ms"], "current_ms": stats["median_ms"], "ratio": round(ratio, 2)}
+                )
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark backend hot paths on synthetic org trees")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma separated department counts")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--breadth", type=int, help="children per node (default: smallest that fits the size)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=1000, help="departments sampled for per-call lookups")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--http-max-size", type=int, default=HTTP_MAX_SIZE)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against a previous JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = +25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    report = run(sizes, args.depth, args.breadth, args.repeat, args.samples, args.seed, args.http_max_size)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+    encoded = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+    for item in report.get("regressions", []):
+        print(f"[bench] regression {item['size']} {item['case']}: {item['baseline_ms']} -> {item['current_ms']} ms (x{item['ratio']})", file=sys.stderr)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
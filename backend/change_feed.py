@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+
+try:  # Windows 上没有 fcntl；单进程的开发服务器不需要文件锁
+    import fcntl
+except ImportError:  # pragma: no cover - 取决于平台
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15.0
+POLL_SECONDS = 0.2
+# 日志文件首行：定长的 {"base": N}，事件版本号 = base + 该记录结束处在文件中的偏移
+_HEADER = '{"base":%20d}\n'
+HEADER_SIZE = len(_HEADER % 0)
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    version: int
+    kind: str  # delta：增量变更；reset：整份快照已替换，客户端需重新拉取
+    data: dict
+
+    def encode(self) -> str:
+        """SSE 帧：id 为数据版本号，断线重连时浏览器以 Last-Event-ID 回传。"""
+        payload = json.dumps({"version": self.version, **self.data}, ensure_ascii=False, separators=(",", ":"))
+        return f"id: {self.version}\nevent: {self.kind}\ndata: {payload}\n\n"
+
+
+class ChangeFeed:
+    """
+    进程内的变更事件环形缓冲（按版本号递增）。
+
+    订阅者记住最后收到的版本号，等待并取走更新的事件；若其间的事件已被缓冲淘汰，
+    返回 None，由调用方通知客户端回退为全量拉取。
+    """
+
+    def __init__(self, version: int = 0, maxlen: int = 1024):
+        self._events: Deque[ChangeEvent] = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self.version = version
+        # 早于 _floor 的版本已无法补齐（对应事件已被环形缓冲淘汰）
+        self._floor = version
+
+    def publish(self, version: int, kind: str, data: dict) -> ChangeEvent:
+        event = ChangeEvent(version, kind, data)
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self._floor = self._events[0].version
+            self._events.append(event)
+            self.version = max(self.version, version)
+            self._cond.notify_all()
+        return event
+
+    def reset(self, version: int, reason: str) -> ChangeEvent:
+        """整份数据替换：之前的增量对新快照不再有意义，清空缓冲后发布 reset。"""
+        with self._cond:
+            self._events.clear()
+            self._floor = 0  # 任何旧版本的订阅者都会先收到这条 reset
+        return self.publish(version, "reset", {"reason": reason})
+
+    def since(self, version: int) -> Optional[List[ChangeEvent]]:
+        with self._cond:
+            return self._since(version)
+
+    def _since(self, version: int) -> Optional[List[ChangeEvent]]:
+        if version >= self.version:
+            return []
+        if version < self._floor:
+            return None
+        return [e for e in self._events if e.version > version]
+
+    def wait(self, version: int, timeout: float) -> Optional[List[ChangeEvent]]:
+        """阻塞至有比 version 更新的事件或超时；超时返回空列表。"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > version, timeout=timeout)
+            return self._since(version)
+
+    def stream(
+        self,
+        version: int,
+        heartbeat: float = HEARTBEAT_SECONDS,
+        select: Optional[Callable[[ChangeEvent], Optional[ChangeEvent]]] = None,
+    ) -> Iterator[str]:
+        """
+        SSE 帧生成器：先补发 version 之后的事件，之后持续推送；空闲时发送注释行保活。
+        select 按订阅者的可见范围改写 delta 事件，返回 None 时该事件不发送。
+        """
+        if version > self.version:
+            # 客户端的版本来自已被替换的日志（服务重启过），直接要求重新拉取
+            yield ChangeEvent(self.version, "reset", {"reason": "unknown-version"}).encode()
+            version = self.version
+        while True:
+            events = self.wait(version, heartbeat)
+            if events is None:
+                yield ChangeEvent(self.version, "reset", {"reason": "gap"}).encode()
+                version = self.version
+                continue
+            if not events:
+                yield ": ping\n\n"
+                continue
+            for event in events:
+                if select is not None and event.kind == "delta":
+                    event = select(event)
+                    if event is None:
+                        continue
+                yield event.encode()
+            version = events[-1].version
+
+
+class ChangeLog:
+    """
+    跨进程共享的变更日志：gunicorn 各 worker 共用同一个追加写入的 NDJSON 文件，
+    每条记录一行 {"origin", "kind", "data", "replay"}，事件版本号为文件头中的 base 加上该行结束处的字节偏移，
+    所有 worker 编号一致，SSE 客户端连到任意 worker 都能按版本续传。
+
+    写入在文件锁内进行：先补读其他进程追加的记录，再执行本次修改并追加，各进程因此按同一顺序应用修改。
+    每个进程一个后台线程追踪文件末尾：新事件放入本进程的 ChangeFeed 供订阅者读取，
+    其他进程记录的 replay 交给 apply 在本进程的数据快照上重放。
+
+    reset（整份快照替换）之前的记录不再需要：写 reset 时在同一把文件锁内原地截断文件，
+    只留文件头（base 调整为使版本号继续递增）与这条 reset，日志大小只随上次替换以来的修改增长。
+    """
+
+    def __init__(self, path: str, apply: Optional[Callable[[dict], None]] = None, poll: float = POLL_SECONDS):
+        self.path = path
+        self.apply = apply
+        self.poll = poll
+        self.feed = ChangeFeed()
+        self.origin = ""
+        self._position = 0  # 已处理到的版本号（base + 文件内偏移）
+        self._base = 0
+        self._pid = 0  # 已启动追踪线程的进程
+        self._lock = threading.RLock()
+        self._start_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path: Optional[str] = None, apply: Optional[Callable[[dict], None]] = None) -> "ChangeLog":
+        """
+        新建（清空）日志文件；未指定 path 时放在临时目录，由创建它的进程退出时删除。
+        gunicorn 以 preload 方式在 master 中创建一次，fork 出的 worker 共用同一个文件。
+        """
+        temporary = path is None
+        if temporary:
+            path = os.path.join(tempfile.gettempdir(), f"hr-changes-{os.getpid()}.ndjson")
+        with open(path, "wb") as f:
+            f.write((_HEADER % 0).encode("ascii"))
+        if temporary:
+            atexit.register(_remove, path, os.getpid())
+        return cls(path, apply=apply)
+
+    def start(self) -> None:
+        """
+        在当前进程中补读已有记录并启动追踪线程（fork 出的 worker 首次处理请求时调用；可重复调用）。
+        已有记录只重放数据修改（fork 来的数据快照早于它们），不再放入事件缓冲：
+        本进程的 ChangeFeed 从日志当前末尾的版本开始，更早版本的订阅者收到 reset 后重新拉取。
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # 等待用的锁与条件变量在本进程中新建：gevent worker 在 fork 之后才打 monkey patch，
+            # master 中创建的原语会阻塞整个 worker 而不是只让出当前协程
+            self._lock = threading.RLock()
+            self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            self._catch_up(publish=False)
+            self.feed = ChangeFeed(version=self._position)
+            self._pid = os.getpid()
+            threading.Thread(target=self._follow, name="change-log", daemon=True).start()
+
+    def commit(self, kind: str, build: Callable[[], Tuple[dict, Optional[dict]]]) -> Tuple[int, dict]:
+        """
+        在文件锁内执行 build（本进程的修改）并把结果追加为一条记录，返回 (版本号, data)。
+        build 返回 (推送给订阅者的 data, 供其他进程重放的 replay 或 None)；build 抛出的异常原样传出，不写记录。
+        """
+        self.start()
+        with self._lock, open(self.path, "r+b") as f, _flock(f, fcntl.LOCK_EX if fcntl else 0):
+            self._read_new(f)
+            data, replay = build()
+            record = {"origin": self.origin, "kind": kind, "data": data, "replay": replay}
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            size = f.seek(0, os.SEEK_END)
+            if kind == "reset":
+                # 之前的记录已被这次替换取代：截断后只留文件头与本条 reset，
+                # 新的 base 使文件头结束处对应截断前的末尾，版本号照常递增
+                self._base += size - HEADER_SIZE
+                f.seek(0)
+                f.truncate()
+                f.write((_HEADER % self._base).encode("ascii"))
+            elif size > self._position - self._base:
+                f.write(b"\n")  # 异常退出的进程留下的半行：补上换行使其成为一条无法解析、被跳过的记录
+            f.write(line)
+            f.flush()
+            version = self._base + f.tell()
+            self._deliver(version, record)
+            self._position = version
+        return version, data
+
+    def sync(self) -> None:
+        """
+        有新记录（或日志已被其他进程截断）时立即补读；每个请求开始时调用，
+        只读文件头与文件大小，使其他 worker 刚完成的修改对本请求可见。
+        """
+        with open(self.path, "rb") as f, _flock(f, fcntl.LOCK_SH if fcntl else 0):
+            base = _read_base(f)
+            size = os.fstat(f.fileno()).st_size
+        if base != self._base or size > self._position - base:
+            with self._lock:
+                self._catch_up()
+
+    def _follow(self) -> None:
+        while True:
+            time.sleep(self.poll)
+            try:
+                self.sync()
+            except OSError:
+                logger.exception("change log %s is unavailable", self.path)
+
+    def _catch_up(self, publish: bool = True) -> None:
+        # 调用方持有 self._lock；共享锁保证不会读到写了一半的截断
+        with open(self.path, "rb") as f, _flock(f, fcntl.LOCK_SH if fcntl else 0):
+            self._read_new(f, publish)
+
+    def _read_new(self, f, publish: bool = True) -> None:
+        # 只处理以换行结尾的完整记录
+        base = _read_base(f)
+        # 截断后「base + 文件头」即截断前的文件末尾；已处理的版本更小说明截断前还有没读到的记录
+        start = base + HEADER_SIZE
+        if self._pid and self._position < start:
+            logger.warning("change log was compacted past version %d; resuming at %d", self._position, start)
+        offset = max(self._position, start)
+        f.seek(offset - base)
+        pending = f.read()
+        self._base = base
+        for line in pending[: pending.rfind(b"\n") + 1].splitlines(keepends=True):
+            offset += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning("skipping malformed change log record at %d", offset)
+                continue
+            self._deliver(offset, record, publish)
+        self._position = offset
+
+    def _deliver(self, version: int, record: dict, publish: bool = True) -> None:
+        if record.get("origin") != self.origin and record.get("replay") is not None and self.apply is not None:
+            try:
+                self.apply(record["replay"])
+            except Exception:  # 重放失败不影响后续记录（如该 worker 已单独重新导入了数据）
+                logger.exception("failed to replay change %d", version)
+        if not publish:
+            return
+        if record["kind"] == "reset":
+            self.feed.reset(version, record["data"].get("reason", ""))
+        else:
+            self.feed.publish(version, record["kind"], record["data"])
+
+
+@contextmanager
+def _flock(f, operation: int) -> Iterator[None]:
+    if not operation:
+        yield
+        return
+    fcntl.flock(f, operation)
+    try:
+        yield
+    finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_base(f) -> int:
+    f.seek(0)
+    return json.loads(f.read(HEADER_SIZE))["base"]
+
+
+def _remove(path: str, owner: int) -> None:
+    if os.getpid() != owner:  # fork 出的 worker 退出时不删除
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
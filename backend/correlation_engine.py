@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 驱动指标元数据：计算结果没有人工配置条目可继承时，用它生成展示字段
+DRIVER_META: Dict[str, dict] = {
+    "attrition": {"name": "离职率", "rule": "离职人数 ÷ 平均在职人数"},
+    "mobility": {"name": "人员流动性", "rule": "内部调岗人数 ÷ 在职人数"},
+    "project_conversion_rate": {"name": "项目转化率", "rule": "成交项目数 ÷ 立项项目数"},
+    "project_conversion_cycle": {"name": "项目转化周期", "rule": "成交平均周期（天）"},
+    "new_sale_cycle": {"name": "新销售产单周期", "rule": "新人首单平均天数"},
+    "avg_project_value": {"name": "平均项目价值", "rule": "项目总金额 ÷ 项目数量"},
+}
+
+MIN_SAMPLES = 3
+SIGNIFICANCE_LEVEL = 0.05
+
+
+@dataclass
+class DriverSeries:
+    """按月对齐的部门时间序列：target 为人效 (D, T)，drivers 为各驱动指标 (K, D, T)，缺失为 NaN。"""
+
+    dept_ids: List[str]
+    periods: List[str]
+    target: np.ndarray
+    driver_ids: List[str]
+    drivers: np.ndarray
+
+
+@dataclass
+class CorrelationTable:
+    """全部门 × 全驱动指标的相关系数结果（行：部门，列：驱动指标）。"""
+
+    dept_ids: List[str]
+    driver_ids: List[str]
+    pearson: np.ndarray
+    pearson_p: np.ndarray
+    spearman: np.ndarray
+    spearman_p: np.ndarray
+    samples: np.ndarray
+    latest: np.ndarray
+    index: Dict[str, int] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.index = {dept_id: i for i, dept_id in enumerate(self.dept_ids)}
+
+    def __contains__(self, dept_id: str) -> bool:
+        return dept_id in self.index
+
+    def for_dept(self, dept_id: str, templates: Sequence[dict] = ()) -> List[dict]:
+        """
+        生成与 correlation_data 条目同构的列表：系数、方向来自计算结果，
+        描述与 breakdown 沿用同 id 的人工配置条目，按 |系数| 从高到低排序。
+        """
+        row = self.index[dept_id]
+        by_id = {t["id"]: t for t in templates}
+        entries = []
+        for j, driver_id in enumerate(self.driver_ids):
+            r = self.pearson[row, j]
+            if not np.isfinite(r):
+                continue
+            template = by_id.get(driver_id)
+            meta = DRIVER_META.get(driver_id, {"name": driver_id, "rule": ""})
+            direction = "positive" if r >= 0 else "negative"
+            entry = dict(template) if template else {
+                "id": driver_id,
+                "name": meta["name"],
+                "description": f"{meta['name']}与人效{'正' if r >= 0 else '负'}相关",
+                "detail": {"rule": meta["rule"], "breakdown": []},
+            }
+            latest = self.latest[row, j]
+            entry.update(
+                {
+                    "coefficient": round(float(r), 2),
+                    "direction": direction,
+                    "value": round(float(latest), 4) if np.isfinite(latest) else entry.get("value"),
+                    "spearman": _round_or_none(self.spearman[row, j], 2),
+                    "pValue": _round_or_none(self.pearson_p[row, j], 4),
+                    "spearmanPValue": _round_or_none(self.spearman_p[row, j], 4),
+                    "samples": int(self.samples[row, j]),
+                    "significant": bool(self.pearson_p[row, j] < SIGNIFICANCE_LEVEL),
+                }
+            )
+            entries.append(entry)
+        entries.sort(key=lambda e: -abs(e["coefficient"]))
+        return entries
+
+
+def compute_correlations(series: DriverSeries, chunk_size: int = 4096, min_samples: int = MIN_SAMPLES) -> CorrelationTable:
+    """
+    对全部门 × 全驱动指标一次性做矩阵化的 Pearson / Spearman 计算及 t 检验显著性。
+    按部门分块，控制 (K, chunk, T) 中间数组的内存占用。
+    """
+    num_depts = len(series.dept_ids)
+    num_drivers = len(series.driver_ids)
+    shape = (num_depts, num_drivers)
+    pearson = np.full(shape, np.nan)
+    spearman = np.full(shape, np.nan)
+    samples = np.zeros(shape, dtype=np.int64)
+    latest = np.full(shape, np.nan)
+
+    for start in range(0, num_depts, chunk_size):
+        stop = min(start + chunk_size, num_depts)
+        y = np.asarray(series.drivers[:, start:stop], dtype=np.float64)
+        target = np.asarray(series.target[start:stop], dtype=np.float64)
+        target_mask = np.isfinite(target)
+        x = np.broadcast_to(target, y.shape)
+        mask = target_mask & np.isfinite(y)
+        n = mask.sum(axis=-1)
+        r = _pearson(x, y, mask, n)
+        if np.array_equal(mask, np.broadcast_to(target_mask, mask.shape)):
+            # 驱动指标与人效的缺失位置一致（常见情况），人效秩只需计算一次
+            x_rank = np.broadcast_to(_average_rank(target, target_mask), y.shape)
+        else:
+            x_rank = _average_rank(x, mask)
+        rho = _pearson(x_rank, _average_rank(y, mask), mask, n)
+        too_few = n < min_samples
+        r[too_few] = np.nan
+        rho[too_few] = np.nan
+        pearson[start:stop] = r.T
+        spearman[start:stop] = rho.T
+        samples[start:stop] = n.T
+        latest[start:stop] = _last_valid(y).T
+
+    return CorrelationTable(
+        dept_ids=list(series.dept_ids),
+        driver_ids=list(series.driver_ids),
+        pearson=pearson,
+        pearson_p=correlation_p_value(pearson, samples),
+        spearman=spearman,
+        spearman_p=correlation_p_value(spearman, samples),
+        samples=samples,
+        latest=latest,
+    )
+
+
+def correlation_p_value(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """
+    相关系数的双侧 t 检验 p 值（df = n - 2）。
+    df 为整数，t 分布 CDF 有有限级数闭式解（A&S 26.7.3/26.7.4），且 θ = asin|r|，
+    因此无需 scipy，逐项累加最多 df/2 次即可完成整矩阵计算。
+    """
+    r = np.asarray(r, dtype=np.float64)
+    df = np.asarray(n, dtype=np.int64) - 2
+    p = np.full(r.shape, np.nan)
+    valid = np.isfinite(r) & (df > 0)
+    if not valid.any():
+        return p
+    abs_r = np.clip(np.abs(r[valid]), 0.0, 1.0)
+    dfv = df[valid]
+    theta = np.arcsin(abs_r)
+    sin_t = abs_r
+    cos2 = 1.0 - abs_r * abs_r
+    odd = dfv % 2 == 1
+
+    series = np.ones_like(abs_r)
+    coef = np.ones_like(abs_r)
+    power = np.ones_like(abs_r)
+    terms = np.where(odd, (dfv - 3) // 2, (dfv - 2) // 2)
+    for k in range(1, int(terms.max(initial=0)) + 1):
+        active = terms >= k
+        coef = np.where(odd, coef * (2 * k) / (2 * k + 1), coef * (2 * k - 1) / (2 * k))
+        power = power * cos2
+        series = series + np.where(active, coef * power, 0.0)
+
+    odd_cdf = np.where(dfv == 1, theta, theta + sin_t * np.sqrt(cos2) * series) * (2.0 / np.pi)
+    even_cdf = sin_t * series
+    p[valid] = np.clip(1.0 - np.where(odd, odd_cdf, even_cdf), 0.0, 1.0)
+    return p
+
+
+def _pearson(x: np.ndarray, y: np.ndarray, mask: np.ndarray, n: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        safe_n = np.where(n > 0, n, 1)
+        mx = np.where(mask, x, 0.0).sum(axis=-1) / safe_n
+        my = np.where(mask, y, 0.0).sum(axis=-1) / safe_n
+        dx = np.where(mask, x - mx[..., None], 0.0)
+        dy = np.where(mask, y - my[..., None], 0.0)
+        cov = (dx * dy).sum(axis=-1)
+        denom = np.sqrt((dx * dx).sum(axis=-1) * (dy * dy).sum(axis=-1))
+        r = cov / denom
+    r[denom == 0] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def _average_rank(a: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """沿最后一维求平均秩（并列取平均），无效位置排在末尾且不参与后续计算。"""
+    values = np.where(mask, a, np.inf)
+    order = np.argsort(values, axis=-1, kind="stable")
+    ranked = np.take_along_axis(values, order, axis=-1)
+    size = values.shape[-1]
+    pos = np.broadcast_to(np.arange(size), values.shape)
+    same_as_prev = np.zeros(values.shape, dtype=bool)
+    same_as_prev[..., 1:] = ranked[..., 1:] == ranked[..., :-1]
+    same_as_next = np.zeros(values.shape, dtype=bool)
+    same_as_next[..., :-1] = same_as_prev[..., 1:]
+    group_start = np.maximum.accumulate(np.where(same_as_prev, 0, pos), axis=-1)
+    group_end = np.flip(np.minimum.accumulate(np.flip(np.where(same_as_next, size - 1, pos), axis=-1), axis=-1), axis=-1)
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, (group_start + group_end) / 2.0 + 1.0, axis=-1)
+    return ranks
+
+
+def _last_valid(y: np.ndarray) -> np.ndarray:
+    valid = np.isfinite(y)
+    size = y.shape[-1]
+    idx = np.where(valid, np.arange(size), -1).max(axis=-1)
+    out = np.take_along_axis(y, np.clip(idx, 0, None)[..., None], axis=-1)[..., 0]
+    out[idx < 0] = np.nan
+    return out
+
+
+def _round_or_none(value: float, digits: int) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aggregation import PRIMARY_METRIC, OrgAggregator
+from alerts import RuleEngine
+from correlation_engine import CorrelationTable, DriverSeries, compute_correlations
+from hierarchy_index import HierarchyIndex
+from instrumentation import stage
+from models import CorrelationData, MetricSummary
+from org_store import OrgStore
+from rankings import RankingIndex
+from scopes import ScopeIndex
+from search_index import DepartmentSearchIndex, PostingArrays, tree_entries
+from simulation import Simulator
+from seed_data import load_seed, seed_history
+from snapshot_file import Snapshot, load_snapshot, write_snapshot
+from timeseries import HistoryStore
+
+
+# 全局单调递增的数据版本号：新快照与快照内的每次更新各取一个，响应缓存以此为界失效
+_versions = itertools.count(1)
+
+
+def aggregate_org(node: dict, parent_map: dict | None = None) -> OrgAggregator:
+    """
+    汇总子节点的人数与人效指标（加权平均），并回填到各节点。
+    返回的汇总引擎保留各节点的加权和，后续叶子更新只需沿祖先路径增量传播。
+    """
+    with stage("aggregate"):
+        return OrgAggregator(node, parent_map)
+
+
+def iter_departments(node: dict, parent: str | None = None) -> Iterator[Tuple[dict, Optional[str]]]:
+    """先序遍历（显式栈），逐个产出 (节点, 父节点 id)；深度不受递归层数限制。"""
+    stack: List[Tuple[dict, Optional[str]]] = [(node, parent)]
+    while stack:
+        current, parent_id = stack.pop()
+        yield current, parent_id
+        children = current.get("children", []) or []
+        stack.extend((child, current["id"]) for child in reversed(children))
+
+
+def build_parent_map(node: dict, parent: str | None = None, mp: dict | None = None) -> dict:
+    if mp is None:
+        mp = {}
+    for current, parent_id in iter_departments(node, parent):
+        mp[current["id"]] = parent_id
+    return mp
+
+
+def flatten_departments(node: dict) -> List[dict]:
+    return [current for current, _ in iter_departments(node)]
+
+
+def reconcile_root_metric(org_tree: dict, summary_metrics: List[MetricSummary]) -> None:
+    """确保总部（root）的人效值与总览卡片一致。"""
+    root_top_metric = next((m for m in summary_metrics if m.id == "revenue_per_cost"), None)
+    if not root_top_metric:
+        return
+    org_tree["value"] = root_top_metric.value
+    if "metrics" in org_tree:
+        updated = False
+        for m in org_tree["metrics"]:
+            if m.get("id") == "revenue_per_cost":
+                m["value"] = root_top_metric.value
+                m["unit"] = root_top_metric.unit
+                updated = True
+        if not updated:
+            org_tree["metrics"].append(
+                {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": root_top_metric.value, "unit": root_top_metric.unit}
+            )
+
+
+class Dataset:
+    """
+    一份完整的数据快照：总览指标、组织树、关联指标配置及其派生索引。
+    构建完成后由 app.install_dataset 一次性替换当前快照，读请求始终看到一致的一份数据。
+
+    组织数据只保存在列式存储（OrgStore）中：构建时用 OrgAggregator 在嵌套 dict 上汇总一次，
+    转成列式存储后即丢弃 dict 树与汇总引擎；此后的叶子更新、推演都直接在列式存储上进行，
+    接口需要的嵌套 JSON 按需由 materialize 生成。从快照文件加载时列式存储是 mmap 现成的，
+    检索索引等在首次用到时才构建，冷启动不随部门数增长。
+    """
+
+    def __init__(
+        self,
+        summary_metrics: List[MetricSummary],
+        org_tree: dict,
+        correlation_data: CorrelationData,
+        driver_series: Optional[DriverSeries] = None,
+        history: Optional[HistoryStore] = None,
+    ):
+        self._init_state(summary_metrics, correlation_data, driver_series, history)
+        # 汇总人数和指标（回填到 org_tree 各节点）
+        aggregate_org(org_tree)
+        self._install_tree(org_tree)
+
+    @classmethod
+    def from_recomputed(
+        cls,
+        summary_metrics: List[MetricSummary],
+        org_tree: dict,
+        correlation_data: CorrelationData,
+        pinyin: Optional[Dict[str, Tuple[str, str]]] = None,
+        search_parts: Optional[Sequence[Tuple[int, PostingArrays]]] = None,
+        correlation_table: Optional[CorrelationTable] = None,
+        driver_series: Optional[DriverSeries] = None,
+        history: Optional[HistoryStore] = None,
+    ) -> "Dataset":
+        """由已汇总的组织树与算好的拼音表、分段倒排表、相关系数组装快照（见 recompute.build_dataset）。"""
+        ds = cls.__new__(cls)
+        ds._init_state(summary_metrics, correlation_data, driver_series, history)
+        ds._install_tree(org_tree, pinyin, search_parts)
+        ds._correlation_table = correlation_table
+        return ds
+
+    def _install_tree(
+        self,
+        org_tree: dict,
+        pinyin: Optional[Dict[str, Tuple[str, str]]] = None,
+        search_parts: Optional[Sequence[Tuple[int, PostingArrays]]] = None,
+    ) -> None:
+        """由已汇总的组织树建立列式存储与检索索引；调用方随后即可丢弃 org_tree。"""
+        reconcile_root_metric(org_tree, self.summary_metrics)
+        self.org_store = OrgStore.from_tree(org_tree)
+        # 部门/负责人检索索引（n-gram + 拼音首字母）
+        if search_parts is None:
+            self._search_index = DepartmentSearchIndex.from_tree(org_tree, pinyin=pinyin)
+        else:
+            self._search_index = DepartmentSearchIndex.from_parts(list(tree_entries(org_tree)), search_parts, pinyin=pinyin)
+        self._apply_rules()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> "Dataset":
+        ds = cls.__new__(cls)
+        ds._init_state(snapshot.summary_metrics, snapshot.correlation_data, snapshot.driver_series, snapshot.history)
+        ds.org_store = snapshot.org_store
+        ds._correlation_table = snapshot.correlation_table
+        ds._apply_rules()
+        return ds
+
+    @classmethod
+    def load(cls, path: str) -> "Dataset":
+        return cls.from_snapshot(load_snapshot(path))
+
+    def _init_state(
+        self,
+        summary_metrics: List[MetricSummary],
+        correlation_data: CorrelationData,
+        driver_series: Optional[DriverSeries],
+        history: Optional[HistoryStore],
+    ) -> None:
+        self.summary_metrics = summary_metrics
+        self.correlation_data = correlation_data
+        self.driver_series = driver_series
+        # 部门 × 指标的长周期历史（/api/history）；内联在 detail.history 中的只是最近几期
+        self.history = history
+        self.version = next(_versions)
+        self._search_index: Optional[DepartmentSearchIndex] = None
+        self._hierarchy: Optional[HierarchyIndex] = None
+        self._correlation_owners: Optional[np.ndarray] = None
+        self._rankings: Optional[RankingIndex] = None
+        self._simulator: Optional[Simulator] = None
+        self._rules: Optional[RuleEngine] = None
+        self._scopes: Optional[ScopeIndex] = None
+        self._lazy_lock = threading.RLock()
+        self._update_lock = threading.Lock()
+        self._correlation_lock = threading.Lock()
+        self._correlation_table: Optional[CorrelationTable] = None
+
+    # ------------------------------------------------------------------ 惰性物化
+    @property
+    def org_tree(self) -> dict:
+        """整棵组织树（每次由列式存储新生成，不常驻内存；接口响应由 app 的响应缓存按版本缓存）。"""
+        return self.org_store.materialize()
+
+    @property
+    def search_index(self) -> DepartmentSearchIndex:
+        if self._search_index is None:
+            with self._lazy_lock:
+                if self._search_index is None:
+                    store = self.org_store
+                    self._search_index = DepartmentSearchIndex.from_entries(
+                        (dept_id, store.name(row), store.leader(row)) for row, dept_id in enumerate(store.ids)
+                    )
+        return self._search_index
+
+    @property
+    def hierarchy(self) -> HierarchyIndex:
+        if self._hierarchy is None:
+            with self._lazy_lock:
+                if self._hierarchy is None:
+                    self._hierarchy = HierarchyIndex(self.org_store)
+        return self._hierarchy
+
+    @property
+    def rankings(self) -> RankingIndex:
+        if self._rankings is None:
+            with self._lazy_lock:
+                if self._rankings is None:
+                    self._rankings = RankingIndex(self.org_store, self.hierarchy)
+        return self._rankings
+
+    @property
+    def simulator(self) -> Simulator:
+        if self._simulator is None:
+            with self._lazy_lock:
+                if self._simulator is None:
+                    self._simulator = Simulator(self)
+        return self._simulator
+
+    @property
+    def scopes(self) -> ScopeIndex:
+        if self._scopes is None:
+            with self._lazy_lock:
+                if self._scopes is None:
+                    self._scopes = ScopeIndex(self.org_store, self.hierarchy)
+        return self._scopes
+
+    @property
+    def rules(self) -> RuleEngine:
+        if self._rules is None:
+            with self._lazy_lock:
+                if self._rules is None:
+                    self._rules = RuleEngine(self.org_store, self.history)
+        return self._rules
+
+    def _apply_rules(self, rows: Optional[np.ndarray] = None) -> None:
+        """
+        按规则（重新）判定 rows（缺省为全部部门）的状态，写回列式存储
+        （detail 中的达成率在读取时按当前值计算，无需改写）。
+        """
+        self.rules.evaluate(rows)
+
+    @property
+    def root_id(self) -> str:
+        return self.org_store.ids[0]
+
+    def node(self, dept_id: str) -> Optional[dict]:
+        """以该部门为根的子树（由列式存储生成）。"""
+        row = self.org_store.index.get(dept_id)
+        return self.org_store.materialize(row) if row is not None else None
+
+    def node_delta(self, dept_id: str) -> dict:
+        """增量推送用的节点数值字段（不含名称、detail 等不随汇总变化的内容）。"""
+        store = self.org_store
+        row = store.index[dept_id]
+        return {
+            "id": dept_id,
+            "headcount": int(store.headcount[row]),
+            "value": float(store.value[row]),
+            "status": store.status(row),
+            "metrics": store.metric_list(row),
+        }
+
+    def detail(self, dept_id: str) -> Optional[dict]:
+        row = self.org_store.index.get(dept_id)
+        if row is None:
+            raise KeyError(dept_id)
+        return self.org_store.detail(row)
+
+    def update_department(
+        self,
+        dept_id: str,
+        headcount: int | None = None,
+        metrics: Dict[str, float] | None = None,
+        name: str | None = None,
+        leader: str | None = None,
+    ) -> List[str]:
+        """
+        更新叶子部门的人数/指标（在列式存储上沿祖先路径重算汇总），或任意部门的名称/负责人
+        （增量更新检索索引；负责人变化时负责人视图的范围索引重建），返回发生变化的节点 id。
+        """
+        store = self.org_store
+        row = store.index.get(dept_id)
+        if row is None:
+            raise KeyError(dept_id)
+        with self._update_lock:
+            rows = [row]
+            if headcount is not None or metrics or (name is None and leader is None):
+                with stage("aggregate"):
+                    rows = store.update_leaf(row, headcount=headcount, metrics=metrics)
+                if rows[-1] == 0:
+                    self._reconcile_root()
+                self._apply_rules(np.asarray(rows, dtype=np.int64))
+                if self._rankings is not None:
+                    self._rankings.refresh(rows)
+            if name is not None or leader is not None:
+                store.rename(row, name=name, leader=leader)
+                if self._search_index is not None:
+                    self._search_index.update(dept_id, store.name(row), store.leader(row))
+                if leader is not None:
+                    self._scopes = None
+            self.version = next(_versions)
+        return [store.ids[r] for r in rows]
+
+    def _reconcile_root(self) -> None:
+        """根部门的人效展示值以总览卡片为准（同 reconcile_root_metric），汇总值由 OrgStore.rollup 随时可得。"""
+        card = next((m for m in self.summary_metrics if m.id == PRIMARY_METRIC), None)
+        if card is None:
+            return
+        store = self.org_store
+        store.value[0] = card.value
+        col = store.metric_col.get(PRIMARY_METRIC)
+        if col is not None:
+            store.metrics[0, col] = card.value
+
+    def warm(self) -> None:
+        """提前构建惰性派生数据（多进程部署时在 fork 前调用，使其由各 worker 共享）。"""
+        self.correlation_table()
+
+    def write_snapshot(self, path: str) -> int:
+        return write_snapshot(
+            path,
+            self.summary_metrics,
+            self.correlation_data,
+            self.org_store,
+            driver_series=self.driver_series,
+            correlation_table=self.correlation_table(),
+            history=self.history,
+        )
+
+    def correlation_table(self) -> Optional[CorrelationTable]:
+        """全部门 × 驱动指标的相关系数矩阵，每份快照只计算一次（快照文件中已有则直接使用）。"""
+        if self._correlation_table is not None:
+            return self._correlation_table
+        if self.driver_series is None:
+            return None
+        with self._correlation_lock:
+            if self._correlation_table is None:
+                self._correlation_table = compute_correlations(self.driver_series)
+            return self._correlation_table
+
+    @property
+    def correlation_owners(self) -> np.ndarray:
+        """
+        每行部门的关联指标配置归属行（自身或最近的配置了条目的祖先，-1 表示回落到根配置）。
+        自顶向下逐层继承父节点的归属，每份快照计算一次；correlation_data 只随整份快照替换而变化。
+        """
+        if self._correlation_owners is None:
+            with self._lazy_lock:
+                if self._correlation_owners is None:
+                    store = self.org_store
+                    owners = np.full(len(store), -1, dtype=np.int64)
+                    for dept_id in self.correlation_data:
+                        row = store.index.get(dept_id)
+                        if row is not None:
+                            owners[row] = row
+                    for rows in store.levels[1:]:
+                        missing = rows[owners[rows] < 0]
+                        owners[missing] = owners[store.parent[missing]]
+                    self._correlation_owners = owners
+        return self._correlation_owners
+
+    def correlation_owner(self, dept_id: str) -> Optional[str]:
+        row = self.org_store.index.get(dept_id)
+        owner = int(self.correlation_owners[row]) if row is not None else -1
+        return self.org_store.ids[owner] if owner >= 0 else None
+
+    def inherited_correlations(self, dept_id: str) -> List[dict]:
+        if dept_id in self.correlation_data:
+            return self.correlation_data[dept_id]
+        owner = self.correlation_owner(dept_id)
+        if owner is not None:
+            return self.correlation_data[owner]
+        return self.correlation_data.get(self.root_id, self.correlation_data.get("hq", []))
+
+    def find_correlations(self, dept_id: str) -> List[dict]:
+        entries = self.inherited_correlations(dept_id)
+        table = self.correlation_table()
+        if table is not None and dept_id in table:
+            computed = table.for_dept(dept_id, entries)
+            if computed:
+                return computed
+        return entries
+
+    def find_correlations_batch(self, dept_ids: Sequence[str]) -> Dict[str, List[dict]]:
+        return {dept_id: self.find_correlations(dept_id) for dept_id in dict.fromkeys(dept_ids)}
+
+
+def seed_dataset() -> Dataset:
+    """内置演示数据构成的快照（未配置导入文件 / 快照文件时使用）。"""
+    summary_metrics, org_tree, correlation_data = load_seed()
+    return Dataset(summary_metrics, org_tree, correlation_data, history=seed_history(org_tree, summary_metrics))
@@ -0,0 +1,54 @@
+"""
+生产模式 gunicorn 配置：`gunicorn -c gunicorn.conf.py app:app`（start.sh prod 使用）。
+
+preload_app 让 master 进程只导入一次 app（构建组织树汇总、列式存储、检索索引），
+再 fork 出各 worker，数据快照通过写时复制（copy-on-write）在进程间共享。
+fork 前预先算好按需构建的派生数据（相关系数矩阵），再 gc.freeze() 把已有对象移出 GC 跟踪，
+避免 worker 中的 GC 扫描触碰对象头、把共享内存页逐步复制成私有页。
+
+默认使用 gevent worker：/api/stream（SSE）的每个长连接只占一个协程而不是一个线程，
+单个 worker 可同时保持 worker_connections 个连接。gevent 没有抢占，CPU 密集的请求会让同一 worker 上的
+其他连接（含 SSE 心跳）等待至其结束；需要时可用 GUNICORN_WORKER_CLASS=gthread 换回线程 worker
+（此时每个 SSE 连接占用一个线程，连接数上限为 workers × threads）。
+gevent worker 在 fork 之后才打 monkey patch：master 中的 preload（含 recompute 的多进程分片重算）
+不受影响；fork 前创建、可能被长时间等待的同步原语（SSE 的 ChangeFeed）在各 worker 中按需新建。
+
+部门修改（PATCH）经共享的变更日志（change_feed.ChangeLog）在各 worker 上按同一顺序重放，
+SSE 客户端连到任意 worker 都能收到全部 delta。/api/admin/reload 只作用于处理该请求的 worker
+（其他 worker 只收到 reset 事件）；多 worker 下刷新数据请替换导入文件后重启服务（start.sh prod）。
+/api/admin/periods 存档的期写入 HR_PERIOD_DIR（缺省为 master 的临时目录），其他 worker 在下一个
+涉及 period 的请求中从文件载入，各 worker 上的 ?period= 与 /api/periods/diff 一致。
+"""
+from __future__ import annotations
+
+import gc
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '127.0.0.1')}:{os.getenv('PORT', os.getenv('FLASK_RUN_PORT', '5001'))}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+# gevent：每个 worker 的并发连接数；gthread：每个 worker 的线程数
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+# 定期轮换 worker，限制长期运行后的内存碎片；jitter 避免所有 worker 同时重启
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def when_ready(server):
+    # preload 后快照已在 master 中构建完成；补齐惰性派生数据后冻结，worker 直接共享
+    from app import current_dataset
+
+    current_dataset().warm()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    server.log.info("worker %s forked with %d frozen objects", worker.pid, gc.get_freeze_count())
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Iterator, List
+
+import numpy as np
+
+from org_store import OrgStore
+
+
+class HierarchyIndex:
+    """
+    组织树的祖先/后代索引（Euler tour / 嵌套集合）。
+
+    OrgStore 按先序存放，行号即进入时间 tin，tout = tin + 子树大小 - 1：
+    「a 是否为 b 的祖先」是一次区间比较，子树成员是一段连续行区间。
+    另维护 binary lifting 跳表 up[k][v]（v 的第 2^k 个祖先），第 k 级祖先与 LCA 为 O(log depth)。
+    """
+
+    def __init__(self, store: OrgStore):
+        self.store = store
+        n = len(store)
+        size = np.ones(n, dtype=np.int64)
+        # 自底向上逐层把子树大小累加到父节点
+        for rows in reversed(store.levels[1:]):
+            np.add.at(size, store.parent[rows], size[rows])
+        self.size = size
+        self.tin = np.arange(n, dtype=np.int64)
+        self.tout = self.tin + size - 1
+        self.depth = store.depth
+
+        parent = np.where(store.parent >= 0, store.parent, np.arange(n)).astype(np.int32)
+        max_depth = int(self.depth.max(initial=0))
+        up = [parent]
+        for _ in range(max(max_depth.bit_length() - 1, 0)):
+            prev = up[-1]
+            up.append(prev[prev])
+        self.up = up
+
+    # ------------------------------------------------------------------ 判定 / 区间
+    def is_ancestor(self, a: int, b: int) -> bool:
+        """a 是否为 b 的祖先（含 a == b）。"""
+        return self.tin[a] <= self.tin[b] <= self.tout[a]
+
+    def subtree(self, row: int) -> slice:
+        """row 的子树（含自身）在先序数组中的行区间。"""
+        return slice(int(self.tin[row]), int(self.tout[row]) + 1)
+
+    def descendants(self, row: int) -> slice:
+        """row 的全部后代（不含自身）的行区间。"""
+        return slice(int(self.tin[row]) + 1, int(self.tout[row]) + 1)
+
+    # ------------------------------------------------------------------ 祖先
+    def ancestors(self, row: int) -> Iterator[int]:
+        """由近及远依次产出 row 的祖先行号（不含自身）。"""
+        parent = self.store.parent
+        row = int(parent[row])
+        while row >= 0:
+            yield row
+            row = int(parent[row])
+
+    def kth_ancestor(self, row: int, k: int) -> int:
+        """第 k 级祖先；超出根时返回 -1。"""
+        if k > self.depth[row]:
+            return -1
+        level = 0
+        while k:
+            if k & 1:
+                row = int(self.up[level][row])
+            k >>= 1
+            level += 1
+        return row
+
+    def lca(self, a: int, b: int) -> int:
+        if self.is_ancestor(a, b):
+            return a
+        if self.is_ancestor(b, a):
+            return b
+        for table in reversed(self.up):
+            candidate = int(table[a])
+            if not self.is_ancestor(candidate, b):
+                a = candidate
+        return int(self.up[0][a])
+
+    def lca_many(self, rows: List[int]) -> int:
+        """多个节点的最近公共祖先：先序下只需对 tin 最小与最大的两个节点求 LCA。"""
+        return self.lca(min(rows), max(rows))
@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aggregation import PRIMARY_METRIC
+from correlation_engine import DRIVER_META, DriverSeries
+from models import MetricDetail, MetricSummary
+from timeseries import HistoryBuilder, HistoryStore
+
+DEPARTMENT_COLUMNS = ("dept_id", "parent_id", "name", "leader", "baseline")
+MONTHLY_COLUMNS = ("dept_id", "month", "headcount", "revenue", "cost")
+HISTORY_COLUMNS = ("dept_id", "date", "metric", "value")
+DRIVER_COLUMNS = tuple(DRIVER_META)
+
+CHUNK_ROWS = 50_000
+TRAILING_MONTHS = 12
+NODE_HISTORY_POINTS = 3
+SUMMARY_HISTORY_POINTS = 12
+YUAN_PER_WAN = 10_000
+
+SUMMARY_METRIC_META = {
+    "revenue_per_cost": ("万元人力成本销售收入", "万元", "（销售收入 ÷ 人力成本） / 10000"),
+    "per_capita_sales": ("人均销售额", "万元", "销售总收入 ÷ 在岗销售人数"),
+    "per_capita_cost": ("人均人力成本", "万元", "人力成本总额 ÷ 在岗销售人数"),
+}
+
+_MONTH_RE = re.compile(r"^\s*(\d{4})[-/.年]?(\d{1,2})")
+
+
+class IngestionError(ValueError):
+    pass
+
+
+@dataclass
+class IngestResult:
+    summary_metrics: List[MetricSummary]
+    org_tree: dict
+    driver_series: Optional[DriverSeries]
+    history: Optional[HistoryStore] = None
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------- 分块读取
+def iter_chunks(
+    path: str | Path, columns: Sequence[str], optional: Sequence[str] = (), chunk_rows: int = CHUNK_ROWS
+) -> Iterator[Dict[str, list]]:
+    """
+    按列分块读取 CSV / Parquet，每块至多 chunk_rows 行，内存占用与文件大小无关。
+    Parquet 需要可选依赖 pyarrow（未列入 requirements.txt），缺失时抛 IngestionError。
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in (".parquet", ".pq"):
+        yield from _iter_parquet(path, columns, optional, chunk_rows)
+    else:
+        yield from _iter_csv(path, columns, optional, chunk_rows)
+
+
+def _select_columns(header: Sequence[str], columns: Sequence[str], optional: Sequence[str], path) -> List[str]:
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise IngestionError(f"{path}: 缺少列 {', '.join(missing)}")
+    return list(columns) + [c for c in optional if c in header]
+
+
+def _iter_csv(path, columns, optional, chunk_rows) -> Iterator[Dict[str, list]]:
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        header = [h.strip() for h in next(reader, [])]
+        wanted = _select_columns(header, columns, optional, path)
+        positions = [header.index(c) for c in wanted]
+        chunk: Dict[str, list] = {c: [] for c in wanted}
+        size = 0
+        for row in reader:
+            if not row:
+                continue
+            for col, pos in zip(wanted, positions):
+                chunk[col].append(row[pos].strip() if pos < len(row) else "")
+            size += 1
+            if size >= chunk_rows:
+                yield chunk
+                chunk = {c: [] for c in wanted}
+                size = 0
+        if size:
+            yield chunk
+
+
+def _iter_parquet(path, columns, optional, chunk_rows) -> Iterator[Dict[str, list]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # pragma: no cover - 取决于部署环境
+        raise IngestionError(f"{path}: 读取 Parquet 文件需要安装可选依赖 pyarrow（pip install pyarrow）") from exc
+    parquet = pq.ParquetFile(path)
+    wanted = _select_columns(parquet.schema_arrow.names, columns, optional, path)
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=wanted):
+        yield {c: batch.column(c).to_pylist() for c in wanted}
+
+
+def _floats(values: list, path, column: str, first_row: int = 0) -> np.ndarray:
+    """一列数值转为 float 数组，空值为 NaN；first_row 为本块首行在文件中的数据行序号（从 0 起，不含表头）。"""
+    out = np.empty(len(values), dtype=np.float64)
+    for i, v in enumerate(values):
+        if v in ("", None):
+            out[i] = np.nan
+            continue
+        try:
+            out[i] = float(v)
+        except (TypeError, ValueError):
+            raise IngestionError(f"{path}: 第 {first_row + i + 1} 行数据的 {column} 列不是数字：{v!r}") from None
+    return out
+
+
+def _month_key(value) -> int:
+    match = _MONTH_RE.match(str(value))
+    if not match:
+        raise IngestionError(f"无法解析月份：{value!r}")
+    year, month = int(match.group(1)), int(match.group(2))
+    if not 1 <= month <= 12:
+        raise IngestionError(f"无法解析月份：{value!r}")
+    return year * 12 + month - 1
+
+
+# ---------------------------------------------------------------------- 部门层级
+@dataclass
+class _Hierarchy:
+    ids: List[str]
+    names: List[str]
+    leaders: List[str]
+    baseline: np.ndarray
+    parent: np.ndarray  # 先序行号
+    levels: List[np.ndarray]
+    child_count: np.ndarray
+    index: Dict[str, int]
+
+
+def load_hierarchy(path: str | Path, chunk_rows: int = CHUNK_ROWS) -> _Hierarchy:
+    raw_ids: List[str] = []
+    raw_parent: List[str] = []
+    raw_names: List[str] = []
+    raw_leaders: List[str] = []
+    raw_baseline: List[float] = []
+    for chunk in iter_chunks(path, DEPARTMENT_COLUMNS, chunk_rows=chunk_rows):
+        first_row = len(raw_ids)
+        raw_ids.extend(str(v) for v in chunk["dept_id"])
+        raw_parent.extend("" if v is None else str(v) for v in chunk["parent_id"])
+        raw_names.extend(str(v) for v in chunk["name"])
+        raw_leaders.extend("" if v is None else str(v) for v in chunk["leader"])
+        raw_baseline.extend(_floats(chunk["baseline"], path, "baseline", first_row).tolist())
+
+    position = {dept_id: i for i, dept_id in enumerate(raw_ids)}
+    if len(position) != len(raw_ids):
+        raise IngestionError(f"{path}: dept_id 存在重复")
+    roots = [i for i, p in enumerate(raw_parent) if not p]
+    if len(roots) != 1:
+        raise IngestionError(f"{path}: 需要且只能有一个根部门（parent_id 为空），实际 {len(roots)} 个")
+    children: Dict[int, List[int]] = {}
+    for i, p in enumerate(raw_parent):
+        if p:
+            if p not in position:
+                raise IngestionError(f"{path}: 部门 {raw_ids[i]} 的上级 {p} 不存在")
+            children.setdefault(position[p], []).append(i)
+
+    # 先序重排：子树在数组中连续，兄弟顺序保持文件顺序
+    order: List[int] = []
+    parent_rows: List[int] = []
+    stack: List[Tuple[int, int]] = [(roots[0], -1)]
+    while stack:
+        raw, parent_row = stack.pop()
+        parent_rows.append(parent_row)
+        row = len(order)
+        order.append(raw)
+        for child in reversed(children.get(raw, [])):
+            stack.append((child, row))
+    if len(order) != len(raw_ids):
+        raise IngestionError(f"{path}: {len(raw_ids) - len(order)} 个部门无法从根部门到达（可能存在环）")
+
+    parent = np.asarray(parent_rows, dtype=np.int32)
+    depth = np.zeros(len(order), dtype=np.int32)
+    for row in range(1, len(order)):
+        depth[row] = depth[parent[row]] + 1
+    by_depth = np.argsort(depth, kind="stable")
+    levels = np.split(by_depth, np.cumsum(np.bincount(depth))[:-1])
+    ids = [raw_ids[i] for i in order]
+    return _Hierarchy(
+        ids=ids,
+        names=[raw_names[i] for i in order],
+        leaders=[raw_leaders[i] for i in order],
+        baseline=np.asarray([raw_baseline[i] for i in order], dtype=np.float64),
+        parent=parent,
+        levels=levels,
+        child_count=np.bincount(parent[1:], minlength=len(order)),
+        index={dept_id: row for row, dept_id in enumerate(ids)},
+    )
+
+
+# ---------------------------------------------------------------------- 月度明细
+class _MonthlyAccumulator:
+    """(部门 × 月) 的累加矩阵，月份列按出现动态扩容。"""
+
+    def __init__(self, num_depts: int, driver_ids: Sequence[str]):
+        self.driver_ids = list(driver_ids)
+        self.month_col: Dict[int, int] = {}
+        self._cap = 16
+        self.revenue = np.zeros((num_depts, self._cap))
+        self.cost = np.zeros((num_depts, self._cap))
+        self.headcount = np.zeros((num_depts, self._cap))
+        self.driver_sum = np.zeros((len(self.driver_ids), num_depts, self._cap))
+        self.driver_cnt = np.zeros((len(self.driver_ids), num_depts, self._cap))
+
+    def columns_for(self, keys: List[int]) -> np.ndarray:
+        for key in keys:
+            if key not in self.month_col:
+                self.month_col[key] = len(self.month_col)
+        if len(self.month_col) > self._cap:
+            grow = max(self._cap, len(self.month_col) - self._cap)
+            self._cap += grow
+            self.revenue = np.pad(self.revenue, ((0, 0), (0, grow)))
+            self.cost = np.pad(self.cost, ((0, 0), (0, grow)))
+            self.headcount = np.pad(self.headcount, ((0, 0), (0, grow)))
+            self.driver_sum = np.pad(self.driver_sum, ((0, 0), (0, 0), (0, grow)))
+            self.driver_cnt = np.pad(self.driver_cnt, ((0, 0), (0, 0), (0, grow)))
+        return np.asarray([self.month_col[key] for key in keys], dtype=np.int64)
+
+    def finish(self) -> Tuple[List[int], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """按月份排序并裁掉多余容量，返回 (月份, 收入, 成本, 人数, 驱动指标均值)。"""
+        months = sorted(self.month_col)
+        cols = np.asarray([self.month_col[m] for m in months], dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drivers = self.driver_sum[:, :, cols] / self.driver_cnt[:, :, cols]
+        return months, self.revenue[:, cols], self.cost[:, cols], self.headcount[:, cols], drivers
+
+
+def _rollup(values: np.ndarray, hierarchy: _Hierarchy) -> np.ndarray:
+    """自底向上逐层把子树数值累加到祖先（values 的第 0 维为部门）。"""
+    total = values.copy()
+    for rows in reversed(hierarchy.levels[1:]):
+        np.add.at(total, hierarchy.parent[rows], total[rows])
+    return total
+
+
+# ---------------------------------------------------------------------- 组装
+def ingest(
+    departments_path: str | Path,
+    monthly_path: str | Path,
+    history_path: str | Path | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> IngestResult:
+    """
+    流式读取 HRIS/CRM 导出（部门层级 + 部门月度人数/收入/成本，可选驱动指标列），
+    构建组织树、总览指标卡、驱动指标序列与指标历史。金额单位为元。
+    history_path 为可选的长表（dept_id,date,metric,value，日/周粒度均可），并入指标历史。
+    """
+    hierarchy = load_hierarchy(departments_path, chunk_rows=chunk_rows)
+    num_depts = len(hierarchy.ids)
+    acc: Optional[_MonthlyAccumulator] = None
+    rows_read = rows_skipped = 0
+
+    for chunk in iter_chunks(monthly_path, MONTHLY_COLUMNS, optional=DRIVER_COLUMNS, chunk_rows=chunk_rows):
+        if acc is None:
+            acc = _MonthlyAccumulator(num_depts, [c for c in DRIVER_COLUMNS if c in chunk])
+        size = len(chunk["dept_id"])
+        first_row = rows_read
+        rows_read += size
+        dept_rows = np.asarray([hierarchy.index.get(str(d), -1) for d in chunk["dept_id"]], dtype=np.int64)
+        known = dept_rows >= 0
+        rows_skipped += int((~known).sum())
+        if not known.any():
+            continue
+        month_keys = [_month_key(m) for m, ok in zip(chunk["month"], known) if ok]
+        cols = acc.columns_for(month_keys)
+        dept_rows = dept_rows[known]
+        for column, target in (("revenue", acc.revenue), ("cost", acc.cost), ("headcount", acc.headcount)):
+            values = _floats(chunk[column], monthly_path, column, first_row)
+            np.add.at(target, (dept_rows, cols), np.nan_to_num(values[known]))
+        for k, driver_id in enumerate(acc.driver_ids):
+            values = _floats(chunk[driver_id], monthly_path, driver_id, first_row)[known]
+            valid = np.isfinite(values)
+            np.add.at(acc.driver_sum[k], (dept_rows[valid], cols[valid]), values[valid])
+            np.add.at(acc.driver_cnt[k], (dept_rows[valid], cols[valid]), 1.0)
+
+    if acc is None or not acc.month_col:
+        raise IngestionError(f"{monthly_path}: 没有可用的月度数据")
+    months, revenue, cost, headcount, drivers = acc.finish()
+
+    sub_revenue = _rollup(revenue, hierarchy)
+    sub_cost = _rollup(cost, hierarchy)
+    sub_headcount = _rollup(headcount, hierarchy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly_rpc = np.where(sub_cost > 0, sub_revenue / sub_cost, np.nan)
+
+    org_tree = _build_tree(hierarchy, months, revenue, cost, headcount, sub_revenue, sub_cost, monthly_rpc)
+    summary_metrics = _build_summary(hierarchy, months, sub_revenue[0], sub_cost[0], sub_headcount[0])
+    driver_series = None
+    if acc.driver_ids:
+        # 非叶子部门的驱动指标取子树按人数加权的均值
+        weights = np.where(np.isfinite(drivers), headcount[None, :, :], 0.0)
+        weighted = _rollup(np.moveaxis(np.nan_to_num(drivers) * weights, 0, 1), hierarchy)
+        weight_sum = _rollup(np.moveaxis(weights, 0, 1), hierarchy)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            driver_values = np.moveaxis(np.where(weight_sum > 0, weighted / weight_sum, np.nan), 1, 0)
+        driver_series = DriverSeries(
+            dept_ids=list(hierarchy.ids),
+            periods=[_month_label(m) for m in months],
+            target=monthly_rpc,
+            driver_ids=list(acc.driver_ids),
+            drivers=driver_values,
+        )
+
+    # 历史长表中出现的（部门, 指标）以长表为准，其余由月度数据派生
+    history = HistoryBuilder()
+    history_rows = _load_history(history_path, hierarchy, history, chunk_rows) if history_path else 0
+    supplied = set(history.keys())
+    month_days = _month_days(months)
+    derived = {PRIMARY_METRIC: monthly_rpc}
+    if driver_series is not None:
+        derived.update(zip(driver_series.driver_ids, driver_series.drivers))
+    for metric_id, matrix in derived.items():
+        covered = [row for row, dept_id in enumerate(hierarchy.ids) if (dept_id, metric_id) in supplied]
+        if covered:
+            matrix = matrix.copy()
+            matrix[covered] = np.nan
+        history.add_dense(hierarchy.ids, metric_id, month_days, matrix)
+
+    stats = {
+        "departments": num_depts,
+        "months": len(months),
+        "rowsRead": rows_read,
+        "rowsSkipped": rows_skipped,
+        "historyRows": history_rows,
+    }
+    return IngestResult(
+        summary_metrics=summary_metrics,
+        org_tree=org_tree,
+        driver_series=driver_series,
+        history=history.build(),
+        stats=stats,
+    )
+
+
+def _month_days(months: Sequence[int]) -> np.ndarray:
+    """月份键（year * 12 + month - 1）→ 当月 1 日自 1970-01-01 起的天数。"""
+    keys = np.asarray(months, dtype=np.int64) - 1970 * 12
+    return keys.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def _load_history(path: str | Path, hierarchy: _Hierarchy, builder: HistoryBuilder, chunk_rows: int) -> int:
+    rows = rows_seen = 0
+    for chunk in iter_chunks(path, HISTORY_COLUMNS, chunk_rows=chunk_rows):
+        dept_ids = [str(d) for d in chunk["dept_id"]]
+        known = np.fromiter((d in hierarchy.index for d in dept_ids), dtype=bool, count=len(dept_ids))
+        try:
+            days = np.array([str(d).strip() for d in chunk["date"]], dtype="datetime64[D]").astype(np.int64)
+        except ValueError as exc:
+            raise IngestionError(f"{path}: 无法解析日期（{exc}）") from exc
+        values = _floats(chunk["value"], path, "value", rows_seen)
+        rows_seen += len(dept_ids)
+        builder.add(
+            (d for d, ok in zip(dept_ids, known) if ok),
+            (str(m) for m, ok in zip(chunk["metric"], known) if ok),
+            days[known],
+            values[known],
+        )
+        rows += int(known.sum())
+    return rows
+
+
+def _month_label(key: int) -> str:
+    return f"{key // 12}-{key % 12 + 1:02d}"
+
+
+def _short_label(key: int) -> str:
+    return f"{key % 12 + 1}月"
+
+
+def _build_tree(hierarchy, months, revenue, cost, headcount, sub_revenue, sub_cost, monthly_rpc) -> dict:
+    """
+    组装未汇总的组织树：只填叶子部门的人数与指标。非叶子部门的人数与展示值由共用的汇总引擎
+    （OrgAggregator，在 Dataset / recompute.build_dataset 中）按子部门人效 × 人数加权得出，
+    状态由规则引擎判定，达成率与 statusSummary 在读取时生成；
+    子树内没有人效指标的部门保留这里按收入 / 成本算出的值。
+    """
+    window = slice(-TRAILING_MONTHS, None)
+    nodes: List[dict] = []
+    for row, dept_id in enumerate(hierarchy.ids):
+        baseline = float(hierarchy.baseline[row]) if np.isfinite(hierarchy.baseline[row]) else 0.0
+        rev_total = float(sub_revenue[row, window].sum())
+        cost_total = float(sub_cost[row, window].sum())
+        value = round(rev_total / cost_total, 2) if cost_total else 0.0
+        history = [
+            {"label": _short_label(m), "value": round(float(v), 2)}
+            for m, v in zip(months[-NODE_HISTORY_POINTS:], monthly_rpc[row, -NODE_HISTORY_POINTS:])
+            if np.isfinite(v)
+        ]
+        node = {
+            "id": dept_id,
+            "name": hierarchy.names[row],
+            "leader": hierarchy.leaders[row],
+            "headcount": 0,
+            "baseline": baseline,
+            "value": value,
+            "metrics": [],
+            "detail": {
+                "rule": f"人效 = 销售收入 / 人力成本（{hierarchy.names[row]}）",
+                "baseline": baseline,
+                "history": history,
+            },
+        }
+        if hierarchy.child_count[row] == 0:
+            hc_months = headcount[row, window]
+            staffed = hc_months[hc_months > 0]
+            avg_hc = float(staffed.mean()) if staffed.size else 0.0
+            leaf_rev = float(revenue[row, window].sum())
+            leaf_cost = float(cost[row, window].sum())
+            node["headcount"] = int(round(float(headcount[row, -1])))
+            if leaf_cost and avg_hc:
+                node["metrics"] = [
+                    _metric("revenue_per_cost", leaf_rev / leaf_cost),
+                    _metric("per_capita_sales", leaf_rev / avg_hc / YUAN_PER_WAN),
+                    _metric("per_capita_cost", leaf_cost / avg_hc / YUAN_PER_WAN),
+                ]
+        nodes.append(node)
+
+    for row in range(len(nodes) - 1, 0, -1):
+        parent = nodes[hierarchy.parent[row]]
+        parent.setdefault("children", []).append(nodes[row])
+    for node in nodes:
+        if "children" in node:
+            node["children"].reverse()
+
+    return nodes[0]
+
+
+def _metric(metric_id: str, value: float) -> dict:
+    name, unit, _ = SUMMARY_METRIC_META[metric_id]
+    return {"id": metric_id, "name": name, "value": round(value, 2), "unit": unit}
+
+
+def _build_summary(hierarchy, months, revenue, cost, headcount) -> List[MetricSummary]:
+    """由根部门（全公司）的月度合计生成总览指标卡，同比取上一个滚动窗口。"""
+
+    def window_values(sl: slice) -> Optional[Dict[str, float]]:
+        rev, cst, hc = revenue[sl], cost[sl], headcount[sl]
+        staffed = hc[hc > 0]
+        if not rev.size or not cst.sum() or not staffed.size:
+            return None
+        avg_hc = float(staffed.mean())
+        return {
+            "revenue_per_cost": float(rev.sum() / cst.sum()),
+            "per_capita_sales": float(rev.sum() / avg_hc / YUAN_PER_WAN),
+            "per_capita_cost": float(cst.sum() / avg_hc / YUAN_PER_WAN),
+        }
+
+    current = window_values(slice(-TRAILING_MONTHS, None)) or {k: 0.0 for k in SUMMARY_METRIC_META}
+    previous = window_values(slice(-2 * TRAILING_MONTHS, -TRAILING_MONTHS)) if len(months) > TRAILING_MONTHS else None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly = {
+            "revenue_per_cost": np.where(cost > 0, revenue / cost, np.nan),
+            "per_capita_sales": np.where(headcount > 0, revenue * 12 / headcount / YUAN_PER_WAN, np.nan),
+            "per_capita_cost": np.where(headcount > 0, cost * 12 / headcount / YUAN_PER_WAN, np.nan),
+        }
+
+    root_baseline = float(hierarchy.baseline[0]) if np.isfinite(hierarchy.baseline[0]) else 0.0
+    summary: List[MetricSummary] = []
+    for metric_id, (name, unit, rule) in SUMMARY_METRIC_META.items():
+        value = round(current[metric_id], 2)
+        prev = previous[metric_id] if previous else None
+        baseline = root_baseline if metric_id == "revenue_per_cost" and root_baseline else round(prev or value, 2)
+        series = monthly[metric_id]
+        history = [
+            {"label": _short_label(m), "value": round(float(v), 2)}
+            for m, v in zip(months[-SUMMARY_HISTORY_POINTS:], series[-SUMMARY_HISTORY_POINTS:])
+            if np.isfinite(v)
+        ]
+        tail = [h["value"] for h in history[-3:]]
+        trend = "flat"
+        if len(tail) >= 2 and tail[-1] > tail[0]:
+            trend = "up"
+        elif len(tail) >= 2 and tail[-1] < tail[0]:
+            trend = "down"
+        summary.append(
+            MetricSummary(
+                id=metric_id,
+                name=name,
+                value=value,
+                unit=unit,
+                yoy=round(value / prev - 1, 3) if prev else 0.0,
+                trend=trend,
+                detail=MetricDetail(
+                    rule=rule,
+                    baseline=baseline,
+                    attainment=round(value / baseline, 2) if baseline else 0.0,
+                    history=history,
+                ),
+            )
+        )
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="校验并汇总 HRIS/CRM 导出文件（CSV / Parquet）")
+    parser.add_argument("departments", help="部门层级文件：dept_id,parent_id,name,leader,baseline")
+    parser.add_argument("monthly", help="部门月度文件：dept_id,month,headcount,revenue,cost[,驱动指标列]")
+    parser.add_argument("--history", help="指标历史长表：dept_id,date,metric,value")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    result = ingest(args.departments, args.monthly, history_path=args.history, chunk_rows=args.chunk_rows)
+    print(result.stats)
+    for metric in result.summary_metrics:
+        print(f"{metric.name}: {metric.value}{metric.unit} (yoy {metric.yoy:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
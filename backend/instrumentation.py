@@ -0,0 +1,209 @@
+"""
+进程内的请求 / 热点阶段指标，以 Prometheus 文本格式输出（GET /metrics）。
+
+- 请求级：各端点的耗时直方图、响应体大小直方图、按状态码计数；
+- 阶段级：stage("tree_walk" / "serialize" / "index_lookup" / "aggregate") 包裹的内部步骤耗时；
+- 响应缓存：各端点的命中 / 未命中计数。
+
+指标只在本进程内累计；gunicorn 多 worker 部署时每个 worker 各自计数，
+抓取到的是处理该次 /metrics 请求的 worker 的数值。
+"""
+from __future__ import annotations
+
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 秒；覆盖缓存命中（亚毫秒）到大树全量序列化（秒级）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 字节
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """固定桶的直方图；每个标签组合只保存各桶计数与总和，observe 为 O(log 桶数)。"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}  # [各桶计数..., +Inf 计数, 总和]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[object] = []
+        # 抓取时才取值的量（缓存条目数、数据版本等），返回 [(标签字典, 数值)]
+        self._gauges: List[Tuple[str, str, Callable[[], List[Tuple[Dict[str, str], float]]]]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, collect: Callable[[], List[Tuple[Dict[str, str], float]]]) -> None:
+        self._gauges.append((name, help, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help, collect in self._gauges:
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} gauge"])
+            for labels, value in collect():
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+request_latency = registry.histogram(
+    "hr_http_request_duration_seconds", "Request latency by endpoint.", ("endpoint", "method")
+)
+response_size = registry.histogram(
+    "hr_http_response_size_bytes", "Response body size by endpoint.", ("endpoint",), buckets=SIZE_BUCKETS
+)
+requests_total = registry.counter("hr_http_requests_total", "Requests by endpoint and status.", ("endpoint", "method", "status"))
+stage_latency = registry.histogram("hr_stage_duration_seconds", "Internal hot-path stage latency.", ("stage", "endpoint"))
+cache_lookups = registry.counter("hr_response_cache_lookups_total", "Response cache lookups by endpoint.", ("endpoint", "result"))
+
+_local = threading.local()
+
+
+def current_endpoint() -> str:
+    return getattr(_local, "endpoint", "") or "-"
+
+
+def set_endpoint(endpoint: Optional[str]) -> None:
+    """记录当前线程正在处理的端点，阶段指标以此归属；请求结束时传 None 清除。"""
+    _local.endpoint = endpoint
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """记录一段内部步骤的耗时（按当前端点区分；请求之外的调用记在 endpoint="-" 下）。"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(time.perf_counter() - start, name, current_endpoint())
+
+
+class RequestProfiler:
+    """
+    按请求开启的 cProfile：结果写入 output_dir/<端点>-<时间戳>.prof（可用 snakeviz / pstats 查看），
+    同时返回按累计耗时排序的前 top 行文本摘要。cProfile 同一时刻只能有一个实例生效，
+    并发的第二个 profile 请求直接跳过（start 返回 None）。
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, top: int = 30):
+        self.output_dir = output_dir or os.path.join(tempfile.gettempdir(), "hr-profiles")
+        self.top = top
+        self._busy = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # 其他分析器（调试器等）已占用
+            self._busy.release()
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, endpoint: str) -> Tuple[str, str]:
+        """停止采集，返回 (.prof 文件路径, 文本摘要)。"""
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{endpoint or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 1_000_000:06d}.prof")
+        profile.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+        return path, out.getvalue()
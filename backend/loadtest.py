@@ -0,0 +1,375 @@
+"""
+端到端负载测试：在本机启动后端，按仪表盘的真实流量组合以 N 个并发客户端回放，
+输出各端点的吞吐、p50/p95/p99 延迟与错误率，并与 SLO 阈值比较。
+
+    python loadtest.py --clients 20 --duration 30                        # 启动 app.py 开发服务器后压测
+    python loadtest.py --server gunicorn --clients 50 --duration 60      # gunicorn.conf.py（多 worker）
+    python loadtest.py --snapshot org.snap --clients 20                  # 指定快照文件（HR_SNAPSHOT_FILE）
+    python loadtest.py --url http://127.0.0.1:5001 --clients 10          # 压测已在本机运行的服务
+    python loadtest.py --mix mix.json --slo slo.json --output report.json  # 未达 SLO 时退出码为 1
+
+每个虚拟客户端循环执行「会话」：
+1. 启动：与 App.tsx 相同，先后加载 /api/summary 与 /api/org；
+2. 若干轮交互，每轮按权重选择：连续点选几个部门（/api/correlations），
+   或在搜索框逐字输入某个部门名称（每个按键一次 /api/search）；轮与轮之间有思考时间。
+只允许压测本机地址；请求带 Accept-Encoding: gzip（与浏览器一致），响应体只读取不解析。
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+ENDPOINTS = ("summary", "org", "correlations", "search")
+
+# 流量组合：每个会话的交互轮数、各类交互的权重、一轮点选的部门数、按键间隔与思考时间（毫秒）
+DEFAULT_MIX = {
+    "rounds": 6,
+    "weights": {"correlations": 0.6, "search": 0.4},
+    "burst": [2, 6],
+    "keystrokeMs": 120,
+    "thinkMs": [300, 1500],
+}
+
+# SLO：各端点的延迟分位数上限（毫秒）与错误率上限；"*" 为未单独列出的端点及总体的默认值
+DEFAULT_SLO = {
+    "*": {"p95_ms": 300, "p99_ms": 1000, "error_rate": 0.01},
+    "summary": {"p95_ms": 100, "p99_ms": 300},
+    "org": {"p95_ms": 1500, "p99_ms": 3000},
+    "correlations": {"p95_ms": 150, "p99_ms": 500},
+    "search": {"p95_ms": 100, "p99_ms": 300},
+}
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    started: float
+    latency: float
+    status: int  # 0 表示连接错误 / 超时
+    size: int
+
+
+@dataclass
+class Catalog:
+    """压测开始前取一次组织树，得到可点选的部门 id 与可输入的部门名称。"""
+
+    dept_ids: List[str]
+    names: List[str]
+
+
+@dataclass
+class Recorder:
+    samples: List[Sample] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, sample: Sample) -> None:
+        with self.lock:
+            self.samples.append(sample)
+
+
+# ---------------------------------------------------------------------- 服务进程
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind: str, port: int, snapshot: Optional[str], log_path: str) -> subprocess.Popen:
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port))
+    if snapshot:
+        env["HR_SNAPSHOT_FILE"] = os.path.abspath(snapshot)
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        cmd = [sys.executable, "app.py"]
+        env["FLASK_DEBUG"] = "0"
+    log = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(host: str, port: int, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"backend exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/api/summary")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"backend not ready on {host}:{port} after {timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# ---------------------------------------------------------------------- 流量回放
+def load_catalog(host: str, port: int) -> Catalog:
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+    conn.request("GET", "/api/org", headers={"Accept-Encoding": "gzip"})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"GET /api/org -> {response.status}")
+    if response.getheader("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    dept_ids: List[str] = []
+    names: List[str] = []
+    stack = [json.loads(body)["tree"]]
+    while stack:
+        node = stack.pop()
+        dept_ids.append(node["id"])
+        if node.get("name"):
+            names.append(node["name"])
+        stack.extend(node.get("children") or [])
+    return Catalog(dept_ids, names)
+
+
+class Client(threading.Thread):
+    """一个虚拟用户：单个 keep-alive 连接，按流量组合循环执行会话，直到 stop_at。"""
+
+    def __init__(self, index: int, host: str, port: int, catalog: Catalog, mix: dict, recorder: Recorder,
+                 stop_at: float, record_from: float, seed: int):
+        super().__init__(name=f"loadtest-client-{index}", daemon=True)
+        self.host, self.port = host, port
+        self.catalog = catalog
+        self.mix = mix
+        self.recorder = recorder
+        self.stop_at = stop_at
+        self.record_from = record_from
+        self.rng = random.Random(seed * 1000 + index)
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def get(self, endpoint: str, path: str) -> None:
+        if time.monotonic() >= self.stop_at:
+            return
+        started = time.monotonic()
+        status, size = 0, 0
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            response = self.conn.getresponse()
+            size = len(response.read())
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+        latency = time.monotonic() - started
+        if started >= self.record_from:
+            self.recorder.add(Sample(endpoint, started, latency, status, size))
+
+    def pause(self, ms: float) -> None:
+        time.sleep(max(0.0, min(ms / 1000, self.stop_at - time.monotonic())))
+
+    def session(self) -> None:
+        mix, rng = self.mix, self.rng
+        self.get("summary", "/api/summary")
+        self.get("org", "/api/org")
+        kinds = list(mix["weights"])
+        weights = [mix["weights"][k] for k in kinds]
+        for _ in range(mix["rounds"]):
+            if time.monotonic() >= self.stop_at:
+                return
+            self.pause(rng.uniform(*mix["thinkMs"]))
+            if rng.choices(kinds, weights)[0] == "search" and self.catalog.names:
+                name = rng.choice(self.catalog.names)
+                for i in range(1, len(name) + 1):
+                    self.get("search", f"/api/search?query={quote(name[:i])}")
+                    self.pause(mix["keystrokeMs"])
+            else:
+                for _ in range(rng.randint(*mix["burst"])):
+                    dept_id = rng.choice(self.catalog.dept_ids)
+                    self.get("correlations", f"/api/correlations?deptId={quote(dept_id)}")
+                    self.pause(rng.uniform(50, 250))
+
+    def run(self) -> None:
+        # 各客户端错开启动，避免所有会话在同一时刻加载整棵树
+        self.pause(self.rng.uniform(0, 1000))
+        while time.monotonic() < self.stop_at:
+            self.session()
+        if self.conn is not None:
+            self.conn.close()
+
+
+# ---------------------------------------------------------------------- 统计与 SLO
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def summarize(samples: Sequence[Sample], elapsed: float) -> dict:
+    latencies = sorted(s.latency * 1000 for s in samples)
+    errors = sum(1 for s in samples if s.status == 0 or s.status >= 400)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "mean_bytes": round(sum(s.size for s in samples) / len(samples)) if samples else 0,
+    }
+
+
+def check_slo(report: dict, slo: dict) -> List[dict]:
+    checks = []
+    default = slo.get("*", {})
+    for endpoint, stats in [*report["endpoints"].items(), ("total", report["total"])]:
+        limits = {**default, **slo.get(endpoint, {})}
+        if endpoint == "total":
+            limits = {k: v for k, v in limits.items() if k == "error_rate"}  # 总体只看错误率，延迟按端点判定
+        if not stats["requests"]:
+            continue
+        for metric, threshold in limits.items():
+            actual = stats.get(metric)
+            if actual is None:
+                continue
+            checks.append({"endpoint": endpoint, "metric": metric, "threshold": threshold, "actual": actual, "ok": actual <= threshold})
+    return checks
+
+
+def run(host: str, port: int, clients: int, duration: float, warmup: float, mix: dict, seed: int) -> dict:
+    catalog = load_catalog(host, port)
+    recorder = Recorder()
+    started = time.monotonic()
+    record_from = started + warmup
+    stop_at = record_from + duration
+    threads = [Client(i, host, port, catalog, mix, recorder, stop_at, record_from, seed) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=max(0.0, stop_at - time.monotonic()) + 60)
+    elapsed = min(time.monotonic(), stop_at) - record_from
+
+    by_endpoint: Dict[str, List[Sample]] = {endpoint: [] for endpoint in ENDPOINTS}
+    for sample in recorder.samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "target": f"http://{host}:{port}",
+            "clients": clients,
+            "duration_s": duration,
+            "warmup_s": warmup,
+            "departments": len(catalog.dept_ids),
+            "mix": mix,
+            "seed": seed,
+        },
+        "endpoints": {endpoint: summarize(samples, elapsed) for endpoint, samples in by_endpoint.items()},
+        "total": summarize(recorder.samples, elapsed),
+    }
+
+
+def print_table(report: dict) -> None:
+    header = f"{'endpoint':<14}{'reqs':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'err%':>8}"
+    print(header, file=sys.stderr)
+    for endpoint, stats in [*report["endpoints"].items(), ("total", report["total"])]:
+        print(
+            f"{endpoint:<14}{stats['requests']:>8}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+            f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}{stats['error_rate'] * 100:>8.2f}",
+            file=sys.stderr,
+        )
+    for check in report.get("slo", []):
+        if not check["ok"]:
+            print(f"[loadtest] SLO violated {check['endpoint']} {check['metric']}: {check['actual']} > {check['threshold']}", file=sys.stderr)
+
+
+def load_json(path: Optional[str], default: dict) -> dict:
+    if not path:
+        return default
+    with open(path, encoding="utf-8") as f:
+        return {**default, **json.load(f)}
+
+
+def parse_target(url: str) -> Tuple[str, int]:
+    parts = urlsplit(url)
+    if parts.scheme != "http" or parts.hostname not in LOCAL_HOSTS:
+        raise ValueError("only http://127.0.0.1 / localhost targets are allowed")
+    return parts.hostname, parts.port or 80
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay dashboard traffic against a local backend and check SLOs")
+    parser.add_argument("--clients", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of traffic before measuring")
+    parser.add_argument("--server", choices=("dev", "gunicorn"), default="dev", help="backend to start locally")
+    parser.add_argument("--url", help="use an already running local backend instead of starting one")
+    parser.add_argument("--snapshot", help="snapshot file for the started backend (HR_SNAPSHOT_FILE)")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--mix", help="JSON file overriding the traffic mix")
+    parser.add_argument("--slo", help="JSON file overriding the SLO thresholds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-log", default="loadtest-server.log")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    mix = load_json(args.mix, DEFAULT_MIX)
+    slo = load_json(args.slo, DEFAULT_SLO)
+    process = None
+    try:
+        if args.url:
+            host, port = parse_target(args.url)
+            wait_ready(host, port, args.startup_timeout)
+        else:
+            host, port = "127.0.0.1", free_port()
+            print(f"[loadtest] starting {args.server} backend on {host}:{port} (log: {args.server_log})", file=sys.stderr)
+            process = start_server(args.server, port, args.snapshot, args.server_log)
+            wait_ready(host, port, args.startup_timeout, process)
+        print(f"[loadtest] {args.clients} clients, {args.warmup:.0f}s warmup + {args.duration:.0f}s", file=sys.stderr)
+        report = run(host, port, args.clients, args.duration, args.warmup, mix, args.seed)
+        report["meta"]["server"] = "external" if args.url else args.server
+    except (RuntimeError, ValueError) as exc:
+        print(f"[loadtest] {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    report["slo"] = check_slo(report, slo)
+    report["passed"] = all(check["ok"] for check in report["slo"])
+    encoded = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+    print_table(report)
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
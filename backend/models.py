@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class MetricDetail:
+    rule: str
+    baseline: float
+    attainment: float
+    history: List[dict]
+
+
+@dataclass
+class MetricSummary:
+    id: str
+    name: str
+    value: float
+    unit: str
+    yoy: float
+    trend: str
+    detail: MetricDetail
+
+
+CorrelationData = Dict[str, List[dict]]
@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import heapq
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aggregation import PRIMARY_METRIC
+
+
+class OrgStore:
+    """
+    列式（数组化）组织存储。
+
+    部门按先序（DFS）顺序存放在平行数组中：id→行号表、父行号数组、人数/基准/人效数组，
+    以及 (部门 × 指标) 的浮点矩阵；名称、负责人、状态存为字符串表下标，
+    detail 以紧凑 JSON 字节保存、按需解码。/api/org 的嵌套 JSON 由 materialize 按需生成。
+    因为是先序存放，任意子树都是一段连续的行区间。
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        parent: np.ndarray,
+        headcount: np.ndarray,
+        baseline: np.ndarray,
+        value: np.ndarray,
+        metrics: np.ndarray,
+        metric_ids: Sequence[str],
+        metric_meta: Dict[str, tuple],
+        strings: Sequence[str],
+        name_idx: np.ndarray,
+        leader_idx: np.ndarray,
+        status_idx: np.ndarray,
+        details: Sequence[Optional[bytes]],
+        topology: Optional[tuple] = None,
+    ):
+        self.ids = list(ids)
+        self.index: Dict[str, int] = {dept_id: i for i, dept_id in enumerate(self.ids)}
+        self.parent = parent
+        self.headcount = headcount
+        self.baseline = baseline
+        self.value = value
+        self.metrics = metrics
+        self.metric_ids = list(metric_ids)
+        self.metric_col = {mid: j for j, mid in enumerate(self.metric_ids)}
+        self.metric_meta = dict(metric_meta)
+        self.strings = list(strings)
+        self._string_idx: Optional[Dict[str, int]] = None
+        self.name_idx = name_idx
+        self.leader_idx = leader_idx
+        self.status_idx = status_idx
+        self.details = details
+        # 由规则引擎设置（alerts.RuleEngine.summary）：detail.statusSummary 按当前判定生成
+        self.summarize: Optional[Callable[[int], str]] = None
+        self._build_topology(topology)
+
+    # ------------------------------------------------------------------ 构建
+    @classmethod
+    def from_tree(cls, root: dict) -> "OrgStore":
+        ids: List[str] = []
+        parent: List[int] = []
+        headcount: List[int] = []
+        baseline: List[float] = []
+        value: List[float] = []
+        rows: List[Dict[str, float]] = []
+        name_idx: List[int] = []
+        leader_idx: List[int] = []
+        status_idx: List[int] = []
+        details: List[Optional[bytes]] = []
+        metric_ids: List[str] = []
+        metric_meta: Dict[str, tuple] = {}
+        strings: List[str] = []
+        string_idx: Dict[str, int] = {}
+
+        def intern(s: str) -> int:
+            idx = string_idx.get(s)
+            if idx is None:
+                idx = string_idx[s] = len(strings)
+                strings.append(s)
+            return idx
+
+        stack: List[tuple] = [(root, -1)]
+        while stack:
+            node, parent_row = stack.pop()
+            row = len(ids)
+            ids.append(node["id"])
+            parent.append(parent_row)
+            headcount.append(node.get("headcount", 0))
+            baseline.append(node.get("baseline", 0.0))
+            value.append(node.get("value", 0.0))
+            name_idx.append(intern(node.get("name", "")))
+            leader_idx.append(intern(node.get("leader", "")))
+            status_idx.append(intern(node.get("status", "")))
+            details.append(_encode_detail(node.get("detail")))
+            metric_row = {}
+            for m in node.get("metrics", []) or []:
+                if m["id"] not in metric_meta:
+                    metric_meta[m["id"]] = (m.get("name", m["id"]), m.get("unit", ""))
+                    metric_ids.append(m["id"])
+                metric_row[m["id"]] = m["value"]
+            rows.append(metric_row)
+            for child in reversed(node.get("children", []) or []):
+                stack.append((child, row))
+
+        matrix = np.full((len(ids), len(metric_ids)), np.nan)
+        col = {mid: j for j, mid in enumerate(metric_ids)}
+        for i, metric_row in enumerate(rows):
+            for mid, val in metric_row.items():
+                matrix[i, col[mid]] = val
+
+        return cls(
+            ids=ids,
+            parent=np.asarray(parent, dtype=np.int32),
+            headcount=np.asarray(headcount, dtype=np.int64),
+            baseline=np.asarray(baseline, dtype=np.float64),
+            value=np.asarray(value, dtype=np.float64),
+            metrics=matrix,
+            metric_ids=metric_ids,
+            metric_meta=metric_meta,
+            strings=strings,
+            name_idx=np.asarray(name_idx, dtype=np.int32),
+            leader_idx=np.asarray(leader_idx, dtype=np.int32),
+            status_idx=np.asarray(status_idx, dtype=np.int32),
+            details=details,
+        )
+
+    def _build_topology(self, topology: Optional[tuple] = None) -> None:
+        """topology 为预先算好的 (child_idx, child_ptr, depth)（来自快照文件），缺省时由 parent 推导。"""
+        n = len(self.ids)
+        if topology is not None:
+            self.child_idx, self.child_ptr, self.depth = topology
+            self.is_leaf = np.diff(self.child_ptr) == 0
+            self._build_levels()
+            return
+        # 子节点 CSR：先序下同一父节点的子节点按行号递增，即原始兄弟顺序
+        has_parent = self.parent >= 0
+        child_rows = np.nonzero(has_parent)[0]
+        order = np.argsort(self.parent[child_rows], kind="stable")
+        self.child_idx = child_rows[order].astype(np.int32)
+        counts = np.bincount(self.parent[child_rows], minlength=n) if n else np.zeros(0, dtype=np.int64)
+        self.child_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.child_ptr[1:])
+        self.is_leaf = counts == 0
+
+        depth = np.zeros(n, dtype=np.int32)
+        for i in range(1, n):
+            depth[i] = depth[self.parent[i]] + 1 if self.parent[i] >= 0 else 0
+        self.depth = depth
+        self._build_levels()
+
+    def _build_levels(self) -> None:
+        n = len(self.ids)
+        depth = self.depth
+        by_depth = np.argsort(depth, kind="stable")
+        bounds = np.cumsum(np.bincount(depth)) if n else np.zeros(0, dtype=np.int64)
+        self.levels = np.split(by_depth, bounds[:-1]) if n else []
+
+    # ------------------------------------------------------------------ 访问
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def children(self, row: int) -> np.ndarray:
+        return self.child_idx[self.child_ptr[row] : self.child_ptr[row + 1]]
+
+    def name(self, row: int) -> str:
+        return self.strings[self.name_idx[row]]
+
+    def leader(self, row: int) -> str:
+        return self.strings[self.leader_idx[row]]
+
+    def status(self, row: int) -> str:
+        return self.strings[self.status_idx[row]]
+
+    def attainment(self, row: int) -> float:
+        baseline = float(self.baseline[row])
+        return round(float(self.value[row]) / baseline, 2) if baseline > 0 else 0.0
+
+    def metric_list(self, row: int) -> List[dict]:
+        return [
+            {"id": mid, "name": self.metric_meta[mid][0], "value": val, "unit": self.metric_meta[mid][1]}
+            for mid, val in zip(self.metric_ids, self.metrics[row].tolist())
+            if val == val
+        ]
+
+    def detail(self, row: int) -> Optional[dict]:
+        raw = self.details[row]
+        if raw is None:
+            return None
+        detail = json.loads(raw)
+        # 达成率与状态说明随汇总值变化，以当前人效 / 基准与规则判定为准，不用导入时写入的值
+        detail["attainment"] = self.attainment(row)
+        if self.summarize is not None:
+            detail["statusSummary"] = self.summarize(row)
+        return detail
+
+    def intern(self, s: str) -> int:
+        if self._string_idx is None:
+            self._string_idx = {text: i for i, text in enumerate(self.strings)}
+        idx = self._string_idx.get(s)
+        if idx is None:
+            idx = self._string_idx[s] = len(self.strings)
+            self.strings.append(s)
+        return idx
+
+    def rename(self, row: int, name: Optional[str] = None, leader: Optional[str] = None) -> None:
+        if name is not None:
+            self.name_idx[row] = self.intern(name)
+        if leader is not None:
+            self.leader_idx[row] = self.intern(leader)
+
+    def nbytes(self) -> int:
+        """数组与字符串表占用的近似字节数（不含 Python 对象头）。"""
+        arrays = (self.parent, self.headcount, self.baseline, self.value, self.metrics,
+                  self.name_idx, self.leader_idx, self.status_idx, self.child_idx, self.child_ptr, self.depth)
+        total = sum(a.nbytes for a in arrays)
+        total += sum(len(s.encode("utf-8")) for s in self.strings)
+        total += sum(len(d) for d in self.details if d is not None)
+        return total
+
+    # ------------------------------------------------------------------ 增量汇总
+    def rollup(self, row: int) -> Tuple[int, List[float]]:
+        """
+        由子节点重新汇总一个非叶子部门，返回 (人数, 各指标列的值，无子节点有该指标时为 NaN)。
+        口径与 OrgAggregator 逐位一致：按子节点顺序从 0 累加「指标 × 人数」（Python 浮点），
+        人数为子节点人数和（为 0 时沿用自身人数），结果 round(…, 2)。
+        """
+        kids = self.children(row)
+        sums = [0.0] * len(self.metric_ids)
+        present = [False] * len(self.metric_ids)
+        child_headcount = 0
+        for hc, values in zip(self.headcount[kids].tolist(), self.metrics[kids].tolist()):
+            child_headcount += hc
+            for j, val in enumerate(values):
+                if val == val:  # NaN：该子节点没有这项指标
+                    sums[j] += val * hc
+                    present[j] = True
+        total_headcount = child_headcount or int(self.headcount[row])
+        values = [
+            (round(total / total_headcount, 2) if total_headcount else 0.0) if has else float("nan")
+            for total, has in zip(sums, present)
+        ]
+        return total_headcount, values
+
+    def update_leaf(
+        self, row: int, headcount: Optional[int] = None, metrics: Optional[Mapping[str, float]] = None
+    ) -> List[int]:
+        """修改叶子部门的人数 / 指标，沿祖先路径逐个由子节点重新汇总，返回数值发生变化的行（叶子在前）。"""
+        if not self.is_leaf[row]:
+            raise ValueError(f"{self.ids[row]} is not a leaf department")
+        for mid in metrics or {}:
+            if mid not in self.metric_col:
+                raise KeyError(mid)
+        before = self._numbers(row)
+        if headcount is not None:
+            self.headcount[row] = headcount
+        for mid, val in (metrics or {}).items():
+            self.metrics[row, self.metric_col[mid]] = val
+        self._sync_value(row)
+
+        changed = [row]
+        child, parent = row, int(self.parent[row])
+        while parent >= 0 and self._numbers(child) != before:
+            before = self._numbers(parent)
+            total_headcount, values = self.rollup(parent)
+            self.headcount[parent] = total_headcount
+            self.metrics[parent] = values
+            self._sync_value(parent)
+            changed.append(parent)
+            child, parent = parent, int(self.parent[parent])
+        return changed
+
+    def _numbers(self, row: int) -> tuple:
+        # NaN 按位比较，未变化的缺失指标视为相等
+        return int(self.headcount[row]), self.metrics[row].tobytes()
+
+    def _sync_value(self, row: int) -> None:
+        col = self.metric_col.get(PRIMARY_METRIC)
+        if col is not None and not np.isnan(self.metrics[row, col]):
+            self.value[row] = self.metrics[row, col]
+
+    def project(self, leaves: Mapping[int, Tuple[int, float]], metric: str = PRIMARY_METRIC) -> Dict[int, Tuple[int, float]]:
+        """
+        假设性汇总：leaves 给出若干叶子行的新（人数, 指标值），返回全部受影响行（叶子及其祖先）推演后的
+        （人数, 指标值），不修改存储。受影响的祖先按深度自底向上结算，口径与 rollup 相同，
+        多个叶子共享的祖先只结算一次。根部门给出的是汇总值（展示值以总览卡片为准，见 Simulator）。
+        """
+        col = self.metric_col.get(metric)
+        result: Dict[int, Tuple[int, float]] = {}
+        pending = set()
+        heap: List[Tuple[int, int]] = []
+
+        def current(row: int) -> Tuple[int, Optional[float]]:
+            val = float(self.metrics[row, col]) if col is not None else float("nan")
+            return int(self.headcount[row]), (val if val == val else None)
+
+        def push(row: int, new_hc: int, new_value: float, old: Tuple[int, Optional[float]]) -> None:
+            result[row] = (new_hc, new_value)
+            parent = int(self.parent[row])
+            if parent < 0 or (new_hc, new_value) == (old[0], old[1] if old[1] is not None else 0.0):
+                return
+            if parent not in pending:
+                pending.add(parent)
+                heapq.heappush(heap, (-int(self.depth[parent]), parent))
+
+        for row, (headcount, value) in leaves.items():
+            if not self.is_leaf[row]:
+                raise ValueError(f"{self.ids[row]} is not a leaf department")
+            push(row, headcount, value, current(row))
+
+        while heap:
+            _, row = heapq.heappop(heap)
+            total = 0.0
+            child_headcount = 0
+            for child in self.children(row).tolist():
+                hc, val = result[child] if child in result else current(child)
+                child_headcount += hc
+                if val is not None:
+                    total += val * hc
+            total_headcount = child_headcount or int(self.headcount[row])
+            push(row, total_headcount, round(total / total_headcount, 2) if total_headcount else 0, current(row))
+        return result
+
+    # ------------------------------------------------------------------ 计算
+    def aggregate(self) -> None:
+        """
+        向量化自底向上汇总：逐层用 np.add.at 把子节点「指标 × 人数」累加到父节点。
+        口径与 OrgAggregator 一致（子节点先四舍五入到 2 位再加权）。
+        """
+        n, m = self.metrics.shape
+        if n == 0:
+            return
+        hc = self.headcount.astype(np.float64)
+        vals = self.metrics.copy()
+        sums = np.zeros((n, m))
+        present = np.zeros((n, m), dtype=np.int64)
+        hc_sum = np.zeros(n)
+        for d in range(len(self.levels) - 1, -1, -1):
+            rows = self.levels[d]
+            internal = rows[~self.is_leaf[rows]]
+            if internal.size:
+                eff = np.where(hc_sum[internal] > 0, hc_sum[internal], hc[internal])
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    v = np.round(sums[internal] / eff[:, None], 2)
+                v[eff == 0] = 0.0
+                v[present[internal] == 0] = np.nan
+                vals[internal] = v
+                hc[internal] = eff
+            if d > 0:
+                p = self.parent[rows]
+                contrib = np.nan_to_num(vals[rows]) * hc[rows][:, None]
+                np.add.at(sums, p, contrib)
+                np.add.at(present, p, ~np.isnan(vals[rows]))
+                np.add.at(hc_sum, p, hc[rows])
+        self.headcount[:] = hc.astype(np.int64)
+        self.metrics[:] = vals
+        col = self.metric_col.get(PRIMARY_METRIC)
+        if col is not None:
+            primary = vals[:, col]
+            self.value[:] = np.where(np.isnan(primary), self.value, primary)
+
+    def top_k(self, scores: np.ndarray, k: int, ascending: bool = True, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """在给定行（默认全部）上按分数取前 k 行，NaN 不参与排名；使用 argpartition 部分选择。"""
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        candidate = scores[rows]
+        valid = ~np.isnan(candidate)
+        rows, candidate = rows[valid], candidate[valid]
+        if not ascending:
+            candidate = -candidate
+        if k < rows.size:
+            part = np.argpartition(candidate, k)[:k]
+            rows, candidate = rows[part], candidate[part]
+        return rows[np.argsort(candidate, kind="stable")]
+
+    # ------------------------------------------------------------------ 物化
+    def materialize(self, row: int = 0, depth: Optional[int] = None) -> dict:
+        """按需生成与原 org_tree 结构一致的嵌套 dict（depth 限制向下展开的层数）。"""
+        root = self._node_dict(row)
+        stack = [(root, row, 0)]
+        while stack:
+            node, r, level = stack.pop()
+            kids = self.children(r)
+            if kids.size == 0 or (depth is not None and level >= depth):
+                continue
+            node["children"] = []
+            for child in kids:
+                child_node = self._node_dict(int(child))
+                node["children"].append(child_node)
+                stack.append((child_node, int(child), level + 1))
+        return root
+
+    def records(self, rows: Iterable[int], fields: Optional[Sequence[str]] = None) -> Iterator[dict]:
+        """逐行产出扁平的部门记录（不含 children，带 parentId / depth），fields 为要保留的节点字段。"""
+        for row in rows:
+            node = self._node_dict(row)
+            parent = int(self.parent[row])
+            record = {"id": node["id"], "parentId": self.ids[parent] if parent >= 0 else None, "depth": int(self.depth[row])}
+            record.update((key, value) for key, value in node.items() if key != "id" and (fields is None or key in fields))
+            yield record
+
+    def subtree(
+        self, row: int, depth: int, fields: Sequence[str], offset: int = 0, limit: Optional[int] = None
+    ) -> dict:
+        """
+        按层数截断并投影字段的子树（/api/org?depth= 按层加载），只读取返回的行：
+        超出 depth 的节点只保留 hasChildren/childCount 桩信息（由 child_ptr 直接得到），
+        limit 限制每个节点返回的子节点数，offset 仅作用于根节点的直接子节点（用于分页）。
+        """
+
+        def stub(r: int) -> dict:
+            out = self.node_fields(r, fields)
+            count = int(self.child_ptr[r + 1] - self.child_ptr[r])
+            out["hasChildren"] = bool(count)
+            out["childCount"] = count
+            return out
+
+        result = stub(row)
+        stack = [(row, result, 0)]
+        while stack:
+            r, out, level = stack.pop()
+            if self.is_leaf[r] or level >= depth:
+                continue
+            start = offset if r == row else 0
+            end = start + limit if limit is not None else None
+            out["children"] = []
+            for child in self.children(r)[start:end].tolist():
+                child_out = stub(child)
+                out["children"].append(child_out)
+                stack.append((child, child_out, level + 1))
+        return result
+
+    def node_fields(self, row: int, fields: Iterable[str]) -> dict:
+        """只生成 fields 中的节点字段（未请求 detail 时不解码 detail JSON）。"""
+        out = {}
+        for field in fields:
+            if field == "detail":
+                detail = self.detail(row)
+                if detail is not None:
+                    out["detail"] = detail
+            else:
+                out[field] = _NODE_FIELDS[field](self, row)
+        return out
+
+    def _node_dict(self, row: int) -> dict:
+        return self.node_fields(row, (*_NODE_FIELDS, "detail"))
+
+
+_NODE_FIELDS = {
+    "id": lambda store, row: store.ids[row],
+    "name": OrgStore.name,
+    "leader": OrgStore.leader,
+    "headcount": lambda store, row: int(store.headcount[row]),
+    "status": OrgStore.status,
+    "baseline": lambda store, row: float(store.baseline[row]),
+    "value": lambda store, row: float(store.value[row]),
+    "metrics": OrgStore.metric_list,
+}
+
+
+def _encode_detail(detail: Optional[dict]) -> Optional[bytes]:
+    if detail is None:
+        return None
+    return json.dumps(detail, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,274 @@
+"""
+按月份保存的只读组织快照（/api/...?period=2026-09 与 /api/periods/diff）。
+
+各期快照的节点经 hash-consing 驻留在同一个 NodePool 中：内容相同（含整棵子树）的节点
+只保存一份，相邻月份之间未变化的子树直接共享同一个 dict，十二期快照的内存接近一期。
+共享节点会被多期同时引用，因此冻结后的节点一律只读。
+
+对比两期时，同一 id 的节点若是同一个对象，整棵子树必然相同，直接跳过，
+开销与变化的节点数（而非部门总数）成正比。
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import itertools
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from correlation_engine import CorrelationTable
+from models import CorrelationData, MetricSummary
+
+PERIOD_PATTERN = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+MAX_PERIODS = 36
+# 对比时逐项比较的节点字段（名称、负责人变化也视为变化，children 由结构对比处理）
+DIFF_FIELDS = ("name", "leader", "headcount", "value", "status", "baseline", "metrics")
+
+_period_versions = itertools.count(1)
+
+
+def _digest(value) -> bytes:
+    """规范化 JSON 的摘要：驻留池以它为键，不为每个值再保存一份完整的 JSON 字符串。"""
+    canonical = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+class NodePool:
+    """节点与字段值的驻留池：相同内容返回同一对象。"""
+
+    def __init__(self) -> None:
+        self._values: Dict[bytes, object] = {}
+        self._nodes: Dict[tuple, dict] = {}
+
+    def value(self, value):
+        if not isinstance(value, (dict, list)):
+            return value
+        key = _digest(value)
+        shared = self._values.get(key)
+        if shared is None:
+            shared = self._values[key] = copy.deepcopy(value)
+        return shared
+
+    @staticmethod
+    def _node_key(fields: dict, children: List[dict]) -> tuple:
+        items = tuple(
+            (k, "ref", id(v)) if isinstance(v, (dict, list)) else (k, type(v).__name__, v) for k, v in sorted(fields.items())
+        )
+        return items, tuple(id(child) for child in children)
+
+    def intern(self, root: dict) -> dict:
+        """返回 root 的只读驻留副本（迭代后序，子节点先于父节点驻留）。"""
+        done: Dict[int, dict] = {}
+        stack: List[Tuple[dict, bool]] = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            children = node.get("children") or []
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children)
+                continue
+            fields = {k: self.value(v) for k, v in node.items() if k != "children"}
+            shared_children = [done[id(child)] for child in children]
+            key = self._node_key(fields, shared_children)
+            shared = self._nodes.get(key)
+            if shared is None:
+                shared = dict(fields)
+                if "children" in node:
+                    shared["children"] = shared_children
+                self._nodes[key] = shared
+            done[id(node)] = shared
+        return done[id(root)]
+
+    def register(self, root: dict) -> None:
+        """把已驻留的树重新登记进（新建的）池中，不复制节点。"""
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            children = node.get("children") or []
+            stack.extend(children)
+            fields = {k: v for k, v in node.items() if k != "children"}
+            for v in fields.values():
+                if isinstance(v, (dict, list)):
+                    self._values.setdefault(_digest(v), v)
+            self._nodes.setdefault(self._node_key(fields, children), node)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+
+@dataclass
+class PeriodSnapshot:
+    period: str
+    summary_metrics: List[MetricSummary]
+    org_tree: dict
+    correlation_data: CorrelationData
+    correlation_table: Optional[CorrelationTable] = None
+    size: int = 0
+    version: int = field(default_factory=lambda: next(_period_versions))
+    _nodes: Optional[Dict[str, dict]] = field(default=None, repr=False)
+    _parent: Optional[Dict[str, Optional[str]]] = field(default=None, repr=False)
+
+    @property
+    def root_id(self) -> str:
+        return self.org_tree["id"]
+
+    def _index(self) -> None:
+        # id → 节点 / 父节点的索引只在按 id 查询时构建（列表、整树、对比均不需要）
+        nodes: Dict[str, dict] = {}
+        parent: Dict[str, Optional[str]] = {}
+        for node, parent_id in _walk(self.org_tree):
+            nodes[node["id"]] = node
+            parent[node["id"]] = parent_id
+        self._parent, self._nodes = parent, nodes
+
+    def node(self, dept_id: str) -> Optional[dict]:
+        if self._nodes is None:
+            self._index()
+        return self._nodes.get(dept_id)
+
+    def parent(self, dept_id: str) -> Optional[str]:
+        if self._parent is None:
+            self._index()
+        return self._parent.get(dept_id)
+
+    def led_by(self, dept_id: str, leader: str) -> bool:
+        """该期中部门是否在 leader 的范围内（本身或某个上级部门由其负责），口径与 scopes.ScopeIndex 一致。"""
+        owner: Optional[str] = dept_id
+        while owner is not None:
+            node = self.node(owner)
+            if node is None:
+                return False
+            if node.get("leader") == leader:
+                return True
+            owner = self.parent(owner)
+        return False
+
+    def detail(self, dept_id: str) -> Optional[dict]:
+        node = self.node(dept_id)
+        if node is None:
+            raise KeyError(dept_id)
+        return node.get("detail")
+
+    def find_correlations(self, dept_id: str) -> List[dict]:
+        """与 Dataset.find_correlations 相同的口径：沿祖先继承人工配置，有计算结果时以计算结果为准。"""
+        owner: Optional[str] = dept_id
+        while owner is not None and owner not in self.correlation_data:
+            owner = self.parent(owner)
+        if owner is not None:
+            entries = self.correlation_data[owner]
+        else:
+            entries = self.correlation_data.get(self.root_id, self.correlation_data.get("hq", []))
+        table = self.correlation_table
+        if table is not None and dept_id in table:
+            computed = table.for_dept(dept_id, entries)
+            if computed:
+                return computed
+        return entries
+
+
+def _walk(root: dict) -> Iterator[Tuple[dict, Optional[str]]]:
+    stack: List[Tuple[dict, Optional[str]]] = [(root, None)]
+    while stack:
+        node, parent_id = stack.pop()
+        yield node, parent_id
+        stack.extend((child, node["id"]) for child in reversed(node.get("children") or []))
+
+
+def _changed_fields(before: dict, after: dict) -> Dict[str, dict]:
+    return {
+        name: {"from": before.get(name), "to": after.get(name)}
+        for name in DIFF_FIELDS
+        if before.get(name) is not after.get(name) and before.get(name) != after.get(name)
+    }
+
+
+class PeriodStore:
+    """按月份保存的快照集合；超过 max_periods 时淘汰最早的一期。"""
+
+    def __init__(self, max_periods: int = MAX_PERIODS):
+        self.max_periods = max_periods
+        self._periods: Dict[str, PeriodSnapshot] = {}
+        self._pool = NodePool()
+        self._lock = threading.Lock()
+
+    def __contains__(self, period: str) -> bool:
+        return period in self._periods
+
+    def get(self, period: str) -> Optional[PeriodSnapshot]:
+        return self._periods.get(period)
+
+    def periods(self) -> List[str]:
+        return sorted(self._periods)
+
+    def add(
+        self,
+        period: str,
+        summary_metrics: List[MetricSummary],
+        org_tree: dict,
+        correlation_data: CorrelationData,
+        correlation_table: Optional[CorrelationTable] = None,
+    ) -> PeriodSnapshot:
+        """冻结一期快照（输入不会被修改或引用）；同名的期被替换。"""
+        if not PERIOD_PATTERN.match(period):
+            raise ValueError("period must look like 2026-09")
+        with self._lock:
+            tree = self._pool.intern(org_tree)
+            snapshot = PeriodSnapshot(
+                period=period,
+                summary_metrics=copy.deepcopy(summary_metrics),
+                org_tree=tree,
+                correlation_data={dept_id: self._pool.value(entries) for dept_id, entries in correlation_data.items()},
+                correlation_table=correlation_table,
+                size=sum(1 for _ in _walk(tree)),
+            )
+            replaced = period in self._periods
+            self._periods[period] = snapshot
+            while len(self._periods) > self.max_periods:
+                del self._periods[min(self._periods)]
+                replaced = True
+            if replaced:
+                # 池里可能还留着已不被任何一期引用的节点，按现存各期重建
+                self._pool = NodePool()
+                for kept in self._periods.values():
+                    self._pool.register(kept.org_tree)
+        return snapshot
+
+    def stats(self) -> dict:
+        """各期节点总数与实际驻留（去重后）的节点数。"""
+        total = sum(s.size for s in self._periods.values())
+        return {"periods": self.periods(), "nodes": total, "sharedNodes": len(self._pool)}
+
+    def diff(self, old: str, new: str) -> dict:
+        """两期之间新增 / 删除 / 移动（父部门变化）/ 数值或状态变化的部门。"""
+        before, after = self._periods[old], self._periods[new]
+        changes: List[dict] = []
+
+        def scan(source: PeriodSnapshot, other: PeriodSnapshot, report_removed: bool) -> None:
+            stack: List[Tuple[dict, Optional[str]]] = [(source.org_tree, None)]
+            while stack:
+                node, parent_id = stack.pop()
+                counterpart = other.node(node["id"])
+                if counterpart is None:
+                    changes.append({"id": node["id"], "name": node.get("name"), "change": "removed" if report_removed else "added"})
+                elif not report_removed:
+                    entry = {"id": node["id"], "name": node.get("name")}
+                    old_parent = other.parent(node["id"])
+                    if old_parent != parent_id:
+                        entry.update({"change": "moved", "fromParent": old_parent, "toParent": parent_id})
+                    if counterpart is not node:
+                        fields = _changed_fields(counterpart, node)
+                        if fields:
+                            entry.setdefault("change", "modified")
+                            entry["fields"] = fields
+                    if "change" in entry:
+                        changes.append(entry)
+                if counterpart is node:
+                    continue  # 同一对象：整棵子树未变
+                stack.extend((child, node["id"]) for child in reversed(node.get("children") or []))
+
+        scan(after, before, report_removed=False)
+        scan(before, after, report_removed=True)
+        return {"from": old, "to": new, "changes": changes}
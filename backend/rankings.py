@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from aggregation import PRIMARY_METRIC
+from hierarchy_index import HierarchyIndex
+from org_store import OrgStore
+
+# 排名口径：value 为指标值；attainment / gap 为人效相对基准的达成率 / 差值（仅主指标）
+RANK_BY = ("value", "attainment", "gap")
+LEVELS = ("all", "leaf", "internal")
+
+# 范围内行数低于全体的该比例时，直接在子树区间上做 argpartition，否则沿全局有序索引扫描
+_SCOPE_PARTITION_RATIO = 0.25
+_SCAN_CHUNK = 4096
+
+
+def level_mask(store: OrgStore, rows: np.ndarray, level: str) -> np.ndarray:
+    """level 为 all / leaf / internal 或绝对深度。"""
+    if level == "all":
+        return np.ones(rows.size, dtype=bool)
+    if level == "leaf":
+        return store.is_leaf[rows]
+    if level == "internal":
+        return ~store.is_leaf[rows]
+    return store.depth[rows] == int(level)
+
+
+class _SortedScores:
+    """
+    某一（指标, 口径）的全体部门有序索引：order 为按分数升序的行号，NaN 排在末尾。
+    单行分数变化时在有序数组中删除旧位置、二分插入新位置，不做全量重排。
+    """
+
+    def __init__(self, scores: np.ndarray):
+        self.scores = scores.astype(np.float64, copy=True)
+        self.order = np.argsort(self.scores, kind="stable")
+        self.sorted = self.scores[self.order]
+        self.valid = int(np.isfinite(self.scores).sum())
+
+    def update(self, row: int, score: float) -> None:
+        old = self.scores[row]
+        if old == score or (np.isnan(old) and np.isnan(score)):
+            return
+        if np.isnan(old):
+            pos = self.valid + int(np.flatnonzero(self.order[self.valid :] == row)[0])
+        else:
+            lo = int(np.searchsorted(self.sorted[: self.valid], old, side="left"))
+            hi = int(np.searchsorted(self.sorted[: self.valid], old, side="right"))
+            pos = lo + int(np.flatnonzero(self.order[lo:hi] == row)[0])
+            self.valid -= 1
+        order = np.delete(self.order, pos)
+        sorted_scores = np.delete(self.sorted, pos)
+        if np.isnan(score):
+            at = order.size
+        else:
+            at = int(np.searchsorted(sorted_scores[: self.valid], score, side="right"))
+            self.valid += 1
+        self.order = np.insert(order, at, row)
+        self.sorted = np.insert(sorted_scores, at, score)
+        self.scores[row] = score
+
+
+class RankingIndex:
+    """
+    部门排名 / 异常扫描。
+
+    每个（指标, 口径）首次查询时建立全局有序索引，之后随 PATCH 增量维护；
+    查询按范围（子树 = 先序连续区间）与层级过滤：范围较大时沿有序索引分块扫描，取满 k 个即停，
+    范围较小时直接在子树区间上 argpartition。
+    """
+
+    def __init__(self, store: OrgStore, hierarchy: HierarchyIndex):
+        self.store = store
+        self.hierarchy = hierarchy
+        self._indexes: Dict[Tuple[str, str], _SortedScores] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ 分数
+    def scores(self, metric: str, by: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        store = self.store
+        if metric not in store.metric_col:
+            raise KeyError(metric)
+        if by not in RANK_BY:
+            raise ValueError(f"by must be one of {', '.join(RANK_BY)}")
+        if by != "value" and metric != PRIMARY_METRIC:
+            raise ValueError(f"by={by} is only defined for {PRIMARY_METRIC}")
+        sel = slice(None) if rows is None else rows
+        values = store.metrics[sel, store.metric_col[metric]]
+        if by == "value":
+            return values
+        baseline = store.baseline[sel]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if by == "attainment":
+                return np.where(baseline > 0, values / baseline, np.nan)
+            return values - baseline
+
+    def _index(self, metric: str, by: str) -> _SortedScores:
+        key = (metric, by)
+        index = self._indexes.get(key)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    index = self._indexes[key] = _SortedScores(self.scores(metric, by))
+        return index
+
+    def refresh(self, rows: Iterable[int]) -> None:
+        """增量更新：rows 的指标已变化（由 Dataset.update_department 调用）。"""
+        rows = np.fromiter(rows, dtype=np.int64)
+        if rows.size == 0:
+            return
+        with self._lock:
+            for (metric, by), index in self._indexes.items():
+                for row, score in zip(rows.tolist(), self.scores(metric, by, rows).tolist()):
+                    index.update(row, score)
+
+    # ------------------------------------------------------------------ 查询
+    def _level_mask(self, rows: np.ndarray, level: str) -> np.ndarray:
+        return level_mask(self.store, rows, level)
+
+    def top(
+        self,
+        metric: str = PRIMARY_METRIC,
+        by: str = "value",
+        ascending: bool = True,
+        k: int = 20,
+        scope_row: int = 0,
+        level: str = "all",
+        below: Optional[float] = None,
+        above: Optional[float] = None,
+        visible: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        """返回 ([(行号, 分数)], 范围内满足过滤条件的总数)；visible 为负责人视图的可见性过滤（见 scopes.Scope.mask）。"""
+        span = self.hierarchy.subtree(scope_row)
+        scope_rows = np.arange(span.start, span.stop)
+        scope_scores = self.scores(metric, by, scope_rows)
+        eligible = self._level_mask(scope_rows, level) & np.isfinite(scope_scores)
+        if visible is not None:
+            eligible &= visible(scope_rows)
+        if below is not None:
+            eligible &= scope_scores < below
+        if above is not None:
+            eligible &= scope_scores > above
+        total = int(eligible.sum())
+        if total == 0 or k <= 0:
+            return [], total
+
+        if scope_rows.size < len(self.store) * _SCOPE_PARTITION_RATIO or total <= k:
+            rows, row_scores = scope_rows[eligible], scope_scores[eligible]
+            picked = self.store.top_k(row_scores, k, ascending=ascending, rows=np.arange(rows.size))
+            return [(int(rows[i]), float(row_scores[i])) for i in picked], total
+
+        index = self._index(metric, by)
+        with self._lock:
+            order, sorted_scores, valid = index.order, index.sorted, index.valid
+        candidates = order[:valid] if ascending else order[:valid][::-1]
+        candidate_scores = sorted_scores[:valid] if ascending else sorted_scores[:valid][::-1]
+        picked: List[Tuple[int, float]] = []
+        step = max(_SCAN_CHUNK, k)
+        for start in range(0, candidates.size, step):
+            rows = candidates[start : start + step]
+            chunk_scores = candidate_scores[start : start + rows.size]
+            keep = (rows >= span.start) & (rows < span.stop) & self._level_mask(rows, level)
+            if visible is not None:
+                keep &= visible(rows)
+            if below is not None:
+                keep &= chunk_scores < below
+            if above is not None:
+                keep &= chunk_scores > above
+            for row, score in zip(rows[keep].tolist(), chunk_scores[keep].tolist()):
+                picked.append((row, score))
+                if len(picked) == k:
+                    return picked, total
+        return picked, total
@@ -0,0 +1,166 @@
+"""
+按大区分片的并行重算。
+
+根节点的各直接子节点（大区）互不依赖：每个分片在子进程中完成汇总（OrgAggregator）、
+部门名称/负责人的拼音表与检索分词（倒排表，search_index.posting_arrays），以及该分片部门的
+相关系数矩阵；主进程把分片按原顺序挂回根节点，用同样的人数加权只结算根节点
+（OrgAggregator.from_shards），平移编号合并各分片的倒排表，再组装 Dataset。
+
+主进程中仍串行的部分：列式存储（OrgStore.from_tree）与合并倒排表，二者都不分词、与部门数线性相关；
+告警规则在首次访问时才判定。加速因此随可用 CPU 数增长，单核机器上并行只增加进程启动与序列化开销。
+
+子进程用 spawn 启动（不继承服务进程的线程与锁），只导入本模块依赖的计算模块。
+部门数较少或只有一个分片时直接串行构建，避免进程启动与序列化开销。
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aggregation import OrgAggregator
+from correlation_engine import CorrelationTable, DriverSeries, compute_correlations
+from dataset import Dataset
+from models import CorrelationData, MetricSummary
+from search_index import PostingArrays, pinyin_table, posting_arrays, tree_entries
+from timeseries import HistoryStore
+
+logger = logging.getLogger(__name__)
+
+# 低于该部门数时串行构建
+PARALLEL_MIN_DEPARTMENTS = 20_000
+
+
+@dataclass
+class ShardResult:
+    aggregator: OrgAggregator  # aggregator.root 即汇总后的分片子树
+    pinyin: Dict[str, Tuple[str, str]]
+    search: PostingArrays  # 分片内部门按先序从 0 编号
+    correlation_table: Optional[CorrelationTable]
+
+
+def recompute_shard(subtree: dict, series: Optional[DriverSeries]) -> ShardResult:
+    """子进程入口：汇总一个分片并计算其部门级派生数据。"""
+    aggregator = OrgAggregator(subtree)
+    entries = list(tree_entries(subtree))
+    pinyin = pinyin_table(text for _, name, leader in entries for text in (name, leader))
+    table = compute_correlations(series) if series is not None else None
+    return ShardResult(aggregator, pinyin, posting_arrays(entries, pinyin), table)
+
+
+def _subtree_ids(root: dict) -> List[str]:
+    ids: List[str] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        ids.append(node["id"])
+        stack.extend(node.get("children") or [])
+    return ids
+
+
+def slice_series(series: DriverSeries, dept_ids: Sequence[str]) -> Optional[DriverSeries]:
+    """取出 dept_ids 中有序列的部门（保持 dept_ids 的顺序）。"""
+    index = {dept_id: i for i, dept_id in enumerate(series.dept_ids)}
+    rows = [index[d] for d in dept_ids if d in index]
+    if not rows:
+        return None
+    return DriverSeries(
+        dept_ids=[series.dept_ids[r] for r in rows],
+        periods=list(series.periods),
+        target=series.target[rows],
+        driver_ids=list(series.driver_ids),
+        drivers=series.drivers[:, rows],
+    )
+
+
+def merge_tables(tables: Sequence[Optional[CorrelationTable]]) -> Optional[CorrelationTable]:
+    """按部门（行）拼接各分片的相关系数矩阵；各分片的驱动指标列相同。"""
+    tables = [t for t in tables if t is not None]
+    if not tables:
+        return None
+    arrays = {
+        f.name: np.concatenate([getattr(t, f.name) for t in tables])
+        for f in fields(CorrelationTable)
+        if f.init and f.name not in ("dept_ids", "driver_ids")
+    }
+    dept_ids = [dept_id for t in tables for dept_id in t.dept_ids]
+    return CorrelationTable(dept_ids=dept_ids, driver_ids=list(tables[0].driver_ids), **arrays)
+
+
+def default_workers() -> int:
+    if _gevent_patched():
+        # 打过 gevent monkey patch 的进程（gevent worker 内的 /api/admin/reload）中，
+        # ProcessPoolExecutor 的结果管道得不到及时读取，子进程会卡在回传结果上；退回串行
+        return 1
+    return int(os.getenv("HR_RECOMPUTE_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def _gevent_patched() -> bool:
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def build_dataset(
+    summary_metrics: List[MetricSummary],
+    org_tree: dict,
+    correlation_data: CorrelationData,
+    driver_series: Optional[DriverSeries] = None,
+    history: Optional[HistoryStore] = None,
+    workers: Optional[int] = None,
+    min_departments: int = PARALLEL_MIN_DEPARTMENTS,
+) -> Dataset:
+    """与 Dataset(...) 结果一致；规模足够大且有多个大区时按分片并行重算。"""
+    workers = workers or default_workers()
+    shards = list(org_tree.get("children") or [])
+    shard_ids = [_subtree_ids(shard) for shard in shards]
+    total = 1 + sum(len(ids) for ids in shard_ids)
+    if workers <= 1 or len(shards) < 2 or total < min_departments:
+        return Dataset(summary_metrics, org_tree, correlation_data, driver_series=driver_series, history=history)
+
+    started = time.perf_counter()
+    shard_series = [slice_series(driver_series, ids) if driver_series is not None else None for ids in shard_ids]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)), mp_context=context) as pool:
+        # 大分片先提交，减少尾部等待；结果仍按原顺序挂回根节点
+        order = sorted(range(len(shards)), key=lambda i: -len(shard_ids[i]))
+        futures = {i: pool.submit(recompute_shard, shards[i], shard_series[i]) for i in order}
+        # 不在任何分片中的序列（根节点自身等）在主进程计算
+        covered = {dept_id for ids in shard_ids for dept_id in ids}
+        rest = slice_series(driver_series, [d for d in driver_series.dept_ids if d not in covered]) if driver_series is not None else None
+        rest_table = compute_correlations(rest) if rest is not None else None
+        results = [futures[i].result() for i in range(len(shards))]
+
+    root = {key: value for key, value in org_tree.items() if key != "children"}
+    OrgAggregator.from_shards(root, [r.aggregator for r in results])
+    pinyin: Dict[str, Tuple[str, str]] = {}
+    for result in results:
+        pinyin.update(result.pinyin)
+    # 先序编号：根节点为 0，各分片依次接在后面
+    search_parts: List[Tuple[int, PostingArrays]] = [(0, posting_arrays([next(tree_entries(root))], pinyin))]
+    start = 1
+    for ids, result in zip(shard_ids, results):
+        search_parts.append((start, result.search))
+        start += len(ids)
+    table = merge_tables([rest_table, *(r.correlation_table for r in results)]) if driver_series is not None else None
+    ds = Dataset.from_recomputed(
+        summary_metrics,
+        root,
+        correlation_data,
+        pinyin=pinyin,
+        search_parts=search_parts,
+        correlation_table=table,
+        driver_series=driver_series,
+        history=history,
+    )
+    logger.info(
+        "recomputed %d departments in %d shards on %d workers in %.2fs",
+        total, len(shards), min(workers, len(shards)), time.perf_counter() - started,
+    )
+    return ds
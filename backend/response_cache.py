@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional, Tuple
+
+from singleflight import SingleFlight
+
+try:  # brotli 为可选依赖，缺失时只预压缩 gzip
+    import brotli
+except ImportError:  # pragma: no cover - 取决于部署环境
+    brotli = None
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    mimetype: str
+    gzip_body: Optional[bytes] = None
+    br_body: Optional[bytes] = None
+
+    def encoded(self, accept_encoding: str) -> tuple:
+        """按 Accept-Encoding 选择预压缩版本，返回 (body, content-encoding)。"""
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        if self.br_body is not None and "br" in accepted:
+            return self.br_body, "br"
+        if self.gzip_body is not None and "gzip" in accepted:
+            return self.gzip_body, "gzip"
+        return self.body, None
+
+
+class ResponseCache:
+    """
+    按（端点, 参数）缓存已编码（并预压缩）的响应字节，以数据版本号为界：
+    调用方传入当前版本，版本变化时整体失效。ETag 由版本号与内容摘要组成（强校验）。
+    未命中时按（键, 版本）合并并发构建：重载后缓存全冷的瞬间，相同请求只编码一次。
+    """
+
+    def __init__(self, maxsize: int = 512, compress_min_bytes: int = 1024):
+        self.maxsize = maxsize
+        self.compress_min_bytes = compress_min_bytes
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._flights: SingleFlight[CachedResponse] = SingleFlight()
+        self._version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, version: int, body: bytes, mimetype: str = "application/json") -> CachedResponse:
+        entry = self._build_entry(version, body, mimetype)
+        with self._lock:
+            if version != self._version:
+                if self._version is not None and version < self._version:
+                    return entry  # 过期版本的结果不入缓存
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_or_build(
+        self, key: Hashable, version: int, build: Callable[[], bytes], mimetype: str = "application/json"
+    ) -> CachedResponse:
+        return self.lookup(key, version, build, mimetype)[0]
+
+    def lookup(
+        self, key: Hashable, version: int, build: Callable[[], bytes], mimetype: str = "application/json"
+    ) -> Tuple[CachedResponse, str]:
+        """返回 (条目, 来源)：hit 为缓存命中，miss 为本次构建，coalesced 为共享了并发请求的构建结果。"""
+        entry = self.get(key, version)
+        if entry is not None:
+            self.hits += 1
+            return entry, "hit"
+
+        def build_entry() -> Tuple[CachedResponse, bool]:
+            # 上一轮合并的构建可能恰好在 get 与进入 do 之间完成并写入
+            existing = self.get(key, version)
+            if existing is not None:
+                return existing, False
+            return self.put(key, version, build(), mimetype), True
+
+        (entry, built), shared = self._flights.do((key, version), build_entry)
+        if shared:
+            self.coalesced += 1
+            return entry, "coalesced"
+        if built:
+            self.misses += 1
+            return entry, "miss"
+        self.hits += 1
+        return entry, "hit"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _build_entry(self, version: int, body: bytes, mimetype: str) -> CachedResponse:
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        gzip_body = br_body = None
+        if len(body) >= self.compress_min_bytes:
+            gzip_body = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                br_body = brotli.compress(body)
+        return CachedResponse(body=body, etag=f"v{version}-{digest}", mimetype=mimetype, gzip_body=gzip_body, br_body=br_body)
@@ -0,0 +1,109 @@
+"""
+按负责人划分的可见范围（负责人视图）。
+
+负责人可见其担任负责人的各部门的整棵子树。OrgStore 按先序存放，任意子树是一段连续行区间，
+因此一个负责人的可见范围就是若干互不相交的行区间（嵌套在已有区间内的部门不重复计入）：
+判断某行是否可见是一次二分查找，过滤一批行号是一次 searchsorted，取全部可见行是区间拼接，
+不需要逐请求遍历组织树。负责人字段只随整份快照替换而变化，每份快照预计算一次。
+"""
+from __future__ import annotations
+
+import bisect
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from hierarchy_index import HierarchyIndex
+from org_store import OrgStore
+
+
+class Scope:
+    """一个负责人的可见范围：按起点升序、互不相交的先序行区间 [starts[i], stops[i])。"""
+
+    def __init__(self, leader: str, starts: np.ndarray, stops: np.ndarray):
+        self.leader = leader
+        self.starts = starts
+        self.stops = stops
+        self.size = int((stops - starts).sum())
+        self._starts: List[int] = starts.tolist()
+        self._stops: List[int] = stops.tolist()
+
+    @property
+    def roots(self) -> List[int]:
+        """各区间的起点即该负责人范围内的最高层部门（先序）。"""
+        return self.starts.tolist()
+
+    def contains(self, row: int) -> bool:
+        # 单行判定用 Python 列表二分，避免逐次调用 numpy 的开销（检索时对每个候选调用）
+        i = bisect.bisect_right(self._starts, row) - 1
+        return i >= 0 and row < self._stops[i]
+
+    def mask(self, rows: np.ndarray) -> np.ndarray:
+        """rows 中各行是否可见。"""
+        i = np.searchsorted(self.starts, rows, side="right") - 1
+        return (i >= 0) & (rows < self.stops[np.maximum(i, 0)])
+
+    def rows(self) -> np.ndarray:
+        """全部可见行（先序）。"""
+        if self.starts.size == 1:
+            return np.arange(self.starts[0], self.stops[0])
+        return np.concatenate([np.arange(a, b) for a, b in zip(self.starts.tolist(), self.stops.tolist())])
+
+    def spans(self) -> Iterator[range]:
+        for a, b in zip(self.starts.tolist(), self.stops.tolist()):
+            yield range(a, b)
+
+
+class ScopeIndex:
+    """全部负责人的可见范围，按负责人姓名查找。"""
+
+    def __init__(self, store: OrgStore, hierarchy: HierarchyIndex):
+        self._scopes: Dict[str, Scope] = {}
+        leader_idx = store.leader_idx
+        order = np.argsort(leader_idx, kind="stable")  # 同一负责人的行保持先序
+        bounds = np.flatnonzero(np.diff(leader_idx[order])) + 1
+        stops_all = hierarchy.tout + 1
+        for group in np.split(order, bounds) if order.size else []:
+            leader = store.strings[leader_idx[group[0]]]
+            if not leader:
+                continue
+            starts: List[int] = []
+            stops: List[int] = []
+            for row in group.tolist():
+                if stops and row < stops[-1]:
+                    continue  # 已在上一个区间（祖先部门的子树）内
+                starts.append(row)
+                stops.append(int(stops_all[row]))
+            self._scopes[leader] = Scope(leader, np.asarray(starts, dtype=np.int64), np.asarray(stops, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self._scopes)
+
+    def get(self, leader: str) -> Optional[Scope]:
+        return self._scopes.get(leader)
+
+
+def scoped_tree(store: OrgStore, hierarchy: HierarchyIndex, scope: Scope) -> dict:
+    """
+    负责人视图的整棵组织树：只有一个区间时即该部门的子树；有多个区间时自它们的最近公共祖先起，
+    只保留通向各区间的路径，路径上不在范围内的部门只给出 id / 名称并标记 outOfScope。
+    """
+    roots = scope.roots
+    if len(roots) == 1:
+        return store.materialize(roots[0])
+    top = hierarchy.lca_many(roots)
+    holders: Dict[int, dict] = {top: {"id": store.ids[top], "name": store.name(top), "outOfScope": True, "children": []}}
+    # 区间按先序处理，挂到同一父节点下时保持原兄弟顺序
+    for root in roots:
+        node, row = store.materialize(root), root
+        while True:
+            parent = int(store.parent[row])
+            holder = holders.get(parent)
+            created = holder is None
+            if created:
+                holder = holders[parent] = {"id": store.ids[parent], "name": store.name(parent), "outOfScope": True, "children": []}
+            holder["children"].append(node)
+            if not created:
+                break
+            node, row = holder, parent
+    return holders[top]
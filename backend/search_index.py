@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import bisect
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+try:  # 拼音索引为可选能力：未安装 pypinyin 时仅按字符 n-gram 检索
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pragma: no cover - 取决于部署环境
+    lazy_pinyin = None
+    Style = None
+
+PREFIX_MAX = 6
+# 拼音包含层只索引二元组：一个字母几乎能在所有部门的拼音里找到，单字母查询不走这一层
+PINYIN_CONTAINS_MIN = 2
+
+# 检索分层（依次执行，前一层凑满 limit 即提前结束）：
+# 名称前缀 → 名称包含 → 名称拼音/首字母前缀 → 负责人 → 负责人拼音前缀 → 拼音包含
+_NAME_PREFIX = "name^"
+_NAME_GRAM = "name"
+_NAME_PY_PREFIX = "name_py^"
+_LEADER_GRAM = "leader"
+_LEADER_PY_PREFIX = "leader_py^"
+_PINYIN_GRAM = "pinyin"
+# 倒排表元素为打包的排序键：高位为名称长度，低 32 位为部门编号
+_SLOT_BITS = 32
+_SLOT_MASK = (1 << _SLOT_BITS) - 1
+
+Entry = Tuple[str, str, str]  # (部门 id, 名称, 负责人)
+PostingArrays = Dict[Tuple[str, str], np.ndarray]
+
+
+def _grams(text: str) -> Set[str]:
+    """单字 + 相邻二元组；单字用于一个字符的查询。"""
+    grams = set(text)
+    grams.update(_bigrams(text))
+    return grams
+
+
+def _bigrams(text: str) -> Set[str]:
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _prefixes(text: str) -> Set[str]:
+    return {text[:i] for i in range(1, min(len(text), PREFIX_MAX) + 1)}
+
+
+@lru_cache(maxsize=65536)
+def _pinyin_keys(text: str) -> Tuple[str, str]:
+    if lazy_pinyin is None or not text:
+        return "", ""
+    # 一次分词同时得到全拼与首字母：非汉字片段加 \0 标记，原样保留（与 Style.FIRST_LETTER 的结果一致）
+    syllables = lazy_pinyin(text, errors=lambda segment: ["\0" + segment])
+    full = "".join(s.lstrip("\0") for s in syllables).lower()
+    initials = "".join(s[1:] if s.startswith("\0") else s[:1] for s in syllables).lower()
+    return full, initials
+
+
+def pinyin_table(texts: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    """批量计算 {文本: (全拼, 首字母)}，可在子进程中预先算好后传给 from_tree。"""
+    return {text: _pinyin_keys(text) for text in dict.fromkeys(texts)}
+
+
+def tree_entries(root: dict) -> Iterator[Entry]:
+    """先序遍历组织树，产出建索引用的 (部门 id, 名称, 负责人)；编号即产出顺序。"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node["id"], node.get("name", ""), node.get("leader", "")
+        stack.extend(reversed(node.get("children", []) or []))
+
+
+def posting_arrays(entries: Iterable[Entry], pinyin: Optional[Mapping[str, Tuple[str, str]]] = None) -> PostingArrays:
+    """
+    为一段连续编号（从 0 起）的部门分词，返回各词项已排序的排序键数组（int64）。
+    大组织按大区在子进程中分别生成（recompute），主进程用 DepartmentSearchIndex.from_parts 平移编号后合并。
+    """
+    postings: Dict[Tuple[str, str], List[int]] = {}
+    for slot, (dept_id, name, leader) in enumerate(entries):
+        _append_postings(postings, _Doc(dept_id, name, leader, slot, pinyin))
+    return {key: np.sort(np.asarray(ranks, dtype=np.int64)) for key, ranks in postings.items()}
+
+
+def _append_postings(postings: Dict[Tuple[str, str], List[int]], doc: "_Doc") -> None:
+    for key in set(doc.tokens()):
+        posting = postings.get(key)
+        if posting is None:
+            postings[key] = [doc.rank]
+        else:
+            posting.append(doc.rank)
+
+
+class _Doc:
+    __slots__ = ("dept_id", "name", "leader", "name_py", "leader_py", "name_py_blob", "leader_py_blob", "py_blob", "rank")
+
+    def __init__(self, dept_id: str, name: str, leader: str, slot: int, pinyin: Optional[Mapping[str, Tuple[str, str]]] = None):
+        self.dept_id = dept_id
+        self.name = name.lower()
+        self.leader = leader.lower()
+        self.name_py = pinyin[name] if pinyin and name in pinyin else _pinyin_keys(name)
+        self.leader_py = pinyin[leader] if pinyin and leader in pinyin else _pinyin_keys(leader)
+        # 以 \0 拼接的校验串：前缀校验用 "\0" + q in blob，包含校验用 q in blob
+        self.name_py_blob = "\0" + "\0".join(self.name_py)
+        self.leader_py_blob = "\0" + "\0".join(self.leader_py)
+        self.py_blob = self.name_py_blob + self.leader_py_blob
+        # 同一层内按名称长度、再按插入顺序排序
+        self.rank = (len(self.name) << _SLOT_BITS) | slot
+
+    def tokens(self) -> Iterable[Tuple[str, str]]:
+        for token in _prefixes(self.name):
+            yield _NAME_PREFIX, token
+        for token in _grams(self.name):
+            yield _NAME_GRAM, token
+        for token in _grams(self.leader):
+            yield _LEADER_GRAM, token
+        for key in self.name_py:
+            for token in _prefixes(key):
+                yield _NAME_PY_PREFIX, token
+        for key in self.leader_py:
+            for token in _prefixes(key):
+                yield _LEADER_PY_PREFIX, token
+        for key in self.name_py + self.leader_py:
+            for token in _bigrams(key):
+                yield _PINYIN_GRAM, token
+
+
+# (词项组, 是否前缀层, 查询最短长度, 校验)
+_TIERS: List[Tuple[str, bool, int, Callable[[_Doc, str], bool]]] = [
+    (_NAME_PREFIX, True, 1, lambda doc, q: doc.name.startswith(q)),
+    (_NAME_GRAM, False, 1, lambda doc, q: q in doc.name),
+    (_NAME_PY_PREFIX, True, 1, lambda doc, q: "\0" + q in doc.name_py_blob),
+    (_LEADER_GRAM, False, 1, lambda doc, q: q in doc.leader),
+    (_LEADER_PY_PREFIX, True, 1, lambda doc, q: "\0" + q in doc.leader_py_blob),
+    (_PINYIN_GRAM, False, PINYIN_CONTAINS_MIN, lambda doc, q: q in doc.py_blob),
+]
+
+
+class DepartmentSearchIndex:
+    """
+    部门/负责人名称的内存倒排索引。
+
+    词项包括名称与负责人的单字、二元组，以及名称（含全拼、首字母）的前缀；
+    每个倒排表按（名称长度，插入顺序）有序，查询按匹配层级依次取候选、校验，
+    凑满 limit 即返回，不随部门总数线性增长。支持按部门增量增删改。
+    """
+
+    def __init__(self) -> None:
+        self._docs: Dict[int, _Doc] = {}
+        self._slot_of: Dict[str, int] = {}
+        self._postings: Dict[Tuple[str, str], List[int]] = {}
+        self._next_slot = 0
+
+    @classmethod
+    def from_tree(cls, root: dict, pinyin: Optional[Mapping[str, Tuple[str, str]]] = None) -> "DepartmentSearchIndex":
+        """pinyin 为预先算好的拼音表（见 pinyin_table），缺失的文本现场计算。"""
+        return cls.from_entries(tree_entries(root), pinyin=pinyin)
+
+    @classmethod
+    def from_entries(
+        cls, entries: Iterable[Entry], pinyin: Optional[Mapping[str, Tuple[str, str]]] = None
+    ) -> "DepartmentSearchIndex":
+        """批量建索引：(部门 id, 名称, 负责人) 依次编号，倒排表先追加、最后各排序一次，不逐条有序插入。"""
+        index = cls()
+        for slot, (dept_id, name, leader) in enumerate(entries):
+            doc = _Doc(dept_id, name, leader, slot, pinyin)
+            index._docs[slot] = doc
+            index._slot_of[dept_id] = slot
+            _append_postings(index._postings, doc)
+            index._next_slot = slot + 1
+        for posting in index._postings.values():
+            posting.sort()
+        return index
+
+    @classmethod
+    def from_parts(
+        cls,
+        entries: Sequence[Entry],
+        parts: Sequence[Tuple[int, PostingArrays]],
+        pinyin: Optional[Mapping[str, Tuple[str, str]]] = None,
+    ) -> "DepartmentSearchIndex":
+        """
+        由分段生成的倒排表组装索引（结果与 from_entries(entries) 相同）：parts 为 [(起始编号, posting_arrays 的结果)]，
+        各段覆盖 entries 中互不重叠的连续区段且合起来覆盖全部；主进程只平移编号、按词项归并，不再分词。
+        """
+        index = cls()
+        for slot, (dept_id, name, leader) in enumerate(entries):
+            index._docs[slot] = _Doc(dept_id, name, leader, slot, pinyin)
+            index._slot_of[dept_id] = slot
+        index._next_slot = len(entries)
+        grouped: Dict[Tuple[str, str], List[np.ndarray]] = {}
+        for start, arrays in parts:
+            for key, ranks in arrays.items():
+                # 编号在排序键的低位，平移编号即整体加上起始编号
+                grouped.setdefault(key, []).append(ranks + start if start else ranks)
+        for key, chunks in grouped.items():
+            merged = chunks[0] if len(chunks) == 1 else np.sort(np.concatenate(chunks))
+            index._postings[key] = merged.tolist()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, dept_id: str, name: str, leader: str, pinyin: Optional[Mapping[str, Tuple[str, str]]] = None) -> None:
+        if dept_id in self._slot_of:
+            self.remove(dept_id)
+        slot = self._next_slot
+        self._next_slot += 1
+        doc = _Doc(dept_id, name, leader, slot, pinyin)
+        self._docs[slot] = doc
+        self._slot_of[dept_id] = slot
+        for key in set(doc.tokens()):
+            posting = self._postings.setdefault(key, [])
+            if not posting or posting[-1] < doc.rank:
+                posting.append(doc.rank)
+            else:
+                bisect.insort(posting, doc.rank)
+
+    def remove(self, dept_id: str) -> None:
+        slot = self._slot_of.pop(dept_id, None)
+        if slot is None:
+            return
+        doc = self._docs.pop(slot)
+        for key in set(doc.tokens()):
+            posting = self._postings.get(key)
+            if posting is None:
+                continue
+            pos = bisect.bisect_left(posting, doc.rank)
+            if pos < len(posting) and posting[pos] == doc.rank:
+                del posting[pos]
+            if not posting:
+                del self._postings[key]
+
+    def update(self, dept_id: str, name: str, leader: str) -> None:
+        self.add(dept_id, name, leader)
+
+    def search(self, query: str, limit: int = 50, visible: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """visible 为负责人视图的可见性判断，不可见的部门不计入 limit。"""
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+        results: List[str] = []
+        seen: Set[int] = set()
+        for group, is_prefix, min_length, matches in _TIERS:
+            if len(query) < min_length:
+                continue
+            posting = self._tier_posting(group, is_prefix, query)
+            if not posting:
+                continue
+            for rank in posting:
+                slot = rank & _SLOT_MASK
+                if slot in seen:
+                    continue
+                doc = self._docs[slot]
+                if not matches(doc, query) or (visible is not None and not visible(doc.dept_id)):
+                    continue
+                seen.add(slot)
+                results.append(doc.dept_id)
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _tier_posting(self, group: str, is_prefix: bool, query: str) -> Optional[List[int]]:
+        if is_prefix:
+            return self._postings.get((group, query[:PREFIX_MAX]))
+        grams = [query] if len(query) == 1 else [query[i : i + 2] for i in range(len(query) - 1)]
+        best = None
+        for gram in grams:
+            posting = self._postings.get((group, gram))
+            if not posting:
+                return None
+            if best is None or len(posting) < len(best):
+                best = posting
+        return best
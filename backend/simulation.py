@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aggregation import PRIMARY_METRIC
+
+if TYPE_CHECKING:  # 避免与 dataset 循环导入
+    from dataset import Dataset
+
+MAX_CHANGES = 200
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    一条假设性变更：
+    - headcount：叶子部门人数增减（人均指标不变，只改变汇总权重）；
+    - driver + delta：驱动指标的绝对变化（如离职率 −3pp 为 delta=-0.03），作用于该部门子树内的全部叶子。
+    """
+
+    dept_id: str
+    headcount: int = 0
+    driver: Optional[str] = None
+    delta: float = 0.0
+
+
+def parse_changes(items: object) -> List[Change]:
+    """校验请求中的变更列表；格式错误抛 ValueError。"""
+    if not isinstance(items, list) or not items:
+        raise ValueError("changes must be a non-empty list")
+    if len(items) > MAX_CHANGES:
+        raise ValueError(f"at most {MAX_CHANGES} changes per scenario")
+    changes = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("deptId"), str):
+            raise ValueError("each change needs a deptId")
+        headcount = item.get("headcount", 0)
+        if not isinstance(headcount, int) or isinstance(headcount, bool):
+            raise ValueError("headcount must be an integer delta")
+        driver = item.get("driver")
+        delta = item.get("delta", 0.0)
+        if driver is not None and (not isinstance(driver, str) or not isinstance(delta, (int, float)) or isinstance(delta, bool)):
+            raise ValueError("driver changes need a driver id and a numeric delta")
+        if not headcount and driver is None:
+            raise ValueError("each change needs a headcount delta or a driver shift")
+        changes.append(Change(item["deptId"], headcount, driver, float(delta) if driver is not None else 0.0))
+    return changes
+
+
+class Simulator:
+    """
+    What-if 推演：把一批假设性变更折算为叶子部门的（人数, 人效）新值，
+    再经 OrgStore.project 在 overlay 上沿祖先路径重新加权汇总，不复制、不修改列式存储。
+
+    驱动指标对人效的影响按弹性近似：人效相对变化 = 相关系数 × 驱动指标相对变化
+    （驱动指标当前值取该叶子的关联指标条目，多个驱动指标的影响连乘）。
+    系数与当前值只随整份快照替换而变化，按（叶子, 驱动指标）缓存。
+    """
+
+    def __init__(self, ds: "Dataset"):
+        self.ds = ds
+        self._drivers: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _driver_inputs(self, dept_id: str) -> Dict[str, Tuple[float, float]]:
+        """{驱动指标: (相关系数, 当前值)}，只保留系数与当前值都有效的条目。"""
+        inputs = self._drivers.get(dept_id)
+        if inputs is None:
+            inputs = {}
+            for entry in self.ds.find_correlations(dept_id):
+                coefficient, value = entry.get("coefficient"), entry.get("value")
+                if isinstance(coefficient, (int, float)) and isinstance(value, (int, float)) and value:
+                    inputs[entry["id"]] = (float(coefficient), float(value))
+            with self._lock:
+                self._drivers[dept_id] = inputs
+        return inputs
+
+    def _leaves(self, row: int) -> np.ndarray:
+        span = self.ds.hierarchy.subtree(row)
+        rows = np.arange(span.start, span.stop)
+        return rows[self.ds.org_store.is_leaf[rows]]
+
+    def run(self, changes: Sequence[Change]) -> dict:
+        ds = self.ds
+        store = ds.org_store
+        col = store.metric_col.get(PRIMARY_METRIC)
+        headcount_delta: Dict[str, int] = {}
+        factor: Dict[str, float] = {}
+        skipped: List[dict] = []
+
+        for change in changes:
+            row = store.index.get(change.dept_id)
+            if row is None:
+                raise KeyError(change.dept_id)
+            if change.headcount:
+                if not store.is_leaf[row]:
+                    raise ValueError(f"{change.dept_id} is not a leaf department")
+                headcount_delta[change.dept_id] = headcount_delta.get(change.dept_id, 0) + change.headcount
+            if change.driver is not None:
+                missing = 0
+                for leaf in self._leaves(row).tolist():
+                    leaf_id = store.ids[leaf]
+                    inputs = self._driver_inputs(leaf_id).get(change.driver)
+                    if inputs is None:
+                        missing += 1
+                        continue
+                    coefficient, value = inputs
+                    factor[leaf_id] = factor.get(leaf_id, 1.0) * max(0.0, 1 + coefficient * change.delta / value)
+                if missing:
+                    skipped.append({"deptId": change.dept_id, "driver": change.driver, "leaves": missing})
+
+        leaves: Dict[int, Tuple[int, float]] = {}
+        for leaf_id in dict.fromkeys([*headcount_delta, *factor]):
+            row = store.index[leaf_id]
+            headcount = int(store.headcount[row]) + headcount_delta.get(leaf_id, 0)
+            if headcount < 0:
+                raise ValueError(f"headcount of {leaf_id} would become negative")
+            value = float(np.nan_to_num(store.metrics[row, col])) if col is not None else 0.0
+            leaves[row] = (headcount, round(value * factor.get(leaf_id, 1.0), 2))
+        projected = store.project(leaves, PRIMARY_METRIC)
+
+        affected = []
+        for row in sorted(projected):
+            dept_id = store.ids[row]
+            new_headcount, new_rollup = projected[row]
+            current = float(store.value[row])
+            rollup = current
+            if store.parent[row] < 0 and not store.is_leaf[row] and col is not None:
+                # 根节点展示值以总览卡片为准（reconcile_root_metric），推演结果按汇总差量叠加
+                rollup = store.rollup(row)[1][col]
+            value = round(current + new_rollup - rollup, 2)
+            baseline = float(store.baseline[row])
+            item = {
+                "id": dept_id,
+                "name": store.name(row),
+                "depth": int(store.depth[row]),
+                "leaf": bool(store.is_leaf[row]),
+                "headcount": int(store.headcount[row]),
+                "projectedHeadcount": new_headcount,
+                "value": current,
+                "projectedValue": value,
+                "delta": round(value - current, 2),
+                "baseline": baseline,
+                "attainment": round(current / baseline, 4) if baseline else None,
+                "projectedAttainment": round(value / baseline, 4) if baseline else None,
+                "status": store.status(row),
+            }
+            # 数值未变化时沿用当前状态，变化后按同一套规则重新判定
+            item["projectedStatus"] = ds.rules.status_for(row, value) if value != current else item["status"]
+            affected.append(item)
+        return {"metric": PRIMARY_METRIC, "version": ds.version, "affected": affected, "skipped": skipped}
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    同键请求合并：同一时刻对同一 key 只执行一次 fn，其余并发调用等待并共享其结果（或异常）。
+    计算结束即移除记录，之后的调用重新执行（结果的复用交给外层缓存）。
+
+    只依赖 threading 原语：gthread worker 下按线程阻塞；gevent worker 打过 monkey patch 后
+    Event 变为协程友好的实现，等待方让出协程而不占线程；Flask 的 async 视图同样在工作线程中执行。
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """返回 (结果, 是否共享了他人的计算)。"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def __len__(self) -> int:
+        """正在进行中的计算数。"""
+        return len(self._calls)
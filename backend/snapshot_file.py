@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from correlation_engine import CorrelationTable, DriverSeries
+from models import CorrelationData, MetricDetail, MetricSummary
+from org_store import OrgStore
+from timeseries import HistoryStore
+
+# 文件布局：MAGIC | u64 头部长度 | 头部 JSON | 按 ALIGN 对齐的数组段……
+# 头部记录每个数组段的 (偏移, dtype, shape)，加载时 np.frombuffer 直接映射，不拷贝数据。
+MAGIC = b"HRSNAP01"
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct("<8sQ")
+
+
+class SnapshotError(ValueError):
+    """快照文件损坏或版本不兼容。"""
+
+
+class BlobTable:
+    """变长字节串表（detail JSON 等）：一段连续字节 + 偏移数组 + 存在标记，按下标切片读取。"""
+
+    def __init__(self, blob: memoryview, offsets: np.ndarray, present: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+        self._present = present
+
+    def __len__(self) -> int:
+        return len(self._present)
+
+    def __getitem__(self, i: int) -> Optional[bytes]:
+        if not self._present[i]:
+            return None
+        return bytes(self._blob[int(self._offsets[i]) : int(self._offsets[i + 1])])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+@dataclass
+class Snapshot:
+    summary_metrics: List[MetricSummary]
+    correlation_data: CorrelationData
+    org_store: OrgStore
+    driver_series: Optional[DriverSeries] = None
+    correlation_table: Optional[CorrelationTable] = None
+    history: Optional[HistoryStore] = None
+
+
+def _pack_strings(strings: Sequence[str]) -> tuple:
+    """字符串表编码为 \\0 分隔的 UTF-8 字节（名称中不会出现 \\0），解码只需一次 split。"""
+    return np.frombuffer("\0".join(strings).encode("utf-8"), dtype=np.uint8), len(strings)
+
+
+def _unpack_strings(raw: memoryview, count: int) -> List[str]:
+    if count == 0:
+        return []
+    return bytes(raw).decode("utf-8").split("\0")
+
+
+def _pack_blobs(blobs: Sequence[Optional[bytes]]) -> tuple:
+    present = np.array([blob is not None for blob in blobs], dtype=np.bool_)
+    lengths = np.array([len(blob) if blob is not None else 0 for blob in blobs], dtype=np.int64)
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return np.frombuffer(b"".join(blob for blob in blobs if blob is not None), dtype=np.uint8), offsets, present
+
+
+def write_snapshot(
+    path: str | Path,
+    summary_metrics: Sequence[MetricSummary],
+    correlation_data: CorrelationData,
+    store: OrgStore,
+    driver_series: Optional[DriverSeries] = None,
+    correlation_table: Optional[CorrelationTable] = None,
+    history: Optional[HistoryStore] = None,
+) -> int:
+    """写出快照（先写临时文件再 os.replace，读者不会看到写了一半的文件），返回字节数。"""
+    ids_raw, ids_count = _pack_strings(store.ids)
+    strings_raw, strings_count = _pack_strings(store.strings)
+    details_raw, details_offsets, details_present = _pack_blobs(store.details)
+    arrays: Dict[str, np.ndarray] = {
+        "parent": store.parent,
+        "headcount": store.headcount,
+        "baseline": store.baseline,
+        "value": store.value,
+        "metrics": store.metrics,
+        "name_idx": store.name_idx,
+        "leader_idx": store.leader_idx,
+        "status_idx": store.status_idx,
+        "child_idx": store.child_idx,
+        "child_ptr": store.child_ptr,
+        "depth": store.depth,
+        "ids": ids_raw,
+        "strings": strings_raw,
+        "details": details_raw,
+        "details_offsets": details_offsets,
+        "details_present": details_present,
+    }
+    header: dict = {
+        "format": FORMAT_VERSION,
+        "rows": len(store),
+        "idsCount": ids_count,
+        "stringsCount": strings_count,
+        "metricIds": store.metric_ids,
+        "metricMeta": {mid: list(meta) for mid, meta in store.metric_meta.items()},
+        "summaryMetrics": [asdict(m) for m in summary_metrics],
+        "correlationData": correlation_data,
+    }
+    if driver_series is not None:
+        header["driverSeries"] = {
+            "deptIds": list(driver_series.dept_ids),
+            "periods": list(driver_series.periods),
+            "driverIds": list(driver_series.driver_ids),
+        }
+        arrays["ds_target"] = driver_series.target
+        arrays["ds_drivers"] = driver_series.drivers
+    if correlation_table is not None:
+        header["correlationTable"] = {
+            "deptIds": list(correlation_table.dept_ids),
+            "driverIds": list(correlation_table.driver_ids),
+        }
+        for name in ("pearson", "pearson_p", "spearman", "spearman_p", "samples", "latest"):
+            arrays[f"ct_{name}"] = getattr(correlation_table, name)
+    if history is not None:
+        header["historyKeys"] = [list(key) for key in history.keys]
+        arrays["hist_series"] = history.series
+        arrays["hist_days"] = history.days
+        arrays["hist_values"] = history.values
+
+    # 先按占位偏移估算头部长度，再回填真实偏移（偏移增长不会改变对齐后的头部区间）
+    sections: Dict[str, list] = {}
+    header["sections"] = sections
+    header_room = 0
+    while True:
+        offset = _align(_PREFIX.size + header_room)
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            sections[name] = [offset, arr.dtype.str, list(arr.shape)]
+            offset = _align(offset + arr.nbytes)
+        encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if _PREFIX.size + len(encoded) <= _align(_PREFIX.size + header_room):
+            break
+        header_room = len(encoded) + ALIGN
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, arr in arrays.items():
+            f.seek(sections[name][0])
+            f.write(np.ascontiguousarray(arr).tobytes())
+        size = f.seek(0, os.SEEK_END)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return size
+
+
+def load_snapshot(path: str | Path) -> Snapshot:
+    """
+    mmap 打开快照：数值数组零拷贝映射（ACCESS_COPY：同机多进程共享页缓存，
+    增量更新写入进程私有页，不会改动磁盘文件），只有 id 与字符串表需要解码。
+    """
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    if len(buf) < _PREFIX.size:
+        raise SnapshotError(f"{path}: file too small")
+    magic, header_len = _PREFIX.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path}: not a snapshot file")
+    header = json.loads(bytes(buf[_PREFIX.size : _PREFIX.size + header_len]))
+    if header.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"{path}: unsupported snapshot format {header.get('format')}")
+
+    view = memoryview(buf)
+
+    def array(name: str) -> np.ndarray:
+        offset, dtype, shape = header["sections"][name]
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape)) if shape else 1
+        if count == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.frombuffer(view, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    def raw(name: str) -> memoryview:
+        offset, _, shape = header["sections"][name]
+        return view[offset : offset + shape[0]]
+
+    store = OrgStore(
+        ids=_unpack_strings(raw("ids"), header["idsCount"]),
+        parent=array("parent"),
+        headcount=array("headcount"),
+        baseline=array("baseline"),
+        value=array("value"),
+        metrics=array("metrics"),
+        metric_ids=header["metricIds"],
+        metric_meta={mid: tuple(meta) for mid, meta in header["metricMeta"].items()},
+        strings=_unpack_strings(raw("strings"), header["stringsCount"]),
+        name_idx=array("name_idx"),
+        leader_idx=array("leader_idx"),
+        status_idx=array("status_idx"),
+        details=BlobTable(raw("details"), array("details_offsets"), array("details_present")),
+        topology=(array("child_idx"), array("child_ptr"), array("depth")),
+    )
+
+    summary_metrics = [
+        MetricSummary(**{**m, "detail": MetricDetail(**m["detail"])}) for m in header["summaryMetrics"]
+    ]
+    driver_series = None
+    if "driverSeries" in header:
+        meta = header["driverSeries"]
+        driver_series = DriverSeries(
+            dept_ids=meta["deptIds"],
+            periods=meta["periods"],
+            target=array("ds_target"),
+            driver_ids=meta["driverIds"],
+            drivers=array("ds_drivers"),
+        )
+    correlation_table = None
+    if "correlationTable" in header:
+        meta = header["correlationTable"]
+        correlation_table = CorrelationTable(
+            dept_ids=meta["deptIds"],
+            driver_ids=meta["driverIds"],
+            **{name: array(f"ct_{name}") for name in ("pearson", "pearson_p", "spearman", "spearman_p", "samples", "latest")},
+        )
+    history = None
+    if "historyKeys" in header:
+        history = HistoryStore(header["historyKeys"], array("hist_series"), array("hist_days"), array("hist_values"))
+    return Snapshot(
+        summary_metrics=summary_metrics,
+        correlation_data=header["correlationData"],
+        org_store=store,
+        driver_series=driver_series,
+        correlation_table=correlation_table,
+        history=history,
+    )
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """离线生成快照：python snapshot_file.py out.snap [--departments d.csv --monthly m.csv]"""
+    parser = argparse.ArgumentParser(description="Build a memory-mapped dashboard snapshot")
+    parser.add_argument("output")
+    parser.add_argument("--departments", help="department hierarchy export (CSV/Parquet)")
+    parser.add_argument("--monthly", help="monthly metrics export (CSV/Parquet)")
+    parser.add_argument("--history", help="optional long-format metric history (dept_id,date,metric,value)")
+    parser.add_argument("--workers", type=int, help="processes for the sharded recompute (default: HR_RECOMPUTE_WORKERS or CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.departments and args.monthly:
+        from ingestion import ingest
+        from recompute import build_dataset
+
+        result = ingest(args.departments, args.monthly, history_path=args.history)
+        ds = build_dataset(
+            result.summary_metrics, result.org_tree, {}, driver_series=result.driver_series, history=result.history, workers=args.workers
+        )
+    else:
+        from dataset import seed_dataset
+
+        ds = seed_dataset()
+    size = ds.write_snapshot(args.output)
+    print(f"wrote {args.output}: {len(ds.org_store)} departments, {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import copy
+import math
+import random
+from collections import deque
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from correlation_engine import DRIVER_META, DriverSeries
+from models import CorrelationData
+from seed_data import correlation_data as seed_correlation_data
+
+# 合成组织树的命名素材；名称带编号，保证唯一且可被检索
+_REGIONS = ("华东", "华南", "华北", "华中", "西南", "西北", "东北")
+_UNIT_SUFFIX = ("大区", "事业部", "分部", "销售组", "小组")
+_SURNAMES = "王李张刘陈杨赵黄周吴徐孙胡朱高林何郭马罗"
+_GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰涛明超秀霞平刚"
+
+
+def default_breadth(size: int, depth: int) -> int:
+    """depth 层（不含根）的满 breadth 叉树至少容纳 size 个节点时的最小 breadth。"""
+    if depth <= 0:
+        return 1
+    breadth = max(2, math.ceil((size - 1) ** (1 / depth)))
+    while sum(breadth**level for level in range(depth + 1)) < size:
+        breadth += 1
+    return breadth
+
+
+def generate_org_tree(size: int, depth: int = 4, breadth: Optional[int] = None, seed: int = 0) -> dict:
+    """
+    生成与演示数据同构的组织树（共 size 个部门）：按层（BFS）填充，每个节点至多 breadth 个子节点，
+    深度不超过 depth；叶子带人数与三项人效指标，非叶子的数值由汇总计算。
+    """
+    if size < 1:
+        raise ValueError("size must be positive")
+    breadth = breadth or default_breadth(size, depth)
+    if sum(breadth**level for level in range(depth + 1)) < size:
+        raise ValueError(f"breadth={breadth}, depth={depth} cannot hold {size} departments")
+    rng = random.Random(seed)
+
+    root = _make_node(rng, "hq", "全国销售中心")
+    queue = deque([(root, 0)])
+    count = 1
+    while queue and count < size:
+        parent, level = queue.popleft()
+        if level >= depth:
+            continue
+        parent["children"] = []
+        for _ in range(min(breadth, size - count)):
+            name = f"{_REGIONS[count % len(_REGIONS)]}{_UNIT_SUFFIX[min(level, len(_UNIT_SUFFIX) - 1)]}{count}"
+            child = _make_node(rng, f"d{count}", name)
+            parent["children"].append(child)
+            queue.append((child, level + 1))
+            count += 1
+    _fill_leaves(root, rng)
+    return root
+
+
+def _make_node(rng: random.Random, dept_id: str, name: str) -> dict:
+    baseline = round(rng.uniform(11.0, 12.5), 1)
+    return {
+        "id": dept_id,
+        "name": name,
+        "leader": rng.choice(_SURNAMES) + rng.choice(_GIVEN) + (rng.choice(_GIVEN) if rng.random() < 0.5 else ""),
+        "headcount": 0,
+        "status": "good",
+        "baseline": baseline,
+        "value": 0,
+        "metrics": [],
+    }
+
+
+def _fill_leaves(root: dict, rng: random.Random) -> None:
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        children = node.get("children") or []
+        if children:
+            stack.extend(children)
+            continue
+        value = round(node["baseline"] * rng.uniform(0.65, 1.25), 1)
+        cost = round(rng.uniform(38, 55), 1)
+        attainment = round(value / node["baseline"], 2)
+        node["headcount"] = rng.randint(5, 80)
+        node["value"] = value
+        # 与前端图例一致：≥ 基准为 good，低于基准 20% 以内为 warn，超过 20% 为 bad
+        node["status"] = "good" if attainment >= 1 else "warn" if attainment >= 0.8 else "bad"
+        node["metrics"] = [
+            {"id": "revenue_per_cost", "name": "万元人力成本销售收入", "value": value, "unit": "万元"},
+            {"id": "per_capita_sales", "name": "人均销售额", "value": round(value * cost, 1), "unit": "万元"},
+            {"id": "per_capita_cost", "name": "人均人力成本", "value": cost, "unit": "万元"},
+        ]
+        node["detail"] = {
+            "rule": f"人效 = 销售收入 / 人力成本（{node['name']}）",
+            "baseline": node["baseline"],
+            "attainment": attainment,
+            "history": [
+                {"label": f"{month}月", "value": round(value * rng.uniform(0.9, 1.1), 1)} for month in (7, 8, 9)
+            ],
+        }
+
+
+def generate_correlation_data(dept_ids: Sequence[str], coverage: float = 0.05, seed: int = 0) -> CorrelationData:
+    """以演示数据的总部条目为模板，为根部门及约 coverage 比例的部门生成扰动后的关联指标配置。"""
+    rng = random.Random(seed)
+    templates = seed_correlation_data["hq"]
+    data: CorrelationData = {}
+    for i, dept_id in enumerate(dept_ids):
+        if i and rng.random() >= coverage:
+            continue
+        entries = copy.deepcopy(templates)
+        for entry in entries:
+            coefficient = max(-0.99, min(0.99, entry["coefficient"] + rng.uniform(-0.1, 0.1)))
+            entry["coefficient"] = round(coefficient, 2)
+            entry["direction"] = "positive" if coefficient >= 0 else "negative"
+        data[dept_id] = entries
+    return data
+
+
+def generate_driver_series(
+    dept_ids: Sequence[str], months: int = 24, drivers: Optional[Sequence[str]] = None, seed: int = 0
+) -> DriverSeries:
+    """生成部门 × 月份的人效与驱动指标序列：人效由驱动指标线性组合加噪声得到，约 2% 的点缺失。"""
+    rng = np.random.default_rng(seed)
+    driver_ids: List[str] = list(drivers or DRIVER_META)
+    num = len(dept_ids)
+    values = rng.normal(size=(len(driver_ids), num, months))
+    weights = rng.uniform(-1, 1, size=(len(driver_ids), num, 1))
+    target = 12 + (values * weights).sum(axis=0) + rng.normal(scale=0.5, size=(num, months))
+    values[rng.random(values.shape) < 0.02] = np.nan
+    periods = [f"{2024 + m // 12}-{m % 12 + 1:02d}" for m in range(months)]
+    return DriverSeries(dept_ids=list(dept_ids), periods=periods, target=target, driver_ids=driver_ids, drivers=values)
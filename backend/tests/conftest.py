@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 后端模块是扁平布局（python app.py 在 backend/ 下运行），测试同样从 backend/ 导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+import copy
+import random
+
+from aggregation import PRIMARY_METRIC
+from dataset import aggregate_org
+from synthetic import generate_org_tree
+
+
+def random_updates(agg, count, seed):
+    """对随机叶子做 count 次修改（人数、部分指标，小数位数不一），返回修改后的叶子 id。"""
+    rng = random.Random(seed)
+    leaves = [dept_id for dept_id, node in agg.nodes.items() if not node.get("children")]
+    metric_ids = list(agg.metric_meta)
+    for _ in range(count):
+        picked = rng.sample(metric_ids, rng.randint(0, len(metric_ids)))
+        agg.update_leaf(
+            rng.choice(leaves),
+            headcount=rng.randint(0, 40),
+            metrics={mid: round(rng.uniform(5, 600), rng.choice([1, 2, 3])) for mid in picked},
+        )
+    return leaves
+
+
+def test_incremental_updates_match_full_rebuild():
+    tree = generate_org_tree(5000, seed=1)
+    agg = aggregate_org(tree)
+    random_updates(agg, 1500, seed=7)
+
+    fresh = aggregate_org(copy.deepcopy(tree))
+    for dept_id in agg.nodes:
+        assert agg.headcount[dept_id] == fresh.headcount[dept_id], dept_id
+        assert agg.values[dept_id] == fresh.values[dept_id], dept_id
+        assert agg.nodes[dept_id].get("value") == fresh.nodes[dept_id].get("value"), dept_id
+
+
+def test_projection_matches_applied_update():
+    tree = generate_org_tree(2000, seed=3)
+    agg = aggregate_org(tree)
+    leaves = random_updates(agg, 300, seed=11)
+    rng = random.Random(5)
+    for _ in range(50):
+        leaf = rng.choice(leaves)
+        headcount, value = rng.randint(0, 40), round(rng.uniform(5, 30), 2)
+        projected = agg.project({leaf: (headcount, value)})
+        agg.update_leaf(leaf, headcount=headcount, metrics={PRIMARY_METRIC: value})
+        for dept_id, (hc, val) in projected.items():
+            assert (agg.headcount[dept_id], agg.values[dept_id].get(PRIMARY_METRIC, 0)) == (hc, val), dept_id
@@ -0,0 +1,17 @@
+from aggregation import PRIMARY_METRIC
+from dataset import seed_dataset
+
+
+def test_status_summary_follows_firing_rules():
+    ds = seed_dataset()
+    store, rules = ds.org_store, ds.rules
+    for dept_id in ("hq", "south", "south-a"):
+        row = store.index[dept_id]
+        summary = ds.detail(dept_id)["statusSummary"]
+        fired = [rule.message for j, rule in enumerate(rules.rules) if rules.fired[row, j]]
+        assert f"达成率 {store.attainment(row):.0%}" in summary
+        assert all(message in summary for message in fired)
+        assert ("未触发告警规则" in summary) == (not fired)
+
+    ds.update_department("south-a", metrics={PRIMARY_METRIC: 5.0})
+    assert "人效低于基准 20% 以上" in ds.detail("south")["statusSummary"]
@@ -0,0 +1,53 @@
+import os
+
+from change_feed import HEADER_SIZE, ChangeLog
+
+
+def delta(n):
+    return lambda: ({"changed": [n]}, {"n": n})
+
+
+def test_reset_compacts_journal_and_keeps_versions_increasing(tmp_path):
+    path = str(tmp_path / "changes.ndjson")
+    replayed = []
+    writer = ChangeLog.create(path)
+    follower = ChangeLog(path, apply=replayed.append)
+    writer.start()
+    follower.start()
+    started = follower.feed.version
+
+    versions = [writer.commit("delta", delta(n))[0] for n in range(3)]
+    follower.sync()
+    assert replayed == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert [e.version for e in follower.feed.since(started)] == versions
+
+    before = os.path.getsize(path)
+    reset_version, _ = writer.commit("reset", lambda: ({"reason": "reload"}, None))
+    assert reset_version > versions[-1]
+    assert os.path.getsize(path) < before
+    follower.sync()
+    assert [(e.version, e.kind) for e in follower.feed.since(versions[-1])] == [(reset_version, "reset")]
+
+    after = writer.commit("delta", delta(3))[0]
+    follower.sync()
+    assert after > reset_version
+    assert replayed[-1] == {"n": 3}
+    assert follower.feed.version == writer.feed.version == after
+
+
+def test_new_worker_starts_at_end_of_journal(tmp_path):
+    path = str(tmp_path / "changes.ndjson")
+    writer = ChangeLog.create(path)
+    writer.start()
+    writer.commit("delta", delta(0))
+    writer.commit("reset", lambda: ({"reason": "reload"}, None))
+    last = writer.commit("delta", delta(1))[0]
+
+    replayed = []
+    worker = ChangeLog(path, apply=replayed.append)
+    worker.start()
+    # 截断前的修改已被 reset 取代，只重放其后的修改；事件缓冲从日志末尾开始
+    assert replayed == [{"n": 1}]
+    assert worker.feed.version == last
+    assert worker.feed.since(0) is None
+    assert os.path.getsize(path) > HEADER_SIZE
@@ -0,0 +1,61 @@
+import copy
+import random
+
+from aggregation import PRIMARY_METRIC
+from dataset import aggregate_org
+from org_store import OrgStore
+from synthetic import generate_org_tree
+
+
+def build_store(size, seed):
+    tree = generate_org_tree(size, seed=seed)
+    aggregate_org(tree)
+    return OrgStore.from_tree(tree)
+
+
+def test_store_updates_match_full_aggregation():
+    store = build_store(5000, seed=1)
+    leaves = [row for row in range(len(store)) if store.is_leaf[row]]
+    rng = random.Random(7)
+    for _ in range(1500):
+        picked = rng.sample(store.metric_ids, rng.randint(0, len(store.metric_ids)))
+        store.update_leaf(
+            rng.choice(leaves),
+            headcount=rng.randint(0, 40),
+            metrics={mid: round(rng.uniform(5, 600), rng.choice([1, 2, 3])) for mid in picked},
+        )
+
+    tree = store.materialize()
+    fresh = aggregate_org(copy.deepcopy(tree))
+    for row, dept_id in enumerate(store.ids):
+        assert int(store.headcount[row]) == fresh.headcount[dept_id], dept_id
+        assert {m["id"]: m["value"] for m in store.metric_list(row)} == fresh.values[dept_id], dept_id
+        if PRIMARY_METRIC in fresh.values[dept_id]:
+            assert float(store.value[row]) == fresh.values[dept_id][PRIMARY_METRIC], dept_id
+
+
+def test_store_projection_matches_applied_update():
+    store = build_store(2000, seed=3)
+    col = store.metric_col[PRIMARY_METRIC]
+    leaves = [row for row in range(len(store)) if store.is_leaf[row]]
+    rng = random.Random(5)
+    for _ in range(50):
+        leaf = rng.choice(leaves)
+        headcount, value = rng.randint(0, 40), round(rng.uniform(5, 30), 2)
+        projected = store.project({leaf: (headcount, value)})
+        store.update_leaf(leaf, headcount=headcount, metrics={PRIMARY_METRIC: value})
+        for row, (hc, val) in projected.items():
+            assert (int(store.headcount[row]), float(store.metrics[row, col])) == (hc, val), store.ids[row]
+
+
+def test_subtree_matches_projected_materialized_tree():
+    from app import ORG_LAZY_DEFAULT_FIELDS, project_subtree
+
+    store = build_store(3000, seed=9)
+    rng = random.Random(2)
+    for _ in range(30):
+        row = rng.randrange(len(store))
+        depth, offset, limit = rng.randint(0, 3), rng.randint(0, 2), rng.choice([None, 1, 3])
+        fields = rng.sample(ORG_LAZY_DEFAULT_FIELDS, rng.randint(1, len(ORG_LAZY_DEFAULT_FIELDS)))
+        expected = project_subtree(store.materialize(row), depth, fields, offset=offset, limit=limit)
+        assert store.subtree(row, depth, fields, offset=offset, limit=limit) == expected
@@ -0,0 +1,43 @@
+from dataset import seed_dataset
+from search_index import DepartmentSearchIndex, posting_arrays, tree_entries
+from synthetic import generate_org_tree
+
+
+def test_bulk_build_matches_incremental_adds():
+    tree = generate_org_tree(2000, seed=5)
+    bulk = DepartmentSearchIndex.from_tree(tree)
+    incremental = DepartmentSearchIndex()
+    stack = [tree]
+    while stack:  # 与 from_tree 相同的先序，结果按部门顺序排列
+        node = stack.pop()
+        incremental.add(node["id"], node.get("name", ""), node.get("leader", ""))
+        stack.extend(reversed(node.get("children") or []))
+    for query in ("研发", "zhang", "z", "yf", "华南", "ab"):
+        assert bulk.search(query) == incremental.search(query), query
+
+
+def test_single_letter_skips_pinyin_contains():
+    ds = seed_dataset()
+    assert ds.search_index.search("a") == []
+
+
+def test_rename_updates_search_index():
+    ds = seed_dataset()
+    index = ds.search_index
+    version = ds.version
+    ds.update_department("south-a", name="深圳数据平台部", leader="林晓")
+    assert ds.version > version
+    assert "south-a" in index.search("数据平台")
+    assert "south-a" in index.search("linxiao")
+    assert ds.org_store.name(ds.org_store.index["south-a"]) == "深圳数据平台部"
+
+
+def test_merged_parts_match_bulk_build():
+    entries = list(tree_entries(generate_org_tree(2000, seed=6)))
+    cuts = [0, 1, 700, 1300, len(entries)]
+    parts = [(start, posting_arrays(entries[start:stop])) for start, stop in zip(cuts, cuts[1:])]
+    merged = DepartmentSearchIndex.from_parts(entries, parts)
+    bulk = DepartmentSearchIndex.from_entries(entries)
+    assert merged._postings == bulk._postings
+    for query in ("研发", "zhang", "z", "yf", "华南"):
+        assert merged.search(query) == bulk.search(query), query
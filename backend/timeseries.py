@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 粒度由细到粗；day 为原始点（同日多条取均值），其余为按自然周/月/季/年的均值汇总
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+DEFAULT_MAX_POINTS = 200
+
+_EPOCH_WEEKDAY_OFFSET = 3  # 1970-01-01 为周四，+3 后按周一对齐
+
+
+@dataclass
+class _Level:
+    """某一粒度下全部序列首尾相接的列式数组：序列 i 占 [offsets[i], offsets[i+1])。"""
+
+    offsets: np.ndarray
+    days: np.ndarray  # 桶起始日（自 1970-01-01 起的天数）
+    values: np.ndarray
+
+
+def to_day(value: str) -> int:
+    """'2025-03-17' / '2025-03' / '2025' → 自 1970-01-01 起的天数；格式错误抛 ValueError。"""
+    return int(np.datetime64(value.strip(), "D").astype(np.int64))
+
+
+def _bucket(days: np.ndarray, granularity: str) -> np.ndarray:
+    """每个日期所属桶的起始日。"""
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        return (days + _EPOCH_WEEKDAY_OFFSET) // 7 * 7 - _EPOCH_WEEKDAY_OFFSET
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if granularity == "quarter":
+        months = months // 3 * 3
+    elif granularity == "year":
+        months = months // 12 * 12
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def _label(day: int, granularity: str) -> str:
+    date = np.datetime64(day, "D")
+    if granularity in ("day", "week"):
+        return str(date)
+    month = str(date.astype("datetime64[M]"))
+    if granularity == "month":
+        return month
+    year = month[:4]
+    if granularity == "quarter":
+        return f"{year}Q{(int(month[5:7]) - 1) // 3 + 1}"
+    return year
+
+
+def _rollup(series: np.ndarray, days: np.ndarray, values: np.ndarray, granularity: str, num_series: int) -> _Level:
+    """按（序列, 桶）分组求均值；输入已按（序列, 日期）排序，因此分组边界即键变化处。"""
+    buckets = _bucket(days, granularity)
+    if series.size == 0:
+        return _Level(np.zeros(num_series + 1, dtype=np.int64), buckets, values)
+    change = np.ones(series.size, dtype=bool)
+    change[1:] = (series[1:] != series[:-1]) | (buckets[1:] != buckets[:-1])
+    starts = np.flatnonzero(change)
+    counts = np.diff(np.append(starts, series.size))
+    means = np.add.reduceat(values, starts) / counts
+    offsets = np.zeros(num_series + 1, dtype=np.int64)
+    np.cumsum(np.bincount(series[starts], minlength=num_series), out=offsets[1:])
+    return _Level(offsets, buckets[starts], means)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标。
+    首尾点固定保留，中间每个桶选与「上一个保留点、下一桶均值点」构成三角形面积最大的点。
+    """
+    n = x.size
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean() if nhi > nlo else x[-1]
+        avg_y = y[nlo:nhi].mean() if nhi > nlo else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+
+class HistoryStore:
+    """
+    部门 × 指标的时间序列存储。
+
+    全部序列的原始点按（序列, 日期）排序后首尾相接存放在三列数组中，
+    周/月/季/年汇总在首次查询某粒度时一次性向量化算出并缓存；
+    查询按日期二分定位区间，超过 max_points 时用 LTTB 降采样，响应大小与时间跨度无关。
+    """
+
+    def __init__(self, keys: Sequence[Tuple[str, str]], series: np.ndarray, days: np.ndarray, values: np.ndarray):
+        self.keys = [tuple(k) for k in keys]
+        self.key_index: Dict[Tuple[str, str], int] = {k: i for i, k in enumerate(self.keys)}
+        self.series = series
+        self.days = days
+        self.values = values
+        self._levels: Dict[str, _Level] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ 构建
+    @classmethod
+    def from_points(
+        cls, keys: Sequence[Tuple[str, str]], series: np.ndarray, days: np.ndarray, values: np.ndarray
+    ) -> "HistoryStore":
+        """由无序的（序列号, 日期, 数值）点构建；NaN 点丢弃。"""
+        series = np.asarray(series, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        valid = np.isfinite(values)
+        series, days, values = series[valid], days[valid], values[valid]
+        order = np.lexsort((days, series))
+        return cls(keys, series[order], days[order], values[order])
+
+    @classmethod
+    def from_dense(
+        cls, dept_ids: Sequence[str], days: Sequence[int], metrics: Dict[str, np.ndarray]
+    ) -> "HistoryStore":
+        """由对齐的稠密矩阵构建：metrics[metric_id] 形如 (部门, 时间)，缺失为 NaN。"""
+        builder = HistoryBuilder()
+        for metric_id, matrix in metrics.items():
+            builder.add_dense(dept_ids, metric_id, days, matrix)
+        return builder.build()
+
+    # ------------------------------------------------------------------ 查询
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self.key_index
+
+    def level(self, granularity: str) -> _Level:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"unknown granularity: {granularity}")
+        level = self._levels.get(granularity)
+        if level is None:
+            with self._lock:
+                level = self._levels.get(granularity)
+                if level is None:
+                    level = self._levels[granularity] = _rollup(
+                        self.series, self.days, self.values, granularity, len(self.keys)
+                    )
+        return level
+
+    def query(
+        self,
+        dept_id: str,
+        metric: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        granularity: str = "month",
+        max_points: int = DEFAULT_MAX_POINTS,
+    ) -> Optional[dict]:
+        """返回 [start, end] 区间（天数，含端点所在的桶）内的序列；序列不存在时返回 None。"""
+        i = self.key_index.get((dept_id, metric))
+        if i is None:
+            return None
+        level = self.level(granularity)
+        lo, hi = int(level.offsets[i]), int(level.offsets[i + 1])
+        days = level.days[lo:hi]
+        values = level.values[lo:hi]
+        if start is not None:
+            first = int(_bucket(np.array([start]), granularity)[0])
+            cut = int(np.searchsorted(days, first, side="left"))
+            days, values = days[cut:], values[cut:]
+        if end is not None:
+            cut = int(np.searchsorted(days, end, side="right"))
+            days, values = days[:cut], values[:cut]
+        total = int(days.size)
+        if total > max_points:
+            keep = lttb(days.astype(np.float64), values, max_points)
+            days, values = days[keep], values[keep]
+        return {
+            "granularity": granularity,
+            "total": total,
+            "downsampled": total > days.size,
+            "points": [
+                {"date": str(np.datetime64(int(d), "D")), "label": _label(int(d), granularity), "value": round(float(v), 4)}
+                for d, v in zip(days.tolist(), values.tolist())
+            ],
+        }
+
+
+class HistoryBuilder:
+    """增量收集点（可分块追加），最后一次性排序成 HistoryStore。"""
+
+    def __init__(self) -> None:
+        self._keys: List[Tuple[str, str]] = []
+        self._key_index: Dict[Tuple[str, str], int] = {}
+        self._series: List[np.ndarray] = []
+        self._days: List[np.ndarray] = []
+        self._values: List[np.ndarray] = []
+
+    def keys(self) -> List[Tuple[str, str]]:
+        return list(self._keys)
+
+    def series_id(self, dept_id: str, metric_id: str) -> int:
+        key = (dept_id, metric_id)
+        idx = self._key_index.get(key)
+        if idx is None:
+            idx = self._key_index[key] = len(self._keys)
+            self._keys.append(key)
+        return idx
+
+    def add(self, dept_ids: Iterable[str], metric_ids: Iterable[str], days: np.ndarray, values: np.ndarray) -> None:
+        ids = np.fromiter((self.series_id(d, m) for d, m in zip(dept_ids, metric_ids)), dtype=np.int64)
+        self._series.append(ids)
+        self._days.append(np.asarray(days, dtype=np.int64))
+        self._values.append(np.asarray(values, dtype=np.float64))
+
+    def add_dense(self, dept_ids: Sequence[str], metric_id: str, days: Sequence[int], matrix: np.ndarray) -> None:
+        matrix = np.asarray(matrix, dtype=np.float64)
+        ids = np.fromiter((self.series_id(d, metric_id) for d in dept_ids), dtype=np.int64, count=len(dept_ids))
+        self._series.append(np.repeat(ids, matrix.shape[1]))
+        self._days.append(np.tile(np.asarray(days, dtype=np.int64), matrix.shape[0]))
+        self._values.append(matrix.reshape(-1))
+
+    def build(self) -> HistoryStore:
+        def concat(parts: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        return HistoryStore.from_points(
+            self._keys,
+            concat(self._series, np.int64),
+            concat(self._days, np.int64),
+            concat(self._values, np.float64),
+        )
@@ -0,0 +1,99 @@
+"""
+紧凑的响应格式。
+
+- 内容协商：Accept 含 application/msgpack（或 ?format=msgpack）时以 MessagePack 编码，否则为 JSON。
+  msgpack 列在 requirements.txt 中；环境中缺失时启动时记一条警告，之后所有请求都退回 JSON；
+- 列式组织树（/api/org?layout=columnar）：直接由 OrgStore 的列切片生成，
+  每个字段一个数组、父节点用下标表示、名称/负责人/状态用字符串表去重，不再逐节点重复键名。
+"""
+from __future__ import annotations
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from org_store import OrgStore
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 取决于部署环境
+    msgpack = None
+    logger.warning("msgpack is not installed; application/msgpack requests will be answered with JSON")
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+
+COLUMNAR_FIELDS = ("name", "leader", "headcount", "status", "baseline", "value", "metrics", "detail")
+COLUMNAR_DEFAULT_FIELDS = ("name", "leader", "headcount", "status", "baseline", "value", "metrics")
+
+
+def negotiate(accept: str, requested: Optional[str] = None) -> str:
+    """返回响应编码：msgpack 或 json。"""
+    if msgpack is None:
+        return "json"
+    if requested is not None:
+        return "msgpack" if requested == "msgpack" else "json"
+    accepted = {part.split(";")[0].strip().lower() for part in accept.split(",")}
+    return "msgpack" if accepted.intersection(_MSGPACK_TYPES) else "json"
+
+
+def encode_msgpack(payload) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def _nullable(values: np.ndarray) -> list:
+    """浮点列转列表，NaN 写成 null。"""
+    out = values.tolist()
+    missing = np.flatnonzero(np.isnan(values))
+    for i in missing.tolist():
+        out[i] = None
+    return out
+
+
+def columnar_tree(store: OrgStore, rows: np.ndarray, fields: Sequence[str]) -> dict:
+    """
+    rows 为先序排列的一段行号（子树切片，可按深度截断）；parentIdx 为父节点在 rows 中的位置，
+    范围根为 -1。childCount 是完整树中的子节点数，截断层的节点据此判断能否继续展开。
+    """
+    parents = store.parent[rows]
+    pos = np.searchsorted(rows, parents)
+    pos = np.minimum(pos, rows.size - 1)
+    parent_idx = np.where((parents >= 0) & (rows[pos] == parents), pos, -1)
+    payload = {
+        "layout": "columnar",
+        "rows": int(rows.size),
+        "ids": [store.ids[r] for r in rows.tolist()],
+        "parentIdx": parent_idx.tolist(),
+        "childCount": (store.child_ptr[rows + 1] - store.child_ptr[rows]).tolist(),
+    }
+
+    string_cols: List[Tuple[str, np.ndarray]] = [
+        (name, col[rows]) for name, col in (("name", store.name_idx), ("leader", store.leader_idx), ("status", store.status_idx))
+        if name in fields
+    ]
+    if string_cols:
+        # 只带本次用到的字符串，下标重新编号
+        used, inverse = np.unique(np.concatenate([col for _, col in string_cols]), return_inverse=True)
+        payload["strings"] = [store.strings[i] for i in used.tolist()]
+        for i, (name, _) in enumerate(string_cols):
+            payload[name] = inverse[i * rows.size : (i + 1) * rows.size].tolist()
+    if "headcount" in fields:
+        payload["headcount"] = store.headcount[rows].tolist()
+    if "baseline" in fields:
+        payload["baseline"] = _nullable(store.baseline[rows])
+    if "value" in fields:
+        payload["value"] = _nullable(store.value[rows])
+    if "metrics" in fields:
+        payload["metrics"] = {
+            "ids": list(store.metric_ids),
+            "names": [store.metric_meta[mid][0] for mid in store.metric_ids],
+            "units": [store.metric_meta[mid][1] for mid in store.metric_ids],
+            "values": [_nullable(store.metrics[rows, j]) for j in range(len(store.metric_ids))],
+        }
+    if "detail" in fields:
+        payload["detail"] = [store.detail(r) for r in rows.tolist()]
+    return payload
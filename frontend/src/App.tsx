@@ -13,7 +13,8 @@ import {
 } from './types';
 import {
   fetchCorrelations,
-  fetchOrg,
+  fetchOrgDetail,
+  fetchOrgSubtree,
   fetchSummary,
   searchDepartments,
 } from './api/client';
@@ -206,6 +207,22 @@ const renderCopilotText = (c: CopilotContent, sourceLabel?: string): string => {
   return lines.join('\n');
 };
 
+// 首屏只取两层，更深的层级在展开时按需加载
+const ORG_INITIAL_DEPTH = 2;
+
+// 不可变地替换树中 id 对应的节点（只复制到该节点的路径）
+const patchNode = (tree: OrgNode, id: string, patch: (node: OrgNode) => OrgNode): OrgNode => {
+  if (tree.id === id) return patch(tree);
+  if (!tree.children) return tree;
+  let changed = false;
+  const children = tree.children.map((child) => {
+    const next = patchNode(child, id, patch);
+    if (next !== child) changed = true;
+    return next;
+  });
+  return changed ? { ...tree, children } : tree;
+};
+
 const App: React.FC = () => {
   const [view, setView] = useState<'landing' | 'analysis'>('landing');
   const [summary, setSummary] = useState<MetricSummary[]>([]);
@@ -260,7 +277,10 @@ const App: React.FC = () => {
   useEffect(() => {
     (async () => {
       try {
-        const [summaryRes, orgRes] = await Promise.all([fetchSummary(), fetchOrg()]);
+        const [summaryRes, orgRes] = await Promise.all([
+          fetchSummary(),
+          fetchOrgSubtree({ depth: ORG_INITIAL_DEPTH }),
+        ]);
         setSummary(summaryRes.metrics);
         setOrgTree(orgRes.tree);
         setSelectedDept(summaryRes.defaultDeptId || orgRes.tree?.id || '');
@@ -304,6 +324,32 @@ const App: React.FC = () => {
     setCopilotOpen(true);
   };
 
+  const handleNodeExpand = async (node: OrgNode) => {
+    try {
+      const res = await fetchOrgSubtree({ root: node.id, depth: 1 });
+      setOrgTree((prev) => prev && patchNode(prev, node.id, (cur) => ({ ...cur, children: res.tree.children ?? [] })));
+    } catch {
+      message.error('加载下级部门失败');
+    }
+  };
+
+  // 按层加载的节点不带 detail，选中时再取
+  const handleNodeSelect = async (node: OrgNode) => {
+    setSelectedDept(node.id);
+    if (node.detail) {
+      handleNodeCopilot(node);
+      return;
+    }
+    try {
+      const { detail } = await fetchOrgDetail(node.id);
+      if (!detail) return;
+      setOrgTree((prev) => prev && patchNode(prev, node.id, (cur) => ({ ...cur, detail })));
+      handleNodeCopilot({ ...node, detail });
+    } catch {
+      message.error('加载部门详情失败');
+    }
+  };
+
   const handleNodeCopilot = (node: OrgNode) => {
     if (!node.detail) return;
     setCurrentContext('org');
@@ -624,8 +670,8 @@ const App: React.FC = () => {
           <OrgTree
             data={orgTree}
             activeId={selectedDept}
-            onSelect={(id) => setSelectedDept(id)}
-            onOpenCopilot={handleNodeCopilot}
+            onSelect={handleNodeSelect}
+            onExpand={handleNodeExpand}
             overviewMetrics={summary}
           />
           <div className="flex items-center justify-between">
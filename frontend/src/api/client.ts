@@ -1,13 +1,20 @@
 import { CorrelationMetric, MetricSummary, OrgNode } from '../types';
+import { decodeMsgpack, MSGPACK_MIMETYPE } from './msgpack';
 
 const API_BASE = 'http://localhost:5001/api';
 
-async function request<T>(path: string): Promise<T> {
-  const res = await fetch(`${API_BASE}${path}`);
+// 可缓存的接口按 Accept 返回 MessagePack（比 JSON 小、解析快），错误与其余响应仍为 JSON
+async function request<T>(path: string, init?: RequestInit): Promise<T> {
+  const headers = new Headers(init?.headers);
+  headers.set('Accept', `${MSGPACK_MIMETYPE}, application/json;q=0.9`);
+  const res = await fetch(`${API_BASE}${path}`, { ...init, headers });
   if (!res.ok) {
     const text = await res.text();
     throw new Error(text || `Request failed: ${res.status}`);
   }
+  if (res.headers.get('Content-Type')?.startsWith(MSGPACK_MIMETYPE)) {
+    return decodeMsgpack(await res.arrayBuffer()) as T;
+  }
   return res.json();
 }
 
@@ -20,6 +27,226 @@ export interface OrgResponse {
   tree: OrgNode;
 }
 
+export interface OrgQuery {
+  root?: string;
+  depth?: number;
+  fields?: string[];
+  offset?: number;
+  limit?: number;
+}
+
+// /org?layout=columnar：先序排列，每个字段一个数组，字符串字段为 strings 的下标
+export interface ColumnarTree {
+  layout: 'columnar';
+  rows: number;
+  ids: string[];
+  parentIdx: number[];
+  childCount: number[];
+  strings?: string[];
+  name?: number[];
+  leader?: number[];
+  status?: number[];
+  headcount?: number[];
+  baseline?: (number | null)[];
+  value?: (number | null)[];
+  metrics?: { ids: string[]; names: string[]; units: string[]; values: (number | null)[][] };
+  detail?: (OrgNode['detail'] | null)[];
+}
+
+export interface OrgDetailResponse {
+  deptId: string;
+  detail: OrgNode['detail'];
+}
+
+export interface CorrelationBatchResponse {
+  metrics: Record<string, CorrelationMetric[]>;
+  owners: Record<string, string | null>;
+}
+
+export type HistoryGranularity = 'day' | 'week' | 'month' | 'quarter' | 'year';
+
+export interface HistoryQuery {
+  deptId: string;
+  metric?: string;
+  from?: string;
+  to?: string;
+  granularity?: HistoryGranularity;
+  maxPoints?: number;
+}
+
+export interface HistoryResponse {
+  deptId: string;
+  metric: string;
+  granularity: HistoryGranularity;
+  total: number;
+  downsampled: boolean;
+  points: { date: string; label: string; value: number }[];
+}
+
+export interface RankingQuery {
+  metric?: string;
+  by?: 'value' | 'attainment' | 'gap';
+  order?: 'asc' | 'desc';
+  k?: number;
+  scope?: string;
+  level?: 'all' | 'leaf' | 'internal' | number;
+  below?: number;
+  above?: number;
+}
+
+export interface RankingItem {
+  rank: number;
+  id: string;
+  name: string;
+  leader: string;
+  headcount: number;
+  status: OrgNode['status'];
+  value: number;
+  baseline: number;
+  attainment: number | null;
+  score: number;
+}
+
+export interface RankingResponse {
+  metric: string;
+  by: string;
+  order: 'asc' | 'desc';
+  scope: string;
+  level: string;
+  total: number;
+  items: RankingItem[];
+}
+
+export interface AlertRule {
+  id: string;
+  type: 'threshold' | 'trend';
+  severity: 'warn' | 'bad';
+  field?: string;
+  op?: '<' | '<=' | '>' | '>=';
+  threshold?: number;
+  metric?: string;
+  points?: number;
+  direction?: 'down' | 'up';
+  message: string;
+}
+
+export interface AlertQuery {
+  severity?: 'warn' | 'bad';
+  rule?: string;
+  scope?: string;
+  level?: 'all' | 'leaf' | 'internal' | number;
+  offset?: number;
+  limit?: number;
+}
+
+export interface AlertItem {
+  id: string;
+  name: string;
+  leader: string;
+  depth: number;
+  headcount: number;
+  status: OrgNode['status'];
+  value: number;
+  baseline: number;
+  attainment: number | null;
+  rules: { id: string; severity: 'warn' | 'bad'; message: string }[];
+}
+
+export interface AlertsResponse {
+  scope: string;
+  level: string;
+  rules: AlertRule[];
+  counts: Record<'good' | 'warn' | 'bad', number>;
+  total: number;
+  alerts: AlertItem[];
+}
+
+export type SimulationChange =
+  | { deptId: string; headcount: number }
+  | { deptId: string; driver: string; delta: number; headcount?: number };
+
+export interface SimulatedNode {
+  id: string;
+  name: string;
+  depth: number;
+  leaf: boolean;
+  headcount: number;
+  projectedHeadcount: number;
+  value: number;
+  projectedValue: number;
+  delta: number;
+  baseline: number;
+  attainment: number | null;
+  projectedAttainment: number | null;
+  status: OrgNode['status'];
+  projectedStatus: OrgNode['status'];
+}
+
+export interface SimulationResponse {
+  metric: string;
+  version: number;
+  affected: SimulatedNode[];
+  // 驱动指标没有可用系数、未参与推演的叶子数
+  skipped: { deptId: string; driver: string; leaves: number }[];
+}
+
+export interface PeriodsResponse {
+  periods: string[];
+  // 各期节点数之和与跨期共享后实际保存的节点数
+  nodes: number;
+  sharedNodes: number;
+}
+
+export interface PeriodChange {
+  id: string;
+  name: string;
+  change: 'added' | 'removed' | 'moved' | 'modified';
+  fromParent?: string | null;
+  toParent?: string | null;
+  fields?: Record<string, { from: unknown; to: unknown }>;
+}
+
+export interface PeriodDiffResponse {
+  from: string;
+  to: string;
+  changes: PeriodChange[];
+}
+
+export interface NodeDelta {
+  id: string;
+  headcount: number;
+  value: number;
+  status: OrgNode['status'];
+  metrics: OrgNode['metrics'];
+  // 只在改名 / 换负责人的部门上出现
+  name?: string;
+  leader?: string;
+}
+
+export interface ChangeHandlers {
+  onDelta: (version: number, changed: NodeDelta[]) => void;
+  // 数据整体替换或增量已无法补齐，需重新拉取 /summary 与 /org
+  onReset: (version: number) => void;
+  onHello?: (version: number) => void;
+}
+
+export interface HierarchyEntry {
+  id: string;
+  name: string;
+  depth: number;
+}
+
+export interface DescendantsResponse {
+  deptId: string;
+  total: number;
+  descendants: HierarchyEntry[];
+}
+
+export interface AncestorsResponse {
+  deptId: string;
+  ancestors: HierarchyEntry[];
+}
+
 export interface CorrelationResponse {
   deptId: string;
   metrics: CorrelationMetric[];
@@ -27,7 +254,122 @@ export interface CorrelationResponse {
 
 export const fetchSummary = () => request<SummaryResponse>('/summary');
 export const fetchOrg = () => request<OrgResponse>('/org');
+export const fetchOrgSubtree = ({ root, depth, fields, offset, limit }: OrgQuery = {}) => {
+  const params = new URLSearchParams();
+  if (root) params.set('root', root);
+  params.set('depth', String(depth ?? 2));
+  if (fields?.length) params.set('fields', fields.join(','));
+  if (offset !== undefined) params.set('offset', String(offset));
+  if (limit !== undefined) params.set('limit', String(limit));
+  return request<OrgResponse>(`/org?${params.toString()}`);
+};
+// 列式载荷还原为嵌套树；截断层的节点带 hasChildren / childCount 桩信息，与懒加载模式一致
+export const decodeColumnarTree = (data: ColumnarTree): OrgNode => {
+  const strings = data.strings ?? [];
+  const nodes: OrgNode[] = data.ids.map((id, i) => {
+    const node = { id } as OrgNode;
+    if (data.name) node.name = strings[data.name[i]];
+    if (data.leader) node.leader = strings[data.leader[i]];
+    if (data.status) node.status = strings[data.status[i]] as OrgNode['status'];
+    if (data.headcount) node.headcount = data.headcount[i];
+    if (data.baseline) node.baseline = data.baseline[i] ?? 0;
+    if (data.value) node.value = data.value[i] ?? 0;
+    if (data.metrics) {
+      const { ids, names, units, values } = data.metrics;
+      node.metrics = ids.flatMap((metricId, j) =>
+        values[j][i] === null ? [] : [{ id: metricId, name: names[j], value: values[j][i] as number, unit: units[j] }],
+      );
+    }
+    if (data.detail?.[i]) node.detail = data.detail[i] ?? undefined;
+    node.hasChildren = data.childCount[i] > 0;
+    node.childCount = data.childCount[i];
+    return node;
+  });
+  data.parentIdx.forEach((parent, i) => {
+    if (parent < 0) return;
+    (nodes[parent].children ??= []).push(nodes[i]);
+  });
+  return nodes[0];
+};
+export const fetchOrgColumnar = async ({ root, depth, fields }: Omit<OrgQuery, 'offset' | 'limit'> = {}) => {
+  const params = new URLSearchParams({ layout: 'columnar' });
+  if (root) params.set('root', root);
+  if (depth !== undefined) params.set('depth', String(depth));
+  if (fields?.length) params.set('fields', fields.join(','));
+  const data = await request<ColumnarTree>(`/org?${params.toString()}`);
+  return { tree: decodeColumnarTree(data) } as OrgResponse;
+};
+// NDJSON 导出（每行一个部门，先序）用于下载链接，不经 request 解析
+export const orgExportUrl = (scope?: string, fields?: string[]) => {
+  const params = new URLSearchParams({ format: 'ndjson' });
+  if (scope) params.set('scope', scope);
+  if (fields?.length) params.set('fields', fields.join(','));
+  return `${API_BASE}/org/export?${params.toString()}`;
+};
+export const fetchOrgDetail = (deptId: string) =>
+  request<OrgDetailResponse>(`/org/${encodeURIComponent(deptId)}/detail`);
+export const fetchDescendants = (deptId: string, { depth, offset, limit }: { depth?: number; offset?: number; limit?: number } = {}) => {
+  const params = new URLSearchParams();
+  if (depth !== undefined) params.set('depth', String(depth));
+  if (offset !== undefined) params.set('offset', String(offset));
+  if (limit !== undefined) params.set('limit', String(limit));
+  const qs = params.toString();
+  return request<DescendantsResponse>(`/org/${encodeURIComponent(deptId)}/descendants${qs ? `?${qs}` : ''}`);
+};
+export const fetchAncestors = (deptId: string) =>
+  request<AncestorsResponse>(`/org/${encodeURIComponent(deptId)}/ancestors`);
 export const fetchCorrelations = (deptId: string) =>
   request<CorrelationResponse>(`/correlations?deptId=${encodeURIComponent(deptId)}`);
+export const fetchCorrelationsBatch = (deptIds: string[]) =>
+  request<CorrelationBatchResponse>('/correlations', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ deptIds }),
+  });
+export const fetchHistory = ({ deptId, metric, from, to, granularity, maxPoints }: HistoryQuery) => {
+  const params = new URLSearchParams({ deptId });
+  if (metric) params.set('metric', metric);
+  if (from) params.set('from', from);
+  if (to) params.set('to', to);
+  if (granularity) params.set('granularity', granularity);
+  if (maxPoints !== undefined) params.set('maxPoints', String(maxPoints));
+  return request<HistoryResponse>(`/history?${params.toString()}`);
+};
+export const fetchRankings = (query: RankingQuery = {}) => {
+  const params = new URLSearchParams();
+  Object.entries(query).forEach(([key, value]) => {
+    if (value !== undefined) params.set(key, String(value));
+  });
+  const qs = params.toString();
+  return request<RankingResponse>(`/rankings${qs ? `?${qs}` : ''}`);
+};
+export const fetchAlerts = (query: AlertQuery = {}) => {
+  const params = new URLSearchParams();
+  Object.entries(query).forEach(([key, value]) => {
+    if (value !== undefined) params.set(key, String(value));
+  });
+  const qs = params.toString();
+  return request<AlertsResponse>(`/alerts${qs ? `?${qs}` : ''}`);
+};
+export const simulate = (changes: SimulationChange[]) =>
+  request<SimulationResponse>('/simulate', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ changes }),
+  });
+export const fetchPeriods = () => request<PeriodsResponse>('/periods');
+export const fetchPeriodDiff = (from: string, to: string) =>
+  request<PeriodDiffResponse>(`/periods/diff?from=${encodeURIComponent(from)}&to=${encodeURIComponent(to)}`);
+export const subscribeChanges = ({ onDelta, onReset, onHello }: ChangeHandlers, since?: number) => {
+  // EventSource 断线重连时会自动带上 Last-Event-ID，从上次收到的版本续传
+  const source = new EventSource(`${API_BASE}/stream${since !== undefined ? `?since=${since}` : ''}`);
+  source.addEventListener('hello', (e) => onHello?.(JSON.parse((e as MessageEvent).data).version));
+  source.addEventListener('delta', (e) => {
+    const data = JSON.parse((e as MessageEvent).data);
+    onDelta(data.version, data.changed);
+  });
+  source.addEventListener('reset', (e) => onReset(JSON.parse((e as MessageEvent).data).version));
+  return () => source.close();
+};
 export const searchDepartments = (query: string) =>
   request<{ matchedDepartments: string[] }>(`/search?query=${encodeURIComponent(query)}`);
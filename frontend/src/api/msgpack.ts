@@ -0,0 +1,101 @@
+// MessagePack 解码（后端 wire.encode_msgpack 的响应）：只需覆盖 JSON 可表达的类型与 bin，
+// 不支持 ext；64 位整数按 Number 返回（部门人数、版本号等远小于 2^53）
+export const MSGPACK_MIMETYPE = 'application/msgpack';
+
+export const decodeMsgpack = (buffer: ArrayBuffer): unknown => {
+  const bytes = new Uint8Array(buffer);
+  const view = new DataView(buffer);
+  const utf8 = new TextDecoder();
+  let pos = 0;
+
+  const take = (size: number) => {
+    const start = pos;
+    pos += size;
+    if (pos > bytes.length) throw new Error('truncated msgpack payload');
+    return start;
+  };
+  const str = (size: number) => {
+    const start = take(size);
+    return utf8.decode(bytes.subarray(start, start + size));
+  };
+  const bin = (size: number) => {
+    const start = take(size);
+    return bytes.slice(start, start + size);
+  };
+  const array = (size: number) => {
+    const out: unknown[] = new Array(size);
+    for (let i = 0; i < size; i += 1) out[i] = read();
+    return out;
+  };
+  const map = (size: number) => {
+    const out: Record<string, unknown> = {};
+    for (let i = 0; i < size; i += 1) {
+      const key = String(read());
+      out[key] = read();
+    }
+    return out;
+  };
+
+  const read = (): unknown => {
+    const type = bytes[take(1)];
+    if (type <= 0x7f) return type;
+    if (type >= 0xe0) return type - 0x100;
+    if ((type & 0xe0) === 0xa0) return str(type & 0x1f);
+    if ((type & 0xf0) === 0x90) return array(type & 0x0f);
+    if ((type & 0xf0) === 0x80) return map(type & 0x0f);
+    switch (type) {
+      case 0xc0:
+        return null;
+      case 0xc2:
+        return false;
+      case 0xc3:
+        return true;
+      case 0xc4:
+        return bin(view.getUint8(take(1)));
+      case 0xc5:
+        return bin(view.getUint16(take(2)));
+      case 0xc6:
+        return bin(view.getUint32(take(4)));
+      case 0xca:
+        return view.getFloat32(take(4));
+      case 0xcb:
+        return view.getFloat64(take(8));
+      case 0xcc:
+        return view.getUint8(take(1));
+      case 0xcd:
+        return view.getUint16(take(2));
+      case 0xce:
+        return view.getUint32(take(4));
+      case 0xcf:
+        return Number(view.getBigUint64(take(8)));
+      case 0xd0:
+        return view.getInt8(take(1));
+      case 0xd1:
+        return view.getInt16(take(2));
+      case 0xd2:
+        return view.getInt32(take(4));
+      case 0xd3:
+        return Number(view.getBigInt64(take(8)));
+      case 0xd9:
+        return str(view.getUint8(take(1)));
+      case 0xda:
+        return str(view.getUint16(take(2)));
+      case 0xdb:
+        return str(view.getUint32(take(4)));
+      case 0xdc:
+        return array(view.getUint16(take(2)));
+      case 0xdd:
+        return array(view.getUint32(take(4)));
+      case 0xde:
+        return map(view.getUint16(take(2)));
+      case 0xdf:
+        return map(view.getUint32(take(4)));
+      default:
+        throw new Error(`unsupported msgpack type 0x${type.toString(16)}`);
+    }
+  };
+
+  const value = read();
+  if (pos !== bytes.length) throw new Error('trailing bytes after msgpack payload');
+  return value;
+};
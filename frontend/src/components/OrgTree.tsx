@@ -14,8 +14,9 @@ const statusColors: Record<string, string> = {
 interface Props {
   data?: OrgNode;
   activeId?: string;
-  onSelect: (id: string) => void;
-  onOpenCopilot: (node: OrgNode) => void;
+  onSelect: (node: OrgNode) => void;
+  // 展开一个只有桩信息（hasChildren 但未带 children）的节点时加载其下级
+  onExpand?: (node: OrgNode) => void;
   overviewMetrics?: MetricSummary[];
 }
 
@@ -24,7 +25,7 @@ interface LevelNode {
   depth: number;
 }
 
-export const OrgTree: React.FC<Props> = ({ data, activeId, onSelect, onOpenCopilot, overviewMetrics }) => {
+export const OrgTree: React.FC<Props> = ({ data, activeId, onSelect, onExpand, overviewMetrics }) => {
   const [expanded, setExpanded] = useState<Set<string>>(() => (data ? new Set([data.id]) : new Set()));
   const rootId = data?.id;
   const overviewMap = useMemo(() => {
@@ -49,11 +50,12 @@ export const OrgTree: React.FC<Props> = ({ data, activeId, onSelect, onOpenCopil
     return result;
   }, [data, expanded]);
 
-  const toggleExpand = (id: string) => {
+  const toggleExpand = (node: OrgNode) => {
+    if (!expanded.has(node.id) && !node.children && node.hasChildren) onExpand?.(node);
     setExpanded((prev) => {
       const next = new Set(prev);
-      if (next.has(id)) next.delete(id);
-      else next.add(id);
+      if (next.has(node.id)) next.delete(node.id);
+      else next.add(node.id);
       return next;
     });
   };
@@ -78,7 +80,7 @@ export const OrgTree: React.FC<Props> = ({ data, activeId, onSelect, onOpenCopil
                 <div key={idx} className="flex flex-col gap-3 min-w-[260px]">
                   <div className="text-xs text-slate-500 text-center">Level {idx + 1}</div>
                   {level.map(({ node }) => {
-                    const hasChildren = (node.children?.length || 0) > 0;
+                    const hasChildren = node.hasChildren ?? (node.children?.length || 0) > 0;
                     const isExpanded = expanded.has(node.id);
                     const isActive = node.id === activeId;
                     const metricList =
@@ -118,13 +120,7 @@ export const OrgTree: React.FC<Props> = ({ data, activeId, onSelect, onOpenCopil
                           }`}
                         >
                           <div className="flex items-start justify-between">
-                            <div
-                              className="flex-1 cursor-pointer"
-                              onClick={() => {
-                                onSelect(node.id);
-                                onOpenCopilot(node);
-                              }}
-                            >
+                            <div className="flex-1 cursor-pointer" onClick={() => onSelect(node)}>
                               <div className="text-slate-800 font-medium">{node.name}</div>
                               <div className="text-xs text-slate-600 mt-0.5">负责人：{node.leader}</div>
                               <div className="text-xs text-slate-600 mt-1">
@@ -140,7 +136,7 @@ export const OrgTree: React.FC<Props> = ({ data, activeId, onSelect, onOpenCopil
                                   size="small"
                                   type="text"
                                   icon={isExpanded ? <CaretDownOutlined /> : <CaretRightOutlined />}
-                                  onClick={() => toggleExpand(node.id)}
+                                  onClick={() => toggleExpand(node)}
                                 >
                                   {isExpanded ? '收起' : '展开'}
                                 </Button>
@@ -33,6 +33,11 @@ export interface OrgNode {
     actions?: string[];
   };
   children?: OrgNode[];
+  // 懒加载模式下的子节点桩信息
+  hasChildren?: boolean;
+  childCount?: number;
+  // 负责人视图中通向其各部门的路径节点（不在其范围内，只有 id / 名称）
+  outOfScope?: boolean;
 }
 
 export interface CorrelationMetric {
@@ -46,6 +51,12 @@ export interface CorrelationMetric {
     rule: string;
     breakdown: { label: string; value: number }[];
   };
+  // 由月度序列计算得到时附带的统计量
+  spearman?: number | null;
+  pValue?: number | null;
+  spearmanPValue?: number | null;
+  samples?: number;
+  significant?: boolean;
 }
 
 export interface CopilotContent {
@@ -70,7 +70,22 @@ start_backend() {
   source "$VENV_DIR/bin/activate"
   log "Starting backend on $BACKEND_HOST:$BACKEND_PORT (log: $ROOT/backend.log)"
   (
-    cd "$BACKEND_DIR" && HOST="$BACKEND_HOST" PORT="$BACKEND_PORT" python app.py >"$ROOT/backend.log" 2>&1 &
+    # 本地开发没有注入负责人身份的网关：关闭强制的负责人视图，未带身份的请求看全公司数据
+    cd "$BACKEND_DIR" && HOST="$BACKEND_HOST" PORT="$BACKEND_PORT" HR_SCOPE_REQUIRED="${HR_SCOPE_REQUIRED:-0}" python app.py >"$ROOT/backend.log" 2>&1 &
+    echo $! >"$BACKEND_PID_FILE"
+  )
+}
+
+start_backend_prod() {
+  if is_running "$BACKEND_PID_FILE"; then
+    log "Backend already running (pid $(cat "$BACKEND_PID_FILE"))"
+    return
+  fi
+  # shellcheck source=/dev/null
+  source "$VENV_DIR/bin/activate"
+  log "Starting backend (gunicorn, ${WEB_CONCURRENCY:-auto} workers) on $BACKEND_HOST:$BACKEND_PORT (log: $ROOT/backend.log)"
+  (
+    cd "$BACKEND_DIR" && HOST="$BACKEND_HOST" PORT="$BACKEND_PORT" gunicorn -c gunicorn.conf.py app:app >"$ROOT/backend.log" 2>&1 &
     echo $! >"$BACKEND_PID_FILE"
   )
 }
@@ -114,6 +129,15 @@ case "${1:-start}" in
     start_frontend
     log "All services started. Backend: http://$BACKEND_HOST:$BACKEND_PORT  Frontend: http://$FRONTEND_HOST:$FRONTEND_PORT"
     ;;
+  prod)
+    # 生产模式：gunicorn 多 worker（预加载快照、写时复制共享）+ 前端 dev server
+    stop_all
+    ensure_venv
+    ensure_frontend
+    start_backend_prod
+    start_frontend
+    log "All services started (prod backend). Backend: http://$BACKEND_HOST:$BACKEND_PORT  Frontend: http://$FRONTEND_HOST:$FRONTEND_PORT"
+    ;;
   stop)
     stop_all
     log "Services stopped."
@@ -122,7 +146,7 @@ case "${1:-start}" in
     status
     ;;
   *)
-    echo "Usage: $0 [start|stop|status]"
+    echo "Usage: $0 [start|prod|stop|status]"
     exit 1
     ;;
 esac